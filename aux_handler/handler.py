@@ -10,52 +10,144 @@ import sys
 
 
 
-# Obtains the command line inputs, verifies that the inference method is either "enumerate" or "rejection"
+# Inference methods which can be requested
+valid_inference_methods = ["enumerate", "enumerate-vectorized", "bdd", "variable-elimination", "rejection", "likelihood", "forward",
+    "metropolis-hastings", "sample"]
+
+
+# Options which may follow the program filepath, in any order, and their default values
+# "calculate_time": Shows the inference time
+# "automatic_elimination": Eliminates the variables which are no longer used (see parser/liveness.py)
+# "merge_nodes": Merges the circuit nodes holding the same environment after each statement overwriting variables
+# "elimination_order": Heuristic ordering the variables summed out by variable elimination
+# "factorize": Infers the independent parts of the program separately (see parser/independence.py)
+# "num_samples", "target_error", "time_budget": Sampling budget, sampling stops once any requested one is reached (see
+# inference/inference_sampling.py), None if not requested
+# "posterior_sampling": The rejection method samples the posterior distribution directly, so no sample is rejected
+# "num_workers": Number of processes sampling at the same time
+# "seed": Seed of the random number generators, the same as inference/inference_sampling.py sampling_seed by default
+# "burn_in", "thinning", "num_chains": Metropolis-Hastings chains (see inference/inference_mcmc.py), None if not requested
+# "uniform_sequence": Uniform variates selecting the circuit children when sampling, independent, stratified, or quasi-random
+# (see inference/inference_sampling.py)
+# "array_circuit": Stores the circuit nodes as arrays while it is built (see inference/inference_arrays.py)
+default_options = {
+    "calculate_time":False,
+    "automatic_elimination":True,
+    "merge_nodes":False,
+    "elimination_order":"min-fill",
+    "factorize":True,
+    "num_samples":None,
+    "target_error":None,
+    "time_budget":None,
+    "posterior_sampling":False,
+    "num_workers":1,
+    "seed":0,
+    "burn_in":None,
+    "thinning":None,
+    "num_chains":None,
+    "uniform_sequence":"random",
+    "array_circuit":False
+}
+
+
+# Flags, and the option value they set
+# {"flag":["option name", value], ...}
+valid_flags = {
+    "-T":["calculate_time", True],
+    "--time":["calculate_time", True],
+    "--no-auto-elimination":["automatic_elimination", False],
+    "--merge-nodes":["merge_nodes", True],
+    "--no-factorization":["factorize", False],
+    "--posterior":["posterior_sampling", True],
+    "--array-circuit":["array_circuit", True]
+}
+
+
+# Options with a value, given as "--option=value"
+# The value must be either one of a list of valid values, or a positive number of a given type (int or float)
+# Numbers may also be zero if the option has a third element set to True
+# {"--option":["option name", [valid value, ...] or type, (optional) zero is valid (bool)], ...}
+valued_options = {
+    "--elimination-order":["elimination_order", ["min-fill", "min-degree"]],
+    "--samples":["num_samples", int],
+    "--target-error":["target_error", float],
+    "--time-budget":["time_budget", float],
+    "--workers":["num_workers", int],
+    "--seed":["seed", int, True],
+    "--burn-in":["burn_in", int, True],
+    "--thinning":["thinning", int],
+    "--chains":["num_chains", int],
+    "--sequence":["uniform_sequence", ["random", "stratified", "sobol"]]
+}
+
+
+# Obtains the command line inputs, verifies that the inference method is one of the valid ones
 # Throws exception if not possible
-# returns ["inference method", "file name"]
+# returns ["inference method", "file name", {"option name":value, ...}]
 def program_inputs():
 
     cli_inputs = sys.argv
 
     # Verifies a correct number of arguments
-    if len(cli_inputs) not in  [3, 4]:
-        print("Incorrect number of inputs, expected 2 or 3 inputs, %d inputs were provided" % (len(cli_inputs) - 1, ))
+    if len(cli_inputs) < 3:
+        print("Incorrect number of inputs, expected at least 2 inputs, %d inputs were provided" % (len(cli_inputs) - 1, ))
         # Exception name obtained from https://docs.python.org/3/tutorial/errors.html
         raise ValueError()
 
     # Inputs structure
-    if len(cli_inputs) == 3:
-        inference_method, program_filepath = cli_inputs[1:]
+    inference_method, program_filepath = cli_inputs[1:3]
+    given_options = cli_inputs[3:]
 
-        # Verifies the inference method
-        if inference_method not in ["enumerate", "rejection"]:
-            print("Inference method must be 'enumerate' or 'rejection', '%s' input was provided" % (inference_method, ))
-            raise ValueError()
+    # Verifies the inference method
+    if inference_method not in valid_inference_methods:
+        print("Inference method must be one of '%s', '%s' input was provided" % ("', '".join(valid_inference_methods), inference_method))
+        raise ValueError()
 
-        # Verifies the file exists
-        if not os.path.isfile(program_filepath):
-            print("Input filepath does not exist or is not a file")
-            raise ValueError()
+    # Verifies the file exists
+    if not os.path.isfile(program_filepath):
+        print("Input filepath does not exist or is not a file")
+        raise ValueError()
 
-        calculate_time = False
+    requested_options = dict(default_options)
 
-    elif len(cli_inputs) == 4:
-        inference_method, program_filepath, time_command = cli_inputs[1:]
+    # Verifies the options
+    for an_option in given_options:
 
-        # Verifies the inference method
-        if inference_method not in ["enumerate", "rejection"]:
-            print("Inference method must be 'enumerate' or 'rejection', '%s' input was provided" % (inference_method, ))
-            raise ValueError()
+        if an_option in valid_flags:
+            [option_name, option_value] = valid_flags[an_option]
+            requested_options[option_name] = option_value
+            continue
 
-        # Verifies the file exists
-        if not os.path.isfile(program_filepath):
-            print("Input filepath does not exist or is not a file")
-            raise ValueError()
+        [option_key, _equal_sign, option_value] = an_option.partition("=")
 
-        if time_command not in ["-T", "--time"]:
-            print("Time command not recognized, must be '-T' or '--time', '%s' input was provided" % (time_command, ))
+        if option_key not in valued_options:
+            print("Option not recognized, must be one of '%s', or '%s' followed by '=value', '%s' input was provided" % (
+                "', '".join(valid_flags), "=', '".join(valued_options), an_option))
             raise ValueError()
 
-        calculate_time = True
+        [option_name, valid_values] = valued_options[option_key][0:2]
+
+        if type(valid_values) == list:
+
+            if option_value not in valid_values:
+                print("Option '%s' must be one of '%s', '%s' input was provided" % (option_key, "', '".join(valid_values), option_value))
+                raise ValueError()
+
+            requested_options[option_name] = option_value
+            continue
+
+        try:
+            requested_options[option_name] = valid_values(option_value)
+        except ValueError:
+            requested_options[option_name] = None
+
+        zero_is_valid = valued_options[option_key][2:] == [True]
+
+        given_number = requested_options[option_name]
+
+        if (given_number == None) or (not (given_number >= 0 if zero_is_valid else given_number > 0)):
+            print("Option '%s' must be a %s %s, '%s' input was provided" % (option_key, "non-negative" if zero_is_valid else "positive",
+                valid_values.__name__, option_value))
+            raise ValueError()
 
-    return [inference_method, program_filepath, calculate_time]
+    return [inference_method, program_filepath, requested_options]
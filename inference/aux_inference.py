@@ -6,7 +6,20 @@ Auxiliary functions, added here to avoid clutter.
 
 
 from bisect import bisect_left
+import multiprocessing
 import random
+import sys
+
+
+
+# Numeric tolerance when grouping traces by value (marginalization and variable elimination)
+# Numbers are rounded to this many decimal places, so values differing by less than about 1e-10 belong to the same group
+# (unless they fall on opposite sides of a rounding boundary)
+grouping_decimals = 10
+
+
+# All NaN values are grouped together, NaN is not equal to itself so a single object is used as their key
+nan_grouping_key = float("nan")
 
 
 
@@ -50,25 +63,89 @@ def select_random_by_weight(given_selection):
 
 
 
+# Obtains the canonical (hashable) form of a value for grouping
+# Strings are interned, numbers are rounded to "grouping_decimals" decimal places
+def canonical_grouping_value(given_value):
+
+    if type(given_value).__name__ == "str":
+        return sys.intern(given_value)
+
+    if given_value != given_value:
+        return nan_grouping_key
+
+    return round(given_value, grouping_decimals)
+
+
+
+# Obtains the canonical (hashable) form of a variable for grouping, considering the same information as its string representation
+# return (class, E, Var, lower bound, upper bound, Pr)
+def variable_grouping_key(given_variable):
+    return (given_variable.variable_class, canonical_grouping_value(given_variable.expectation), canonical_grouping_value(given_variable.variance),
+            canonical_grouping_value(given_variable.lower_bound), canonical_grouping_value(given_variable.upper_bound),
+            canonical_grouping_value(given_variable.probability))
+
+
+
 # Determines the starting line of a tree.
+# Explored without recursion, since sequences of statements nest one level per statement
 def obtain_starting_line(given_tree):
 
     if type(given_tree).__name__ == "Token":
         return given_tree.line
-    else:
-        return min(obtain_starting_line(a_subtree) for a_subtree in given_tree.children)
 
+    starting_line = None
 
+    trees_to_be_explored = Simple_Stack()
+    trees_to_be_explored.put(given_tree)
 
-# Puts items in a stack
-def add_to_stack(given_stack, given_arr):
+    while trees_to_be_explored.has_contents():
+
+        present_tree = trees_to_be_explored.get()
 
-    for an_element in given_arr[::-1]:
-        given_stack.put(an_element)
+        if type(present_tree).__name__ == "Token":
+            if (starting_line == None) or (present_tree.line < starting_line):
+                starting_line = present_tree.line
+        else:
+            add_to_stack(trees_to_be_explored, present_tree.children)
+
+    return starting_line
+
+
+
+# Obtains the number of worker processes which can be used
+# Workers are forked, so that they inherit the circuits and compiled programs (which cannot be sent to them), but forking is not
+# available on every platform (e.g. Windows)
+# return num_workers, 1 if processes cannot be forked
+def available_num_workers(num_workers):
+
+    if (num_workers > 1) and ("fork" not in multiprocessing.get_all_start_methods()):
+        print("Processes cannot be forked on this platform, using a single worker instead of %d" % (num_workers, ), file=sys.stderr)
+        return 1
+
+    return num_workers
+
+
+
+# Receives the result of a worker process
+# Exits if the worker stopped before sending it, its exception (if any) is shown by the worker itself
+def receive_from_worker(worker_connection):
+
+    try:
+        return worker_connection.recv()
+    except EOFError:
+        print("A worker process failed before sending its result", file=sys.stderr)
+        sys.exit(1)
+
+
+
+# Puts items in a stack, the first item ends on top
+def add_to_stack(given_stack, given_arr):
+    given_stack.arr.extend(reversed(given_arr))
 
 
 
 # Stack
+# The top is the end of the array, so that adding and retrieving items takes constant time
 class Simple_Stack(object):
 
     # Starts with an empty array
@@ -78,17 +155,12 @@ class Simple_Stack(object):
 
     # Adds item to stack, in front of everything else
     def put(self, an_element):
-        self.arr = [an_element] + self.arr
+        self.arr.append(an_element)
 
 
     # Retrieves item from the stack
     def get(self):
-        retrieved_value = self.arr[0]
-
-        # Updates the stack
-        self.arr = self.arr[1:]
-
-        return retrieved_value
+        return self.arr.pop()
 
 
     # Finds if the stack still has items within
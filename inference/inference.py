@@ -5,30 +5,190 @@ Implements the inference by search algorithm.
 """
 
 
+import random
+import sys
 import time
 
-from .inference_circuit import Circuit
+import numpy as np
+
+from .inference_bdd import Compiled_program
+from .inference_circuit import Circuit, print_conditional_probability
+from .inference_factors import Factor_graph
+from .inference_forward import Forward_sampler
+from .inference_mcmc import metropolis_hastings, Metropolis_hastings_sampler
+from .inference_parallel import Parallel_enumeration
+from .inference_sampling import adaptive_sampling, default_num_traces, sampling_seed
+from .inference_vectorized import Vectorized_enumeration
 
 
 
 # Main function
-def infer(given_program_structure, given_inference_method, requested_to_calculate_time):
+# merge_equivalent_nodes (bool): Whether or not the circuit merges the nodes holding the same environment (see Circuit)
+# elimination_order (str): Heuristic used by variable elimination, "min-fill" or "min-degree"
+# factorize (bool): Whether or not enumeration and sampling infer the independent parts of the program separately
+# num_samples (int), target_error (float), time_budget (float, seconds): Sampling budget of the rejection, likelihood, and forward
+# methods, sampling stops once any requested one is reached (see inference_sampling.adaptive_sampling)
+# The sample method shows num_samples posterior traces (inference_sampling.default_num_traces if None)
+# posterior_sampling (bool): Whether or not the rejection method samples the posterior distribution directly (no rejected samples)
+# num_workers (int): Number of processes sampling at the same time (see inference_sampling.Sampling_workers), or building the
+# circuit at the same time for enumeration (see inference_parallel.py)
+# seed (int): Seed of the sampling methods and of the inner points of continuous variables
+# burn_in, thinning, num_chains (int): Metropolis-Hastings chains, defaults if None (see inference_mcmc.metropolis_hastings), the
+# num_samples samples are kept per chain
+# uniform_sequence (str): Uniform variates of the rejection, likelihood, and sample methods (see
+# inference_sampling.Batch_sampler.draw_end_nodes)
+def infer(given_program_structure, given_inference_method, requested_to_calculate_time, merge_equivalent_nodes=False,
+    elimination_order="min-fill", factorize=True, num_samples=None, target_error=None, time_budget=None, posterior_sampling=False,
+    num_workers=1, seed=sampling_seed, burn_in=None, thinning=None, num_chains=None,
+    uniform_sequence="random", array_circuit=False):
+
+    # Sets a seed for repeatability
+    random.seed(seed)
 
     instructions_tree = given_program_structure.instructions_tree
     output_tree = given_program_structure.output_tree
 
+    # The vectorized enumeration does not build a circuit, its entire execution is timed
+    if given_inference_method == "enumerate-vectorized":
+
+        t1 = time.time()
+        Vectorized_enumeration(instructions_tree, output_tree).infer_by_enumeration()
+        t2 = time.time()
+
+        if requested_to_calculate_time:
+            print(int(1000*(t2 - t1)))
+
+        return
+
+    # Knowledge compilation does not build a circuit either, its entire execution is timed
+    if given_inference_method == "bdd":
+
+        t1 = time.time()
+        Compiled_program(instructions_tree, output_tree).infer_by_compilation()
+        t2 = time.time()
+
+        if requested_to_calculate_time:
+            print(int(1000*(t2 - t1)))
+
+        return
+
+    # Variable elimination over a factor graph, its entire execution is timed
+    # The size of the intermediate factors is shown with the time
+    if given_inference_method == "variable-elimination":
+
+        t1 = time.time()
+        intermediate_factor_sizes = Factor_graph(instructions_tree, output_tree).infer_by_variable_elimination(elimination_order)
+        t2 = time.time()
+
+        if requested_to_calculate_time:
+            print(int(1000*(t2 - t1)))
+            print("Eliminated %d variables (%s), largest intermediate factor: %d entries, total: %d entries" % (len(intermediate_factor_sizes),
+                elimination_order, max(intermediate_factor_sizes, default=0), sum(intermediate_factor_sizes)), file=sys.stderr)
+
+        return
+
+    # Chains have a fixed length
+    if (given_inference_method == "metropolis-hastings") and ((target_error != None) or (time_budget != None)):
+        print("Metropolis-Hastings only accepts a number of samples (per chain) as its budget", file=sys.stderr)
+        sys.exit(1)
+
+    # Forward sampling and Metropolis-Hastings follow one trace at a time, each one with its own number of choices
+    if (given_inference_method in ["forward", "metropolis-hastings"]) and (uniform_sequence != "random"):
+        print("'%s' uniform variates are only available for the rejection, likelihood, and sample methods" % (uniform_sequence, ), file=sys.stderr)
+        sys.exit(1)
+
+    # Each worker builds its own part of the circuit as objects
+    if (given_inference_method == "enumerate") and (num_workers > 1) and array_circuit:
+        print("Array circuits are built in a single process, use --workers=1", file=sys.stderr)
+        sys.exit(1)
+
+    # Traces contain every variable, so the whole program is sampled at once
+    if given_inference_method == "sample":
+
+        sampled_circuit = Circuit(instructions_tree, output_tree, merge_equivalent_nodes=merge_equivalent_nodes, array_storage=array_circuit)
+
+        t1 = time.time()
+        sampled_circuit.obtain_batch_sampler().show_posterior_traces(default_num_traces if num_samples == None else num_samples,
+            np.random.default_rng(seed), uniform_sequence)
+        t2 = time.time()
+
+        if requested_to_calculate_time:
+            print(int(1000*(t2 - t1)))
+
+            if merge_equivalent_nodes:
+                print("Merged nodes: %d" % (sampled_circuit.num_merged_nodes, ), file=sys.stderr)
+
+        return
+
+    # Independent parts of the program are inferred separately and their results multiplied, parts not needed by the query are skipped
+    if factorize:
+        subprograms = given_program_structure.independent_subprograms()
+    else:
+        subprograms = [[instructions_tree, output_tree]]
+
     # Generates a circuit from the instructions and evaluated according to the output (return) tree statement
-    to_be_inferred = Circuit(instructions_tree, output_tree)
+    # Forward sampling and Metropolis-Hastings only compile the program, they never build a circuit
+    if given_inference_method == "forward":
+        to_be_inferred = [Forward_sampler(a_subprogram_instructions, a_subprogram_output)
+                            for a_subprogram_instructions, a_subprogram_output in subprograms]
+    elif given_inference_method == "metropolis-hastings":
+        to_be_inferred = [Metropolis_hastings_sampler(a_subprogram_instructions, a_subprogram_output)
+                            for a_subprogram_instructions, a_subprogram_output in subprograms]
+    # Enumeration may build each circuit in multiple processes, only the probabilities are kept
+    elif (given_inference_method == "enumerate") and (num_workers > 1):
+        to_be_inferred = [Parallel_enumeration(a_subprogram_instructions, a_subprogram_output, num_workers,
+                            merge_equivalent_nodes=merge_equivalent_nodes) for a_subprogram_instructions, a_subprogram_output in subprograms]
+    else:
+        to_be_inferred = [Circuit(a_subprogram_instructions, a_subprogram_output, merge_equivalent_nodes=merge_equivalent_nodes,
+                            array_storage=array_circuit) for a_subprogram_instructions, a_subprogram_output in subprograms]
 
     # Gets times without considering the circuit building time
     t1 = time.time()
 
     if given_inference_method == "enumerate":
-        to_be_inferred.infer_by_enumeration()
-    elif given_inference_method == "rejection":
-        to_be_inferred.infer_by_rejection()
+
+        probability_pairs = []
+
+        for a_circuit in to_be_inferred:
+            probability_pairs += a_circuit.enumeration_probabilities()
+
+        print_conditional_probability(*probability_pairs)
+
+    elif given_inference_method in ["rejection", "likelihood", "forward"]:
+
+        if given_inference_method == "likelihood":
+            sampling_mode = "likelihood"
+        elif posterior_sampling and (given_inference_method == "rejection"):
+            sampling_mode = "posterior"
+        else:
+            sampling_mode = "rejection"
+
+        if given_inference_method == "forward":
+            samplers = to_be_inferred
+        else:
+            samplers = [a_circuit.obtain_batch_sampler() for a_circuit in to_be_inferred]
+
+        # All the circuits are sampled from the same random streams, so that their samples are independent
+        sampled_estimate = adaptive_sampling(samplers, num_samples, target_error, time_budget, sampling_mode, num_workers, seed,
+                            uniform_sequence)
+
+        print_conditional_probability(*sampled_estimate.probability_pairs())
+        sampled_estimate.show_summary()
+
+    elif given_inference_method == "metropolis-hastings":
+
+        [sampled_estimate, accepted_steps, num_steps] = metropolis_hastings(to_be_inferred, num_samples, burn_in, thinning, num_chains, seed)
+
+        print_conditional_probability(*sampled_estimate.probability_pairs())
+        sampled_estimate.show_summary()
+        print("Accepted steps: %d of %d (acceptance rate: %.2f%%)" % (accepted_steps, num_steps, 100*accepted_steps/max(num_steps, 1)),
+            file=sys.stderr)
 
     t2 = time.time()
 
     if requested_to_calculate_time:
         print(int(1000*(t2 - t1)))
+
+        # Only circuits merge their nodes
+        if merge_equivalent_nodes and (given_inference_method in ["enumerate", "rejection", "likelihood"]):
+            print("Merged nodes: %d" % (sum(a_circuit.num_merged_nodes for a_circuit in to_be_inferred), ), file=sys.stderr)
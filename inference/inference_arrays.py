@@ -0,0 +1,465 @@
+"""
+SUMMARY
+
+Stores a circuit as a set of contiguous arrays (struct of arrays) instead of one Python object per node, requested with
+Circuit(array_storage=True) or the --array-circuit flag.
+Variable names (tokens) and values are interned in side tables, nodes only keep their indices.
+
+The circuit is still built statement by statement with node objects (see inference_circuit.py), but only the frontier is kept
+as objects: after each top-level statement, the nodes which are no longer in the frontier are appended to the arrays and
+released (see Array_circuit_builder). The frontier nodes keep their environment, and the indices of their parents instead of
+the parent nodes themselves.
+
+Only the end nodes need their environment (to evaluate the return statement), so it is stored as a table with one row
+per bottom node and one column per variable token. The arrays can be dumped to a directory (one .npy file each) and loaded
+back as memory maps, so that multiple processes can reuse the same circuit.
+"""
+
+
+from array import array
+import os
+import pickle
+
+import numpy as np
+
+from .sentence_evaluation import compile_logical_evaluator
+from .variable.logical_variables import logical_value
+
+
+
+# Node kinds, stored as int8
+node_kinds = {
+    "Circuit_node_variable":0,
+    "Circuit_node_observation":1,
+    "Circuit_node_rejection":2,
+    "Circuit_node_compressed":3,
+    "Circuit_node_deadend":4,
+    "Circuit_node_frontier":5
+}
+
+deadend_kind = node_kinds["Circuit_node_deadend"]
+
+
+# Arrays stored in a dumped circuit, each one as "<name>.npy"
+array_names = ["node_kind", "token_index", "value_index", "probability", "parent_offsets", "parent_indices", "child_offsets",
+                "child_indices", "environment_row", "environment_values", "environment_chain_probability"]
+
+
+# Python objects (interned tables and the return statement) stored in a dumped circuit
+side_tables_filename = "side_tables.pickle"
+
+
+
+# Circuit stored as arrays
+# Node i has kind node_kind[i], token tokens[token_index[i]], value values[value_index[i]], and probability probability[i]
+# Its parents are parent_indices[parent_offsets[i]:parent_offsets[i + 1]], and its children are obtained in the same way
+# The ground node is node 0, and the children of each node are in the order in which they were created
+# Bottom nodes have an environment row (-1 otherwise): environment_values[environment_row[i]] contains the value index of each
+# token in environment_tokens (-1 if not in the environment), rows are in the same order as the bottom nodes of the circuit
+class Array_circuit(object):
+
+    # arrays ({"array name":np.array, ...}): All the arrays in array_names
+    # tokens [str, ...]: Interned node tokens
+    # values [Variable, ...]: Interned node and environment values
+    # environment_tokens [str, ...]: Variable token of each environment column
+    # num_bottom_nodes (int)
+    # output_tree (Parse Tree): Return statement
+    def __init__(self, arrays, tokens, values, environment_tokens, num_bottom_nodes, output_tree):
+
+        for an_array_name in array_names:
+            setattr(self, an_array_name, arrays[an_array_name])
+
+        self.tokens = tokens
+        self.values = values
+        self.environment_tokens = environment_tokens
+        self.num_bottom_nodes = num_bottom_nodes
+        self.output_tree = output_tree
+
+
+
+    # Number of nodes
+    def num_nodes(self):
+        return len(self.node_kind)
+
+
+    # Bytes used by the arrays (side tables not included)
+    def array_bytes(self):
+        return sum(getattr(self, an_array_name).nbytes for an_array_name in array_names)
+
+
+    # Obtains the children of a node
+    # return np.array of node indices
+    def obtain_children(self, node_index):
+        return self.child_indices[self.child_offsets[node_index]:self.child_offsets[node_index + 1]]
+
+
+    # Obtains an environment from a row of value indices (one per environment token, -1 if not present)
+    # return {"variable token":variable_value, ...}
+    def obtain_environment(self, environment_value_indices):
+        return {self.environment_tokens[a_column]:self.values[a_value_index]
+                    for a_column, a_value_index in enumerate(environment_value_indices.tolist()) if a_value_index != -1}
+
+
+    # Obtains the environment of a bottom node
+    # return {"variable token":variable_value, ...}
+    def obtain_end_node_environment(self, node_index):
+        return self.obtain_environment(self.environment_values[self.environment_row[node_index]])
+
+
+
+    # Evaluates the return statement on every bottom node environment
+    # Identical environments are only evaluated once
+    # return np.array (bool), whether or not each environment row meets the return statement
+    def evaluate_environments(self):
+
+        output_evaluator = compile_logical_evaluator(self.output_tree, True, False)
+
+        if len(self.environment_values) == 0:
+            return np.zeros(0, dtype=bool)
+
+        unique_environments, environment_group = np.unique(self.environment_values, axis=0, return_inverse=True)
+
+        unique_meets_output = np.array([logical_value.TRUE == output_evaluator(self.obtain_environment(an_environment))
+                                            for an_environment in unique_environments], dtype=bool)
+
+        return unique_meets_output[environment_group.reshape(-1)]
+
+
+
+    # Obtains the arrays the batched sampler draws from (see Circuit.sampling_structure)
+    def sampling_structure(self):
+
+        child_indices = self.child_indices.astype(np.int64)
+
+        return [self.child_offsets[:-1].astype(np.int64), np.diff(self.child_offsets), child_indices, self.probability[child_indices],
+                self.node_kind == deadend_kind, self.obtain_end_node_environment]
+
+
+
+    # Obtains the enumeration (direct search) probability, see Circuit.enumeration_probabilities
+    # return [probability of meeting the output and the observations (float), probability of meeting the observations (float)]
+    def enumeration_probabilities(self):
+
+        meets_output_per_row = self.evaluate_environments().tolist()
+        chain_probabilities  = self.environment_chain_probability.tolist()
+
+        Pr_meets_output_and_observes = 0
+        Pr_meets_observes = 0
+
+        # Added in the same order as the object circuit, so the results are identical
+        for Pr_chain, meets_output in zip(chain_probabilities, meets_output_per_row):
+
+            Pr_meets_observes += Pr_chain
+
+            if meets_output:
+                Pr_meets_output_and_observes += Pr_chain
+
+        return [Pr_meets_output_and_observes, Pr_meets_observes]
+
+
+
+    # Shows the circuit, in the same format as the object circuit (2-indent per level)
+    def show_circuit(self):
+
+        # [[node index, indentation], ...], the top is the end of the array
+        nodes_to_be_shown = [[0, 0]]
+
+        while nodes_to_be_shown != []:
+
+            [node_index, current_indentation] = nodes_to_be_shown.pop()
+
+            print(current_indentation*" " + "CIRCUIT NODE(token=\"%s\", variable value=(%s), Pr = %.4f)" % (self.tokens[self.token_index[node_index]],
+                self.values[self.value_index[node_index]], self.probability[node_index]))
+
+            # Reversed, so that the first child is shown first
+            for a_child_node in self.obtain_children(node_index).tolist()[::-1]:
+                nodes_to_be_shown.append([a_child_node, current_indentation + 2])
+
+
+
+    # Dumps the circuit to a directory, created if needed
+    def dump(self, directory_path):
+
+        os.makedirs(directory_path, exist_ok=True)
+
+        for an_array_name in array_names:
+            np.save(os.path.join(directory_path, an_array_name + ".npy"), getattr(self, an_array_name))
+
+        with open(os.path.join(directory_path, side_tables_filename), "wb") as ff:
+            pickle.dump([self.tokens, self.values, self.environment_tokens, self.num_bottom_nodes, self.output_tree], ff)
+
+
+
+# Loads a dumped circuit
+# Note that the side tables are stored with pickle, so only circuits from trusted sources must be loaded
+# memory_map (bool): Whether or not the arrays are memory mapped (read-only, shared between processes) instead of read into memory
+# return Array_circuit
+def load_array_circuit(directory_path, memory_map=True):
+
+    mmap_mode = "r" if memory_map else None
+
+    loaded_arrays = {an_array_name:np.load(os.path.join(directory_path, an_array_name + ".npy"), mmap_mode=mmap_mode)
+                        for an_array_name in array_names}
+
+    with open(os.path.join(directory_path, side_tables_filename), "rb") as ff:
+        [tokens, values, environment_tokens, num_bottom_nodes, output_tree] = pickle.load(ff)
+
+    return Array_circuit(loaded_arrays, tokens, values, environment_tokens, num_bottom_nodes, output_tree)
+
+
+
+# Interns Python objects, assigning an integer index to each distinct one
+class Interning_table(object):
+
+    def __init__(self):
+        self.table = []
+        self.indices = {}
+
+
+    # Obtains the index of an object, adding it if not present
+    # key: Hashable identifier of the object
+    def index_of(self, given_object, key):
+
+        if key not in self.indices:
+            self.indices[key] = len(self.table)
+            self.table.append(given_object)
+
+        return self.indices[key]
+
+
+
+# Obtains the interning key of a variable value
+# Variables with the same class, name, statistics, and probability are interchangeable
+# Variables whose inner points have already been calculated are only interned with themselves, since they may be random,
+# unless they are point values (all inner points are the expectation)
+def variable_interning_key(a_variable):
+
+    if (a_variable.inner_points is not None) and (a_variable.lower_bound != a_variable.upper_bound):
+        return ("OBJECT", id(a_variable))
+
+    return (type(a_variable).__name__, a_variable.variable_name, a_variable.variable_class, a_variable.expectation, a_variable.variance,
+            a_variable.lower_bound, a_variable.upper_bound, a_variable.probability)
+
+
+
+# Appends the nodes of a circuit being built to arrays, releasing their objects
+# After each top-level statement, store_nodes_above stores every node above the frontier. The frontier nodes then keep the indices
+# of their parents (see frontier_parent_indices) instead of the parent nodes, so that nothing refers to the stored nodes anymore
+class Array_circuit_builder(object):
+
+    # deadend_node (Circuit node): Stored once, as the child of every trace not meeting the observations
+    def __init__(self, deadend_node):
+
+        self.deadend_node = deadend_node
+
+        # One entry per node
+        self.node_kind   = array("b")
+        self.token_index = array("i")
+        self.value_index = array("i")
+        self.probability = array("d")
+
+        # One entry per edge, the children of a node are ordered by their key (the node ID, which follows the creation order)
+        self.edge_parents  = array("i")
+        self.edge_children = array("i")
+        self.edge_keys     = array("q")
+
+        self.token_table = Interning_table()
+        self.value_table = Interning_table()
+
+        # Parents of the frontier nodes, which are already stored
+        # {node ID:[parent node index, ...], ...}
+        self.frontier_parent_indices = {}
+
+        # Nodes stored since the frontier was last updated, only needed until their children are stored
+        # {node ID:node index, ...}
+        self.node_numbers = {}
+
+        # Dead ends added since the frontier was last updated, all of them are the same node
+        # [[parent node, key (int)], ...]
+        self.deadend_parents = []
+        self.deadend_index = None
+
+
+
+    # Adds a dead end below a node
+    # key (int): Orders the dead end among the children of the node, see node_ID_counter in inference_circuit.py
+    def add_deadend(self, given_parent_node, key):
+        self.deadend_parents.append([given_parent_node, key])
+
+
+
+    # Appends a node to the arrays, its parents must already be stored
+    # return node index (int)
+    def append_node(self, kind, token, variable_value, probability):
+
+        node_index = len(self.node_kind)
+
+        self.node_kind.append(kind)
+        self.token_index.append(self.token_table.index_of(token, token))
+        self.value_index.append(self.value_table.index_of(variable_value, variable_interning_key(variable_value)))
+        self.probability.append(probability)
+
+        return node_index
+
+
+
+    # Stores a node, and releases its parents, children, and environment
+    # return node index (int)
+    def store_node(self, a_node):
+
+        if a_node.node_ID in self.frontier_parent_indices:
+            parent_indices = self.frontier_parent_indices.pop(a_node.node_ID)
+        else:
+            parent_indices = [self.node_numbers[a_parent_node.node_ID] for a_parent_node in a_node.parents if a_parent_node != None]
+
+        node_index = self.append_node(node_kinds[type(a_node).__name__], a_node.token, a_node.variable_value, a_node.current_probability)
+
+        for a_parent_index in parent_indices:
+            self.edge_parents.append(a_parent_index)
+            self.edge_children.append(node_index)
+            self.edge_keys.append(a_node.node_ID)
+
+        self.node_numbers[a_node.node_ID] = node_index
+
+        a_node.parents = []
+        a_node.children = ()
+        a_node.environment = None
+
+        return node_index
+
+
+
+    # Stores every node above the frontier which is not stored yet (parents first), and the dead ends added since the last call
+    # Frontier nodes keep their environment (built here, while the nodes above are still linked) and the indices of their parents
+    # return frontier nodes, unchanged
+    def store_nodes_above(self, frontier_nodes):
+
+        for a_node in frontier_nodes:
+            a_node.obtain_chain_environment_vars_only()
+
+        nodes_to_be_stored = [a_parent_node for a_node in frontier_nodes if a_node.node_ID not in self.frontier_parent_indices
+                                for a_parent_node in a_node.parents if a_parent_node != None]
+        nodes_to_be_stored += [a_parent_node for a_parent_node, _key in self.deadend_parents]
+        nodes_to_be_stored.reverse()
+
+        while nodes_to_be_stored != []:
+
+            a_node = nodes_to_be_stored[-1]
+
+            if a_node.node_ID in self.node_numbers:
+                nodes_to_be_stored.pop()
+                continue
+
+            # Frontier nodes from the previous call already know the indices of their parents
+            if a_node.node_ID in self.frontier_parent_indices:
+                unstored_parents = []
+            else:
+                unstored_parents = [a_parent_node for a_parent_node in a_node.parents
+                                        if (a_parent_node != None) and (a_parent_node.node_ID not in self.node_numbers)]
+
+            if unstored_parents != []:
+                nodes_to_be_stored.extend(unstored_parents[::-1])
+                continue
+
+            nodes_to_be_stored.pop()
+            self.store_node(a_node)
+
+        for a_parent_node, a_key in self.deadend_parents:
+
+            if self.deadend_index == None:
+                self.deadend_index = self.append_node(deadend_kind, self.deadend_node.token, self.deadend_node.variable_value,
+                                        self.deadend_node.current_probability)
+
+            self.edge_parents.append(self.node_numbers[a_parent_node.node_ID])
+            self.edge_children.append(self.deadend_index)
+            self.edge_keys.append(a_key)
+
+        self.deadend_parents = []
+
+        # Frontier nodes no longer refer to the stored nodes, and never hand their environment down (their children copy it)
+        for a_node in frontier_nodes:
+
+            if a_node.node_ID in self.frontier_parent_indices:
+                continue
+
+            self.frontier_parent_indices[a_node.node_ID] = [self.node_numbers[a_parent_node.node_ID] for a_parent_node in a_node.parents
+                                                                if a_parent_node != None]
+            a_node.parents = []
+            a_node.owns_environment = False
+
+        self.node_numbers = {}
+
+        return frontier_nodes
+
+
+
+    # Stores the bottom nodes (and the nodes above them) with their environments
+    # return Array_circuit
+    def finish(self, bottom_nodes, output_tree):
+
+        self.store_nodes_above(bottom_nodes)
+
+        # Every trace either reaches the bottom or ends in a dead end
+        assert len(self.frontier_parent_indices) == len(bottom_nodes), "Circuit nodes were lost while storing them"
+
+        # Kept until every bottom node is stored, so that the ids of their variables are not reused
+        bottom_environments = [a_node.environment for a_node in bottom_nodes]
+
+        environment_token_table = Interning_table()
+
+        for an_environment in bottom_environments:
+            for a_token in an_environment:
+                environment_token_table.index_of(a_token, a_token)
+
+        num_columns = len(environment_token_table.table)
+
+        # Traces share most of their variables, so each variable object is only interned once
+        # {id(variable):value index, ...}
+        variable_value_indices = {}
+        environment_values = np.full([len(bottom_nodes), num_columns], -1, dtype=np.int32)
+
+        for a_row_index, an_environment in enumerate(bottom_environments):
+
+            a_row = [-1]*num_columns
+
+            for a_token, a_variable in an_environment.items():
+
+                if id(a_variable) not in variable_value_indices:
+                    variable_value_indices[id(a_variable)] = self.value_table.index_of(a_variable, variable_interning_key(a_variable))
+
+                a_row[environment_token_table.indices[a_token]] = variable_value_indices[id(a_variable)]
+
+            environment_values[a_row_index] = a_row
+
+        environment_chain_probability = np.array([a_node.chain_probability for a_node in bottom_nodes], dtype=np.float64)
+        bottom_indices = [self.store_node(a_node) for a_node in bottom_nodes]
+
+        num_nodes = len(self.node_kind)
+
+        environment_row = np.full(num_nodes, -1, dtype=np.int32)
+        environment_row[bottom_indices] = np.arange(0, len(bottom_nodes), dtype=np.int32)
+
+        edge_parents  = np.array(self.edge_parents, dtype=np.int32)
+        edge_children = np.array(self.edge_children, dtype=np.int32)
+        edge_keys     = np.array(self.edge_keys, dtype=np.int64)
+
+        # Children ordered by parent and then by key, parents ordered by child (in the order they were given)
+        child_order  = np.lexsort((edge_keys, edge_parents))
+        parent_order = np.argsort(edge_children, kind="stable")
+
+        built_arrays = {
+            "node_kind":np.array(self.node_kind, dtype=np.int8),
+            "token_index":np.array(self.token_index, dtype=np.int32),
+            "value_index":np.array(self.value_index, dtype=np.int32),
+            "probability":np.array(self.probability, dtype=np.float64),
+            "parent_offsets":np.concatenate([[0], np.cumsum(np.bincount(edge_children, minlength=num_nodes))]).astype(np.int64),
+            "parent_indices":edge_parents[parent_order],
+            "child_offsets":np.concatenate([[0], np.cumsum(np.bincount(edge_parents, minlength=num_nodes))]).astype(np.int64),
+            "child_indices":edge_children[child_order],
+            "environment_row":environment_row,
+            "environment_values":environment_values,
+            "environment_chain_probability":environment_chain_probability
+        }
+
+        return Array_circuit(built_arrays, self.token_table.table, self.value_table.table, environment_token_table.table, len(bottom_nodes),
+                                output_tree)
@@ -0,0 +1,672 @@
+"""
+SUMMARY
+
+Implements exact inference by knowledge compilation, based on the approach of Dice
+(Holtzen, Van den Broeck, Millstein, https://arxiv.org/abs/2005.09089).
+The program is compiled into a reduced ordered binary decision diagram (BDD) whose nodes are hash-consed, so that equivalent
+sub-diagrams are only stored once. Each random choice becomes one or more independent decision variables of the diagram,
+and each program variable is stored as its possible values, each one with the diagram (guard) under which it holds.
+The return query is answered by weighted model counting over the diagram.
+Most nodes only hold intermediate results, so the nodes no longer reachable from the program variables and the observations are
+removed between top-level statements once the diagram has grown enough (the remaining nodes are renumbered), and the cache of
+operations is cleared once it grows beyond a limit. Operations follow an explicit stack, so deep diagrams do not reach the
+Python recursion limit.
+Only discrete (binary, numeric, and qualitative) programs are supported. Marginalizations are only supported when they do not
+change the value of any variable read afterwards (each group of traces would keep the values of its first trace for the variables
+not listed), since the diagram already sums up the grouped traces.
+"""
+
+
+import sys
+
+import numpy as np
+
+from .aux_inference import add_to_stack, canonical_grouping_value, Simple_Stack
+from .inference_vectorized import stack_as_matrix
+from .vectorized_evaluation import broadcast_to_rows, vectorized_evaluator
+from parser.independence import marginalization_changes_read_variables
+
+
+
+# Statements which cannot be compiled
+unsupported_statements = ["d_uniform", "d_gaussian", "d_pareto", "d_beta", "d_uniform_num", "d_gaussian_num", "d_pareto_num", "d_beta_num",
+                            "wlsr", "print", "print_combined"]
+
+
+# Terminal nodes of every diagram
+FALSE_NODE = 0
+TRUE_NODE  = 1
+
+
+# Maximum number of cached if-then-else operations, the cache is cleared once an operation leaves it larger
+max_ite_cache_entries = 1 << 18
+
+# Unreachable nodes are only removed once the diagram has at least this many nodes, and twice as many as after the previous removal
+min_collected_nodes = 1 << 16
+
+
+
+# Reduced ordered binary decision diagram, shared by all the guards of a program
+# Nodes are integers, every node is created after its children, so their order is also a topological order
+# Decision variables are ordered by creation
+class Decision_diagram(object):
+
+    def __init__(self):
+
+        # Terminal nodes are placed after every variable
+        terminal_level = float("inf")
+
+        # Node information, by node number
+        self.node_variables = [terminal_level, terminal_level]
+        self.node_lows  = [FALSE_NODE, TRUE_NODE]
+        self.node_highs = [FALSE_NODE, TRUE_NODE]
+
+        # Hash-consing of the nodes
+        # {(variable, low node, high node):node, ...}
+        self.unique_table = {}
+
+        # Cache of the if-then-else operations
+        # {(f, g, h):node, ...}
+        self.ite_cache = {}
+
+        # Probability of each decision variable being true, the probabilities of both of its values add up to 1
+        self.variable_probabilities = []
+
+        # Number of nodes kept by the last garbage collection
+        self.nodes_after_collection = 2
+
+
+    # Number of nodes, including the terminal ones
+    def num_nodes(self):
+        return len(self.node_variables)
+
+
+    # Obtains the node of a variable with the given children, reduced and hash-consed
+    def make_node(self, variable, low, high):
+
+        if low == high:
+            return low
+
+        node_key = (variable, low, high)
+
+        if node_key in self.unique_table:
+            return self.unique_table[node_key]
+
+        created_node = len(self.node_variables)
+        self.node_variables.append(variable)
+        self.node_lows.append(low)
+        self.node_highs.append(high)
+
+        self.unique_table[node_key] = created_node
+
+        return created_node
+
+
+    # Creates a new independent decision variable
+    # return node which is true when the variable is
+    def new_variable(self, probability):
+
+        self.variable_probabilities.append(probability)
+
+        return self.make_node(len(self.variable_probabilities) - 1, FALSE_NODE, TRUE_NODE)
+
+
+    # Creates a choice between multiple options, as a chain of decision variables
+    # The first option is chosen with the first variable, the second one (if not the first) with the second variable, and so on
+    # probabilities [float, ...]: Probability of each option, adding up to 1
+    # return [node of each option, ...], mutually exclusive
+    def new_choice(self, probabilities):
+
+        option_nodes = []
+        not_chosen_yet = TRUE_NODE
+        remaining_probability = 1.0
+
+        for an_option_probability in probabilities[:-1]:
+
+            if remaining_probability > 0:
+                conditional_probability = min(max(an_option_probability/remaining_probability, 0.0), 1.0)
+            else:
+                conditional_probability = 0.0
+
+            chosen_variable = self.new_variable(conditional_probability)
+
+            option_nodes.append(self.conjoin(not_chosen_yet, chosen_variable))
+            not_chosen_yet = self.conjoin(not_chosen_yet, self.negate(chosen_variable))
+            remaining_probability -= an_option_probability
+
+        option_nodes.append(not_chosen_yet)
+
+        return option_nodes
+
+
+    # Obtains the result of an if-then-else operation which does not need to be computed (terminal cases and cached operations)
+    # return node, or None if it needs to be computed
+    def known_ite(self, f, g, h):
+
+        # Terminal cases
+        if f == TRUE_NODE:
+            return g
+        if f == FALSE_NODE:
+            return h
+        if g == h:
+            return g
+        if (g == TRUE_NODE) and (h == FALSE_NODE):
+            return f
+
+        return self.ite_cache.get((f, g, h))
+
+
+    # If-then-else: (f and g) or (not f and h)
+    # Follows an explicit stack of pending operations instead of recursion, each one computed once both of its cofactor operations are
+    # (the cofactors are obtained inline, as in cofactors, since this is the innermost loop of the compilation)
+    def ite(self, f, g, h):
+
+        resulting_node = self.known_ite(f, g, h)
+
+        if resulting_node != None:
+            return resulting_node
+
+        known_ite = self.known_ite
+        ite_cache = self.ite_cache
+        node_variables = self.node_variables
+        node_lows  = self.node_lows
+        node_highs = self.node_highs
+
+        # [[(f, g, h), None], ...] before being expanded, then
+        # [[(f, g, h), top variable, low operation, high operation, low node or None, high node or None], ...]
+        pending_operations = [[(f, g, h), None]]
+
+        while pending_operations:
+
+            an_operation = pending_operations[-1]
+
+            if an_operation[1] == None:
+
+                operation_key = an_operation[0]
+
+                # Already computed by another pending operation
+                if operation_key in ite_cache:
+                    pending_operations.pop()
+                    continue
+
+                [an_f, a_g, an_h] = operation_key
+                [f_variable, g_variable, h_variable] = [node_variables[an_f], node_variables[a_g], node_variables[an_h]]
+                top_variable = min(f_variable, g_variable, h_variable)
+
+                [f_low, f_high] = [node_lows[an_f], node_highs[an_f]] if f_variable == top_variable else [an_f, an_f]
+                [g_low, g_high] = [node_lows[a_g], node_highs[a_g]] if g_variable == top_variable else [a_g, a_g]
+                [h_low, h_high] = [node_lows[an_h], node_highs[an_h]] if h_variable == top_variable else [an_h, an_h]
+
+                low_operation  = (f_low, g_low, h_low)
+                high_operation = (f_high, g_high, h_high)
+
+                low_node  = known_ite(f_low, g_low, h_low)
+                high_node = known_ite(f_high, g_high, h_high)
+
+                an_operation[1:] = [top_variable, low_operation, high_operation, low_node, high_node]
+
+                if low_node == None:
+                    pending_operations.append([low_operation, None])
+                if high_node == None:
+                    pending_operations.append([high_operation, None])
+                if (low_node == None) or (high_node == None):
+                    continue
+
+            [operation_key, top_variable, low_operation, high_operation, low_node, high_node] = an_operation
+
+            if low_node == None:
+                low_node = ite_cache[low_operation]
+            if high_node == None:
+                high_node = ite_cache[high_operation]
+
+            ite_cache[operation_key] = self.make_node(top_variable, low_node, high_node)
+            pending_operations.pop()
+
+        resulting_node = ite_cache[(f, g, h)]
+
+        if len(ite_cache) > max_ite_cache_entries:
+            ite_cache.clear()
+
+        return resulting_node
+
+
+    # Obtains the diagrams when a variable is false and true, the node itself if it does not start with the variable
+    # return [low node, high node]
+    def cofactors(self, given_node, variable):
+
+        if self.node_variables[given_node] != variable:
+            return [given_node, given_node]
+
+        return [self.node_lows[given_node], self.node_highs[given_node]]
+
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE_NODE)
+
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE_NODE, g)
+
+
+    def negate(self, f):
+        return self.ite(f, FALSE_NODE, TRUE_NODE)
+
+
+    # Removes the nodes not reachable from the given ones, the remaining nodes are renumbered in the same order
+    # Clears the cache of operations, since it refers to the previous numbers
+    # root_nodes [node, ...]
+    # return [new number of each previous node (int, -1 if removed), ...]
+    def collect_garbage(self, root_nodes):
+
+        reachable_nodes = [False]*self.num_nodes()
+        nodes_to_be_explored = [FALSE_NODE, TRUE_NODE] + list(root_nodes)
+
+        while nodes_to_be_explored != []:
+            a_node = nodes_to_be_explored.pop()
+
+            if reachable_nodes[a_node]:
+                continue
+
+            reachable_nodes[a_node] = True
+            nodes_to_be_explored += [self.node_lows[a_node], self.node_highs[a_node]]
+
+        new_numbers = [-1]*self.num_nodes()
+        [new_numbers[FALSE_NODE], new_numbers[TRUE_NODE]] = [FALSE_NODE, TRUE_NODE]
+
+        node_variables = self.node_variables[:2]
+        node_lows  = self.node_lows[:2]
+        node_highs = self.node_highs[:2]
+
+        # Children always have lower numbers than their parents, so they are renumbered first
+        for a_node in range(2, self.num_nodes()):
+
+            if not reachable_nodes[a_node]:
+                continue
+
+            new_numbers[a_node] = len(node_variables)
+            node_variables.append(self.node_variables[a_node])
+            node_lows.append(new_numbers[self.node_lows[a_node]])
+            node_highs.append(new_numbers[self.node_highs[a_node]])
+
+        self.node_variables = node_variables
+        self.node_lows  = node_lows
+        self.node_highs = node_highs
+
+        self.unique_table = {(node_variables[a_node], node_lows[a_node], node_highs[a_node]):a_node for a_node in range(2, len(node_variables))}
+        self.ite_cache = {}
+
+        self.nodes_after_collection = self.num_nodes()
+
+        return new_numbers
+
+
+    # Weighted model count of a diagram: probability of the decision variables meeting it
+    # Variables skipped by a path add up to 1, so they do not need to be considered
+    def weighted_model_count(self, root_node):
+
+        # Obtains the nodes reachable from the root
+        reachable_nodes = set()
+        nodes_to_be_explored = [root_node]
+
+        while nodes_to_be_explored != []:
+            a_node = nodes_to_be_explored.pop()
+
+            if (a_node in reachable_nodes) or (a_node in [FALSE_NODE, TRUE_NODE]):
+                continue
+
+            reachable_nodes.add(a_node)
+            nodes_to_be_explored += [self.node_lows[a_node], self.node_highs[a_node]]
+
+        # Children always have lower numbers than their parents
+        node_counts = {FALSE_NODE:0.0, TRUE_NODE:1.0}
+
+        for a_node in sorted(reachable_nodes):
+            variable_probability = self.variable_probabilities[self.node_variables[a_node]]
+
+            node_counts[a_node] = ((1 - variable_probability)*node_counts[self.node_lows[a_node]] +
+                                    variable_probability*node_counts[self.node_highs[a_node]])
+
+        return node_counts[root_node]
+
+
+
+# Obtains the canonical form of a value, used both as a key and as the value itself
+# Numbers (and logical values) are stored as floats
+def canonical_value(given_value):
+
+    if type(given_value).__name__ == "str":
+        return canonical_grouping_value(given_value)
+
+    return canonical_grouping_value(float(given_value))
+
+
+
+# Compiles a program into a decision diagram
+class Compiled_program(object):
+
+    # Compiles the instruction tree
+    def __init__(self, given_instructions_tree, given_output_tree):
+
+        if marginalization_changes_read_variables(given_instructions_tree, given_output_tree):
+            print("Marginalizations keeping the first value of a variable read afterwards are not supported by knowledge compilation, "
+                "use 'enumerate' instead", file=sys.stderr)
+            sys.exit(1)
+
+        self.diagram = Decision_diagram()
+
+        # Possible values of each program variable, with the guard under which each one holds
+        # Guards of the same variable are mutually exclusive
+        # {"token":{value:guard node, ...}, ...}
+        self.environment = {}
+
+        # Guard under which all the observations are met
+        self.observation_guard = TRUE_NODE
+
+        # Keeps track of the final output requirements
+        self.output_tree = given_output_tree
+
+        self.compile_block(given_instructions_tree, TRUE_NODE, True)
+
+
+
+    # Compiles a tree of statements, only reached when the path guard is met
+    # Statements are visited in the same order as when building a circuit
+    # top_level (bool): Whether or not this is the whole program, the unreachable nodes are only removed between its statements,
+    # since no other node is held elsewhere then
+    def compile_block(self, contained_tree, path_guard, top_level=False):
+
+        available_trees_to_be_explored = Simple_Stack()
+        add_to_stack(available_trees_to_be_explored, contained_tree.children)
+
+        while available_trees_to_be_explored.has_contents():
+
+            if top_level:
+                self.collect_garbage()
+
+            present_tree = available_trees_to_be_explored.get()
+
+            # Do nothing if not a tree
+            if type(present_tree).__name__ != "Tree":
+                continue
+
+            data_from_tree = present_tree.data
+
+            if data_from_tree in unsupported_statements:
+                print("'%s' statements are not supported by knowledge compilation, use 'enumerate' instead" % (data_from_tree, ), file=sys.stderr)
+                sys.exit(1)
+
+
+            # Traces on the path must meet the observation
+            elif data_from_tree == "observe":
+                meets_observation = self.true_guard(present_tree.children[0], path_guard)
+                self.observation_guard = self.diagram.conjoin(self.observation_guard,
+                    self.diagram.ite(path_guard, meets_observation, TRUE_NODE))
+
+
+            # Traces on the path must not meet the expression
+            elif data_from_tree == "reject":
+                meets_rejection = self.true_guard(present_tree.children[0], path_guard)
+                self.observation_guard = self.diagram.conjoin(self.observation_guard, self.diagram.negate(meets_rejection))
+
+
+            # The diagram already sums up the grouped traces, and no variable read afterwards changes (see __init__)
+            elif data_from_tree == "marg":
+                pass
+
+
+            # Eliminated variables cannot be used afterwards
+            elif data_from_tree == "elimvar":
+                for a_child_token in present_tree.children:
+                    self.environment.pop(a_child_token.value, None)
+
+
+            # "if" statements: each trace follows the first branch whose condition is met
+            # ite:          [condition, contents if, contents else]
+            # ite_elseif:   [condition, contents, condition, contents, ...]
+            # ite_complete: [condition, contents, condition, contents, ..., contents else]
+            elif data_from_tree in ["ite", "ite_elseif", "ite_complete"]:
+
+                if data_from_tree == "ite_elseif":
+                    num_branches = len(present_tree.children)//2
+                else:
+                    num_branches = (len(present_tree.children) - 1)//2
+
+                # Traces on the path which have not yet met a condition
+                remaining_guard = path_guard
+
+                for a_branch in range(0, num_branches):
+                    condition = present_tree.children[2*a_branch]
+                    contents  = present_tree.children[2*a_branch + 1]
+
+                    meets_condition = self.true_guard(condition, remaining_guard)
+
+                    if meets_condition != FALSE_NODE:
+                        self.compile_block(contents, meets_condition)
+
+                    remaining_guard = self.diagram.conjoin(remaining_guard, self.diagram.negate(meets_condition))
+
+                if (data_from_tree != "ite_elseif") and (remaining_guard != FALSE_NODE):
+                    self.compile_block(present_tree.children[-1], remaining_guard)
+
+
+            elif data_from_tree == "flip":
+
+                variable_flip_value = float(present_tree.children[1].value)
+
+                assert (0 <= variable_flip_value) and (variable_flip_value <= 1), "Required 0 <= p <= 1, p =%.4f" % (variable_flip_value, )
+
+                self.add_discrete_variable(present_tree.children[0].value, [path_guard], np.array([[0.0, 1.0]]),
+                    np.array([[1 - variable_flip_value, variable_flip_value]]), path_guard)
+
+
+            elif data_from_tree == "bern":
+
+                [row_guards, columns, num_rows] = self.value_combinations(present_tree.children[1:], path_guard)
+
+                flip_values = broadcast_to_rows(vectorized_evaluator(present_tree.children[1], columns, num_rows, False), num_rows)
+                flip_values = flip_values.astype(float)
+
+                assert np.all((0 <= flip_values) & (flip_values <= 1)), "Required 0 <= p <= 1"
+
+                self.add_discrete_variable(present_tree.children[0].value, row_guards, np.array([[0.0, 1.0]]),
+                    np.stack([1 - flip_values, flip_values], axis=1), path_guard)
+
+
+            elif data_from_tree in ["disc_num", "disc_qual"]:
+
+                num_value_assignments = (len(present_tree.children) - 1)//2
+
+                [row_guards, columns, num_rows] = self.value_combinations(present_tree.children[1:], path_guard)
+
+                assigned_values = [vectorized_evaluator(present_tree.children[1 + 2*an_assignment], columns, num_rows, False)
+                                    for an_assignment in range(0, num_value_assignments)]
+                assigned_odds   = [vectorized_evaluator(present_tree.children[2 + 2*an_assignment], columns, num_rows, False)
+                                    for an_assignment in range(0, num_value_assignments)]
+
+                assigned_odds = stack_as_matrix(assigned_odds, num_rows).astype(float)
+                combined_odds = np.sum(assigned_odds, axis=1, keepdims=True)
+
+                # Enforced overall odds are larger than zero
+                assert np.all(combined_odds > 0), "Sum of odds must be > 0"
+
+                self.add_discrete_variable(present_tree.children[0].value, row_guards, stack_as_matrix(assigned_values, num_rows),
+                    assigned_odds/combined_odds, path_guard)
+
+
+            elif data_from_tree == "assgn":
+                self.assign(present_tree.children[0].value, self.evaluate_expression(present_tree.children[1], path_guard), path_guard)
+
+
+            # There is no circuit to show
+            elif data_from_tree == "show_circuit":
+                print("show_circuit() is ignored by knowledge compilation", file=sys.stderr)
+
+
+            # Otherwise, find the children trees and explore them
+            else:
+                add_to_stack(available_trees_to_be_explored, present_tree.children)
+
+
+
+    # Removes the nodes no longer reachable from the program variables and the observations, once the diagram has grown enough
+    # (see min_collected_nodes)
+    def collect_garbage(self):
+
+        if self.diagram.num_nodes() < max(min_collected_nodes, 2*self.diagram.nodes_after_collection):
+            return
+
+        new_numbers = self.diagram.collect_garbage([self.observation_guard] + [a_guard for token_values in self.environment.values()
+                                                                                for a_guard in token_values.values()])
+
+        self.observation_guard = new_numbers[self.observation_guard]
+        self.environment = {a_token:{a_value:new_numbers[a_guard] for a_value, a_guard in token_values.items()}
+                                for a_token, token_values in self.environment.items()}
+
+
+
+    # Obtains all the combinations of values of the variables read by some expressions, only keeping the possible ones
+    # return [[guard of each combination (node), ...], columns ({"token":column (np.array), ...}), number of combinations (int)]
+    def value_combinations(self, given_trees, path_guard):
+
+        read_tokens = set()
+
+        for a_tree in given_trees:
+            if type(a_tree).__name__ != "Tree":
+                continue
+
+            for a_token in a_tree.scan_values(lambda v: getattr(v, "type", None) == "NAME"):
+                if a_token.value in self.environment:
+                    read_tokens.add(a_token.value)
+
+        # Sorted for repeatability
+        read_tokens = sorted(read_tokens)
+
+        # [[(value 1, ...), guard], ...]
+        combinations = [[(), path_guard]]
+
+        for a_token in read_tokens:
+
+            extended_combinations = []
+
+            for combination_values, combination_guard in combinations:
+                for a_value, value_guard in self.environment[a_token].items():
+
+                    extended_guard = self.diagram.conjoin(combination_guard, value_guard)
+
+                    # Impossible combinations are dropped
+                    if extended_guard != FALSE_NODE:
+                        extended_combinations.append([combination_values + (a_value, ), extended_guard])
+
+            combinations = extended_combinations
+
+        columns = {}
+
+        for a_token_index in range(0, len(read_tokens)):
+            column_values = [combination_values[a_token_index] for combination_values, _guard in combinations]
+
+            # Qualitative values are stored as objects
+            if any(type(a_value).__name__ == "str" for a_value in column_values):
+                columns[read_tokens[a_token_index]] = np.array(column_values, dtype=object)
+            else:
+                columns[read_tokens[a_token_index]] = np.array(column_values, dtype=float)
+
+        return [[combination_guard for _values, combination_guard in combinations], columns, len(combinations)]
+
+
+
+    # Evaluates an expression on the path
+    # return {value:guard node, ...}
+    def evaluate_expression(self, expression_tree, path_guard, final_result=False):
+
+        [row_guards, columns, num_rows] = self.value_combinations([expression_tree], path_guard)
+
+        if num_rows == 0:
+            return {}
+
+        expression_values = broadcast_to_rows(vectorized_evaluator(expression_tree, columns, num_rows, final_result), num_rows)
+
+        values_to_guards = {}
+
+        for a_value, a_row_guard in zip(expression_values, row_guards):
+            a_value = canonical_value(a_value)
+            values_to_guards[a_value] = self.diagram.disjoin(values_to_guards.get(a_value, FALSE_NODE), a_row_guard)
+
+        return values_to_guards
+
+
+
+    # Guard under which a logical expression is true on the path
+    def true_guard(self, expression_tree, path_guard):
+        return self.evaluate_expression(expression_tree, path_guard, True).get(1.0, FALSE_NODE)
+
+
+
+    # Assigns a variable on the path, it keeps its previous values outside of it
+    # given_values ({value:guard node, ...}): Guards within the path
+    def assign(self, token_name, given_values, path_guard):
+
+        if path_guard == TRUE_NODE:
+            assigned_values = dict(given_values)
+
+        else:
+            assigned_values = dict(given_values)
+            outside_path = self.diagram.negate(path_guard)
+
+            for a_value, value_guard in self.environment.get(token_name, {}).items():
+                kept_guard = self.diagram.conjoin(outside_path, value_guard)
+                assigned_values[a_value] = self.diagram.disjoin(assigned_values.get(a_value, FALSE_NODE), kept_guard)
+
+        self.environment[token_name] = {a_value:assigned_values[a_value] for a_value in assigned_values
+                                            if assigned_values[a_value] != FALSE_NODE}
+
+
+
+    # Adds a discrete variable on the path
+    # Each combination of the variables the distribution depends on is mutually exclusive, so combinations with the same
+    # probabilities share the same decision variables
+    # row_guards [node, ...]: Guard of each combination
+    # variable_values (np.array): [[value 1, value 2, ...], ...], one row per combination or a single row shared by all of them
+    # variable_probabilities (np.array): Same shape as variable_values
+    def add_discrete_variable(self, token_name, row_guards, variable_values, variable_probabilities, path_guard):
+
+        num_rows = len(row_guards)
+        num_values = max(variable_values.shape[1], variable_probabilities.shape[1])
+
+        variable_values = np.broadcast_to(variable_values, (num_rows, num_values))
+        variable_probabilities = np.broadcast_to(variable_probabilities, (num_rows, num_values))
+
+        # {(probability 1, ...):[option node, ...], ...}
+        created_choices = {}
+
+        assigned_values = {}
+
+        for a_row in range(0, num_rows):
+
+            row_probabilities = tuple(float(a_probability) for a_probability in variable_probabilities[a_row])
+
+            if row_probabilities not in created_choices:
+                created_choices[row_probabilities] = self.diagram.new_choice(row_probabilities)
+
+            for a_value, option_node in zip(variable_values[a_row], created_choices[row_probabilities]):
+                a_value = canonical_value(a_value)
+                value_guard = self.diagram.conjoin(row_guards[a_row], option_node)
+                assigned_values[a_value] = self.diagram.disjoin(assigned_values.get(a_value, FALSE_NODE), value_guard)
+
+        self.assign(token_name, assigned_values, path_guard)
+
+
+
+    # Obtains the exact probability by weighted model counting
+    # Prints the final results
+    def infer_by_compilation(self):
+
+        meets_output = self.true_guard(self.output_tree, TRUE_NODE)
+
+        Pr_meets_observes = self.diagram.weighted_model_count(self.observation_guard)
+        Pr_meets_output_and_observes = self.diagram.weighted_model_count(self.diagram.conjoin(meets_output, self.observation_guard))
+
+        if (Pr_meets_output_and_observes == 0) and (Pr_meets_observes == 0):
+            print(0)
+            return
+
+        print("%.4f" % (Pr_meets_output_and_observes/Pr_meets_observes))
@@ -5,16 +5,17 @@ Implements an inference circuit and associated elements.
 """
 
 
-from copy import deepcopy
-import random
-from uuid import uuid4
+from copy import copy
+from itertools import count
+import sys
 
-import matplotlib.pyplot as plt
 import numpy as np
 
-from .aux_inference import add_to_stack, Simple_Stack, select_random_by_weight
+from .aux_inference import add_to_stack, canonical_grouping_value, Simple_Stack, select_random_by_weight, variable_grouping_key
+from .inference_arrays import Array_circuit_builder
+from .inference_sampling import Batch_sampler
 from .regression import wls_uncorrelated
-from .sentence_evaluation import logical_evaluator
+from .sentence_evaluation import compile_logical_evaluator
 from .variable.common import Common, Fixed, generate_true_fixed_var
 from .variable.discrete import discrete_creator, generate_bernoulli
 from .variable.continuous import generate_discretized_continuous_distribution, generate_discretized_continuous_distribution_from_n
@@ -43,8 +44,74 @@ parsnumcon_to_con = {
 }
 
 
-# Sets a seed for repeatabaility
-random.seed(0)
+# Node IDs, unique integers in creation order
+node_ID_counter = count()
+
+
+# Statements after which the traces may hold the same values, since they overwrite existing variables
+value_overwriting_statements = ["assgn", "wlsr", "ite", "ite_elseif", "ite_complete"]
+
+
+
+# Groups the nodes whose environments hold the same values (in their canonical form, see aux_inference.grouping_decimals)
+# variable_names_to_ignore {"variable name":True, ...}: Variables not considered
+# return [[Circuit node 1, ...], ...], in order of first appearance
+def group_nodes_by_environment(given_nodes, variable_names_to_ignore={}):
+
+    # {((token 1, var1 key), ...):[Circuit node 1, ...], ...}
+    environments_to_nodes = {}
+
+    # Variables are shared between many environments, so their keys are only calculated once
+    # {id(variable):key}
+    variable_keys = {}
+
+    for a_node in given_nodes:
+
+        environment_node = a_node.obtain_chain_environment_vars_only()
+
+        # Sorted by token for repeatability
+        considered_vars = []
+
+        for a_token in sorted(environment_node):
+
+            if a_token in variable_names_to_ignore:
+                continue
+
+            a_var = environment_node[a_token]
+
+            if id(a_var) not in variable_keys:
+                variable_keys[id(a_var)] = variable_grouping_key(a_var)
+
+            considered_vars.append((a_token, variable_keys[id(a_var)]))
+
+        considered_vars = tuple(considered_vars)
+
+        if considered_vars in environments_to_nodes:
+            environments_to_nodes[considered_vars].append(a_node)
+        else:
+            environments_to_nodes[considered_vars] = [a_node]
+
+    return list(environments_to_nodes.values())
+
+
+
+# Prints a conditional probability, 0 if there are no traces meeting the observations
+# Accepts multiple pairs of probabilities (or counts), from independent programs whose probabilities are multiplied
+# Pr_meets_output_and_observes, Pr_meets_observes, ... (float)
+def print_conditional_probability(*probability_pairs):
+
+    combined_probability = 1
+
+    for a_pair_start in range(0, len(probability_pairs), 2):
+        [Pr_meets_output_and_observes, Pr_meets_observes] = probability_pairs[a_pair_start:a_pair_start + 2]
+
+        if (Pr_meets_output_and_observes == 0) and (Pr_meets_observes == 0):
+            print(0)
+            return
+
+        combined_probability *= Pr_meets_output_and_observes/Pr_meets_observes
+
+    print("%.4f" % (combined_probability, ))
 
 
 
@@ -52,7 +119,25 @@ random.seed(0)
 class Circuit(object):
 
     # Generates the circuit based on the instruction tree
-    def __init__(self, given_instructions_tree, given_output_tree):
+    # retain_deadends (bool): Whether or not each trace not meeting the observations keeps its own dead end node, by default only if
+    # the program shows the circuit. Otherwise, they all point to the same shared dead end node
+    # merge_equivalent_nodes (bool): Whether or not the nodes holding the same environment are merged (as "MERGE" compressed nodes)
+    # after each statement overwriting variables, so that the frontier only keeps distinct environments
+    # array_storage (bool): Whether or not the nodes are stored as arrays (see inference_arrays.py) once each top-level statement is
+    # built, instead of being kept as objects
+    def __init__(self, given_instructions_tree, given_output_tree, retain_deadends=None, merge_equivalent_nodes=False, array_storage=False):
+
+        if retain_deadends == None:
+            retain_deadends = any(True for _show_circuit_tree in given_instructions_tree.find_data("show_circuit"))
+
+        self.retain_deadends = retain_deadends
+        self.merge_equivalent_nodes = merge_equivalent_nodes
+
+        # Number of nodes merged into others
+        self.num_merged_nodes = 0
+
+        # Arrays and alias tables for batched sampling, only created once samples are drawn
+        self.batch_sampler = None
 
         # Creates a ground node at the top
         # Always true
@@ -61,23 +146,54 @@ class Circuit(object):
         # Keeps track of the final output requirements
         self.output_tree = given_output_tree
 
-        self.bottom_nodes = self.build_subcircuit(self.ground_node, given_instructions_tree)
+        # Circuit stored as arrays, None if the nodes are kept as objects
+        self.array_circuit = None
+
+        # Receives the nodes while the circuit is built into arrays
+        self.node_arrays = None
+
+        if not array_storage:
+            self.bottom_nodes = self.build_subcircuit(self.ground_node, given_instructions_tree)
+            return
+
+        # The whole circuit is needed to show it
+        if any(True for _show_circuit_tree in given_instructions_tree.find_data("show_circuit")):
+            print("show_circuit is not supported with array storage", file=sys.stderr)
+            sys.exit(1)
+
+        self.node_arrays = Array_circuit_builder(shared_deadend_node)
+
+        # Only the frontier is kept as objects
+        frontier_nodes = [self.ground_node]
+        self.ground_node = None
+
+        for a_statement in given_instructions_tree.children:
+            frontier_nodes = self.node_arrays.store_nodes_above(self.build_statements(frontier_nodes, [a_statement]))
+
+        self.array_circuit = self.node_arrays.finish(frontier_nodes, given_output_tree)
+        self.node_arrays = None
+        self.bottom_nodes = []
 
 
 
     # Builds a subcircuit with a given parent node and a tree of items below
-    # Implemented as a depth-first search (DFS), always following the left-most child tree if many options are available
     def build_subcircuit(self, given_parent_node, contained_tree):
+        return self.build_statements([given_parent_node], contained_tree.children)
+
+
+
+    # Builds the statements below a list of parent nodes (a frontier), see inference_parallel.py
+    # Implemented as a depth-first search (DFS), always following the left-most child tree if many options are available
+    # return [Circuit node, ...], the nodes at the bottom after the statements
+    def build_statements(self, given_parent_nodes, given_statements):
 
         # Generates a queue to store child trees to process
         available_trees_to_be_explored = Simple_Stack()
 
-        add_to_stack(available_trees_to_be_explored, contained_tree.children)
-
+        add_to_stack(available_trees_to_be_explored, given_statements)
 
-        available_parent_nodes = [given_parent_node]
 
-        #available_trees_to_be_explored = contained_tree.children
+        available_parent_nodes = list(given_parent_nodes)
 
         # Keep exploring until no more are available
         while available_trees_to_be_explored.has_contents():
@@ -99,6 +215,7 @@ class Circuit(object):
             if data_from_tree == "observe":
                 # Gets the observe statement
                 observe_statement_tree = present_tree.children[0]
+                observe_evaluator = compile_logical_evaluator(observe_statement_tree, True)
 
                 # Adds the observe statement as a future node
                 for a_parent_node in available_parent_nodes:
@@ -106,17 +223,15 @@ class Circuit(object):
                     # Only add node if the observation is met
 
                     # Obtains the environment, tokens and variable values only
-                    environment_parent = a_parent_node.obtain_chain_environment()
-
                     # {"variable token":variable_value, ...}
-                    environment_token_parent = {a_token:environment_parent[a_token][0] for a_token in environment_parent}
+                    environment_token_parent = a_parent_node.obtain_chain_environment_vars_only()
 
-                    if logical_value.TRUE == logical_evaluator(observe_statement_tree, environment_token_parent, True):
+                    if logical_value.TRUE == observe_evaluator(environment_token_parent):
                         future_parent_nodes.append(Circuit_node_observation(a_parent_node, observe_statement_tree))
                     else:
                         # Add deadend nodes to places where the observation is not met
                         # These nodes are not parent nodes
-                        Circuit_node_deadend(a_parent_node)
+                        self.add_deadend(a_parent_node)
 
 
                 # Mark the parent nodes as the current observation nodes
@@ -129,6 +244,7 @@ class Circuit(object):
             elif data_from_tree == "reject":
                 # Gets the observe statement
                 observe_statement_tree = present_tree.children[0]
+                observe_evaluator = compile_logical_evaluator(observe_statement_tree, True)
 
                 # Adds the observe statement as a future node
                 for a_parent_node in available_parent_nodes:
@@ -136,17 +252,15 @@ class Circuit(object):
                     # Only add node if the observation is met
 
                     # Obtains the environment, tokens and variable values only
-                    environment_parent = a_parent_node.obtain_chain_environment()
-
                     # {"variable token":variable_value, ...}
-                    environment_token_parent = {a_token:environment_parent[a_token][0] for a_token in environment_parent}
+                    environment_token_parent = a_parent_node.obtain_chain_environment_vars_only()
 
-                    if logical_value.FALSE == logical_evaluator(observe_statement_tree, environment_token_parent, True):
+                    if logical_value.FALSE == observe_evaluator(environment_token_parent):
                         future_parent_nodes.append(Circuit_node_rejection(a_parent_node, observe_statement_tree))
                     else:
                         # Add deadend nodes to places where the observation is not met
                         # These nodes are not parent nodes
-                        Circuit_node_deadend(a_parent_node)
+                        self.add_deadend(a_parent_node)
 
 
                 # Mark the parent nodes as the current observation nodes
@@ -159,28 +273,27 @@ class Circuit(object):
 
                 # Obtains the expressions that will be marginalized by
                 marginalization_conditions = present_tree.children
+                marginalization_evaluators = [compile_logical_evaluator(a_marg_condition, final_result=False, numeric_final_result=True)
+                                                for a_marg_condition in marginalization_conditions]
 
                 # Stores nodes where the marginalization expressions hold the same values
-                # {"[m1, ...]":[Circuit node 1, ...], ...}
+                # Values are compared in their canonical form (see aux_inference.grouping_decimals for the numeric tolerance)
+                # {(m1, ...):[Circuit node 1, ...], ...}
                 marg_conditions_to_nodes = {}
 
                 # Goes node by node
                 for a_parent_node in available_parent_nodes:
 
-                    marginalized_values = []
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
 
                     # Goes condition by condition
-                    for a_marg_condition in marginalization_conditions:
-                        marginalized_values.append(logical_evaluator(a_marg_condition, environment_parent,
-                            final_result=False, numeric_final_result=True))
-
-                    # Checks and stores it in the marginalization conditions as a string
-                    marginalized_values_str = str(marginalized_values)
-                    if marginalized_values_str in marg_conditions_to_nodes:
-                        marg_conditions_to_nodes[marginalized_values_str].append(a_parent_node)
+                    marginalized_values = tuple(canonical_grouping_value(a_marg_evaluator(environment_parent))
+                                                    for a_marg_evaluator in marginalization_evaluators)
+
+                    if marginalized_values in marg_conditions_to_nodes:
+                        marg_conditions_to_nodes[marginalized_values].append(a_parent_node)
                     else:
-                        marg_conditions_to_nodes[marginalized_values_str] = [a_parent_node]
+                        marg_conditions_to_nodes[marginalized_values] = [a_parent_node]
 
 
                 # Joins the nodes with the same marginalization conditions
@@ -205,38 +318,10 @@ class Circuit(object):
                 # Obtains the elimination variables in a dictionary for fast access
                 elimination_variable_names = {a_child_token.value:True for a_child_token in present_tree.children}
 
-                # Stores nodes where the variables which are not to be eliminated
-                # {"[var1, ...]":[Circuit node 1, ...], ...}
-                remaining_vars_to_nodes = {}
-
-                # Goes node by node
-                for a_parent_node in available_parent_nodes:
-
-                    marginalized_values = []
-                    environment_parent = a_parent_node.obtain_chain_environment_vars_only()
-
-                    # Obtains the variables which are not to be eliminated
-                    # Sorted for repeatability
-                    non_eliminated_vars = sorted([str(environment_parent[a_var]) for a_var in environment_parent if a_var not in elimination_variable_names])
-
-                    # Checks and stores it as a string
-                    non_eliminated_vars_str = str(non_eliminated_vars)
-
-                    if non_eliminated_vars_str in remaining_vars_to_nodes:
-                        remaining_vars_to_nodes[non_eliminated_vars_str].append(a_parent_node)
-                    else:
-                        remaining_vars_to_nodes[non_eliminated_vars_str] = [a_parent_node]
-
-
-                # Joins the nodes with the same marginalization conditions
-                for a_set_of_remaining_vars in remaining_vars_to_nodes:
-                    nodes_with_same_remaining_vars = remaining_vars_to_nodes[a_set_of_remaining_vars]
-
+                # Joins the nodes where the variables which are not to be eliminated hold the same values
+                for nodes_with_same_remaining_vars in group_nodes_by_environment(available_parent_nodes, elimination_variable_names):
                     future_parent_nodes += [Circuit_node_compressed("ELIM", nodes_with_same_remaining_vars, elimination_variable_names)]
 
-                # Saves the memory utilized for the variable elimination
-                del remaining_vars_to_nodes
-
                 available_parent_nodes = future_parent_nodes
 
 
@@ -246,13 +331,14 @@ class Circuit(object):
 
                 node_counter = 0
                 expression_to_be_shown = present_tree.children[0]
+                expression_evaluator = compile_logical_evaluator(expression_to_be_shown, final_result=False, numeric_final_result=False)
 
                 for a_parent_node in available_parent_nodes:
 
                     print("-> Leaf node %d:" % (node_counter, ))
 
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
-                    tmp_var = logical_evaluator(expression_to_be_shown, environment_parent, final_result=False, numeric_final_result=False)
+                    tmp_var = expression_evaluator(environment_parent)
 
                     print("    " + str(tmp_var) + "\n")
 
@@ -266,6 +352,7 @@ class Circuit(object):
 
                 node_counter = 0
                 expression_to_be_shown = present_tree.children[0]
+                expression_evaluator = compile_logical_evaluator(expression_to_be_shown, final_result=False, numeric_final_result=False)
 
                 # {"Expresion value":[Node number (int), ...], ...}
                 nodes_with_same_value = {}
@@ -273,7 +360,7 @@ class Circuit(object):
                 for a_parent_node in available_parent_nodes:
 
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
-                    tmp_var = logical_evaluator(expression_to_be_shown, environment_parent, final_result=False, numeric_final_result=False)
+                    tmp_var = expression_evaluator(environment_parent)
 
                     variable_contents_str = str(tmp_var)
 
@@ -404,12 +491,13 @@ class Circuit(object):
                 token_name = present_tree.children[0].value
 
                 operation_to_be_executed = present_tree.children[1]
+                operation_evaluator = compile_logical_evaluator(operation_to_be_executed, final_result=False, numeric_final_result=True)
 
                 # Adds two variable nodes, one for each binary value
                 for a_parent_node in available_parent_nodes:
 
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
-                    assigned_variable_value = logical_evaluator(operation_to_be_executed, environment_parent, final_result=False, numeric_final_result=True)
+                    assigned_variable_value = operation_evaluator(environment_parent)
 
                     b1, b2 = generate_bernoulli(token_name, assigned_variable_value)
 
@@ -430,6 +518,11 @@ class Circuit(object):
                 # Gets the number of discrete value assignments
                 num_value_assignments = (len(present_tree.children) - 1)//2
 
+                # [[value evaluator, odds evaluator], ...]
+                assignment_evaluators = [[compile_logical_evaluator(present_tree.children[1 + 2*an_assignment], final_result=False, numeric_final_result=True),
+                                            compile_logical_evaluator(present_tree.children[1 + 2*an_assignment + 1], final_result=False, numeric_final_result=True)]
+                                            for an_assignment in range(0, num_value_assignments)]
+
                 for a_parent_node in available_parent_nodes:
 
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
@@ -438,12 +531,9 @@ class Circuit(object):
                     assigned_values = []
                     assigned_odds   = []
 
-                    for an_assignment in range(0, num_value_assignments):
-                        value_tree = present_tree.children[1 + 2*an_assignment]
-                        odds_tree  = present_tree.children[1 + 2*an_assignment + 1]
-
-                        assigned_values.append(logical_evaluator(value_tree, environment_parent, final_result=False, numeric_final_result=True))
-                        assigned_odds.append(logical_evaluator(odds_tree, environment_parent, final_result=False, numeric_final_result=True))
+                    for value_evaluator, odds_evaluator in assignment_evaluators:
+                        assigned_values.append(value_evaluator(environment_parent))
+                        assigned_odds.append(odds_evaluator(environment_parent))
 
                     # Creates the discrete variable
                     generated_variables = discrete_creator(discrete_variable_type, variable_name, assigned_values, assigned_odds)
@@ -463,6 +553,8 @@ class Circuit(object):
 
                 # Gets the number of discrete value assignments
                 num_hyperparameters = len(present_tree.children) - 1
+                hyperparameter_evaluators = [compile_logical_evaluator(present_tree.children[1 + an_hp], final_result=False, numeric_final_result=True)
+                                                for an_hp in range(0, num_hyperparameters)]
 
                 for a_parent_node in available_parent_nodes:
 
@@ -471,9 +563,8 @@ class Circuit(object):
                     # Keeps track of the discrete values and their odds
                     assigned_hyperparameters = []
 
-                    for an_hp in range(0, num_hyperparameters):
-                        hp_tree = present_tree.children[1 + an_hp]
-                        assigned_hyperparameters.append(logical_evaluator(hp_tree, environment_parent, final_result=False, numeric_final_result=True))
+                    for an_hp_evaluator in hyperparameter_evaluators:
+                        assigned_hyperparameters.append(an_hp_evaluator(environment_parent))
 
                     # Creates the discrete variable
                     generated_variables = generate_discretized_continuous_distribution(variable_name, distribution_name, assigned_hyperparameters)
@@ -493,6 +584,8 @@ class Circuit(object):
 
                 # Gets the number of discrete value assignments
                 num_hyperparameters = len(present_tree.children) - 1
+                hyperparameter_evaluators = [compile_logical_evaluator(present_tree.children[1 + an_hp], final_result=False, numeric_final_result=True)
+                                                for an_hp in range(0, num_hyperparameters)]
 
                 for a_parent_node in available_parent_nodes:
 
@@ -501,9 +594,8 @@ class Circuit(object):
                     # Keeps track of the discrete values and their odds
                     assigned_hyperparameters = []
 
-                    for an_hp in range(0, num_hyperparameters):
-                        hp_tree = present_tree.children[1 + an_hp]
-                        assigned_hyperparameters.append(logical_evaluator(hp_tree, environment_parent, final_result=False, numeric_final_result=True))
+                    for an_hp_evaluator in hyperparameter_evaluators:
+                        assigned_hyperparameters.append(an_hp_evaluator(environment_parent))
 
                     # Creates the discrete variable
                     generated_variables = generate_discretized_continuous_distribution_from_n(variable_name, distribution_name, assigned_hyperparameters)
@@ -520,16 +612,16 @@ class Circuit(object):
 
                 token_name = present_tree.children[0].value
                 operation_to_be_executed = present_tree.children[1]
+                operation_evaluator = compile_logical_evaluator(operation_to_be_executed, final_result=False, numeric_final_result=False)
 
                 for a_parent_node in available_parent_nodes:
 
                     # Obtains the environment, tokens and variable values only
                     environment_parent = a_parent_node.obtain_chain_environment_vars_only()
-                    assigned_variable = logical_evaluator(operation_to_be_executed, environment_parent,
-                                                            final_result=False, numeric_final_result=False)
+                    assigned_variable = operation_evaluator(environment_parent)
 
-                    # Adds node
-                    future_parent_nodes += [Circuit_node_variable(token_name, a_parent_node, assigned_variable)]
+                    # Adds node, the assigned value is determined by the parent chain (e.g. "y = x" shares the probability of x)
+                    future_parent_nodes += [Circuit_node_variable(token_name, a_parent_node, assigned_variable, assigned=True)]
 
                 available_parent_nodes = future_parent_nodes
 
@@ -599,6 +691,9 @@ class Circuit(object):
                     node_conections.append(step_connections)
 
 
+                # matplotlib is slow to import, so it is only loaded for programs showing their circuit
+                import matplotlib.pyplot as plt
+
                 # Creates a figure to show the nodes
                 plt.figure()
 
@@ -714,11 +809,47 @@ class Circuit(object):
                 add_to_stack(available_trees_to_be_explored, present_tree.children)
 
 
+            # Merges the nodes holding the same environment, nodes without an equivalent one are kept as they are
+            if self.merge_equivalent_nodes and (data_from_tree in value_overwriting_statements) and (len(available_parent_nodes) > 1):
+                available_parent_nodes = self.merge_nodes(available_parent_nodes)
+
+
         # Returns the final parent nodes as the end nodes for the circuit
         return available_parent_nodes
 
 
 
+    # Merges the nodes holding the same environment into "MERGE" compressed nodes
+    # return [Circuit node, ...]
+    def merge_nodes(self, given_nodes):
+
+        merged_nodes = []
+
+        for nodes_with_same_environment in group_nodes_by_environment(given_nodes):
+
+            if len(nodes_with_same_environment) == 1:
+                merged_nodes.append(nodes_with_same_environment[0])
+            else:
+                merged_nodes.append(Circuit_node_compressed("MERGE", nodes_with_same_environment))
+                self.num_merged_nodes += len(nodes_with_same_environment) - 1
+
+        return merged_nodes
+
+
+
+    # Marks a trace as not meeting the observations, by adding a dead end node below its last node
+    def add_deadend(self, given_parent_node):
+
+        # Ordered among the children of the parent in the same way as the object nodes
+        if self.node_arrays != None:
+            self.node_arrays.add_deadend(given_parent_node, next(node_ID_counter))
+        elif self.retain_deadends:
+            Circuit_node_deadend(given_parent_node)
+        else:
+            given_parent_node.add_child(shared_deadend_node)
+
+
+
     # Goes down once from the ground node according to the variable probabilities, designed for direct sampling (rejection method)
     # Return [0/1 meeting return statement, 0/1 meeting observations]
     def single_direct_search(self):
@@ -757,6 +888,74 @@ class Circuit(object):
     # Obtains the rejection (random sampling) probability
     # Prints the final results
     def infer_by_rejection(self, num_samples=5000):
+        print_conditional_probability(*self.rejection_counts(num_samples))
+
+
+
+    # Obtains the batched sampler of the circuit, created the first time
+    # return Batch_sampler
+    def obtain_batch_sampler(self):
+
+        if self.batch_sampler == None:
+            self.batch_sampler = Batch_sampler(self)
+
+        return self.batch_sampler
+
+
+
+    # Numbers the nodes and obtains the arrays the batched sampler draws from (see inference_sampling.Batch_sampler)
+    # Nodes are numbered in depth-first order, the ground node is node 0
+    # Nodes may have multiple parents (compressed nodes, shared dead end), they are only numbered once
+    # return [child offsets (np.array), number of children (np.array), child indices (np.array), child probabilities (np.array),
+    # dead end nodes (np.array of bool), end node environment (function: node index -> {"variable token":variable_value, ...})]
+    def sampling_structure(self):
+
+        if self.array_circuit != None:
+            return self.array_circuit.sampling_structure()
+
+        # {id(node):node index}
+        node_numbers = {}
+        ordered_nodes = []
+
+        nodes_to_be_explored = [self.ground_node]
+
+        while nodes_to_be_explored != []:
+
+            a_node = nodes_to_be_explored.pop()
+
+            if id(a_node) in node_numbers:
+                continue
+
+            node_numbers[id(a_node)] = len(ordered_nodes)
+            ordered_nodes.append(a_node)
+
+            nodes_to_be_explored.extend(a_node.children[::-1])
+
+        num_children = np.array([len(a_node.children) for a_node in ordered_nodes], dtype=np.int64)
+        child_offsets = np.concatenate([[0], np.cumsum(num_children)[:-1]]).astype(np.int64)
+
+        child_indices = np.array([node_numbers[id(a_child_node)] for a_node in ordered_nodes for a_child_node in a_node.children],
+                            dtype=np.int64)
+        child_probability = np.array([a_child_node.current_probability for a_node in ordered_nodes for a_child_node in a_node.children],
+                                dtype=np.float64)
+        deadend_nodes = np.array([a_node.deadend for a_node in ordered_nodes], dtype=bool)
+
+        return [child_offsets, num_children, child_indices, child_probability, deadend_nodes,
+                lambda node_index: ordered_nodes[node_index].obtain_chain_environment_vars_only()]
+
+
+
+    # Samples the circuit, all samples are drawn in batches (see inference_sampling.py)
+    # random_generator (np.random.Generator): A new one with the default seed is created if None
+    # return [number of samples meeting the output and the observations (int), number of samples meeting the observations (int)]
+    def rejection_counts(self, num_samples=5000, random_generator=None):
+        return self.obtain_batch_sampler().rejection_counts(num_samples, random_generator)
+
+
+
+    # Samples the circuit one sample at a time, following the nodes directly
+    # return [number of samples meeting the output and the observations (int), number of samples meeting the observations (int)]
+    def single_rejection_counts(self, num_samples=5000):
 
         valid_output_observes = 0
         valid_observes = 0
@@ -772,11 +971,7 @@ class Circuit(object):
                 if meets_output:
                     valid_output_observes += 1
 
-        if (valid_output_observes == 0) and (valid_observes == 0):
-            print(0)
-            return
-
-        print("%.4f" % (valid_output_observes/valid_observes))
+        return [valid_output_observes, valid_observes]
 
 
 
@@ -785,6 +980,15 @@ class Circuit(object):
     # Goes up from the lowest nodes until the top recording the probabilities
     # Prints the final results
     def infer_by_enumeration(self):
+        print_conditional_probability(*self.enumeration_probabilities())
+
+
+
+    # return [probability of meeting the output and the observations (float), probability of meeting the observations (float)]
+    def enumeration_probabilities(self):
+
+        if self.array_circuit != None:
+            return self.array_circuit.enumeration_probabilities()
 
         Pr_meets_output_and_observes = 0
         Pr_meets_observes = 0
@@ -800,17 +1004,17 @@ class Circuit(object):
             if meets_output:
                 Pr_meets_output_and_observes += Pr_chain
 
-        if (Pr_meets_output_and_observes == 0) and (Pr_meets_observes == 0):
-            print(0)
-            return
-
-        print("%.4f" % (Pr_meets_output_and_observes/Pr_meets_observes))
+        return [Pr_meets_output_and_observes, Pr_meets_observes]
 
 
 
     # Shows the circuit
     def show_circuit(self):
-        self.ground_node.show_bottom_circuit()
+
+        if self.array_circuit != None:
+            self.array_circuit.show_circuit()
+        else:
+            self.ground_node.show_bottom_circuit()
 
 
 
@@ -821,10 +1025,15 @@ class Circuit(object):
 # Each node has 1 token, 1 or more parents (None if it is the circuit head), a value (variable object), and probailities of it being true
 # probability_true (float): Refers to the probability of the node itself, this is useful for variable marginalization or elimination
 # compressed_node (bool): Refers to nodes after marginalization or elimination (where the probabilities and environments are stored directly)
-# compressed_environment {"variable token":variable value}: Environment present in compressed nodes
+# compressed_environment {"variable token":variable value}: Environment present in compressed nodes (already merged)
 # deadend (bool): Creates a dead-end node, designed to mark nodes which do not meet observations
+# Circuits may contain millions of nodes, so their attributes are stored in slots instead of a per-node dictionary
 class Circuit_node(object):
 
+    __slots__ = ["token", "parents", "observation_node", "children", "variable_value", "current_probability", "observation_tree",
+                    "compressed_node", "deadend", "chain_probability", "environment", "owns_environment", "unbuilt_child_environments",
+                    "node_ID"]
+
     def __init__(self, token, observation_node, parents, variable_value, current_probability, observation_tree, compressed_node = False,
         compressed_environment = None, deadend = False):
 
@@ -838,7 +1047,8 @@ class Circuit_node(object):
         self.observation_node = observation_node
 
         # No children nodes as of now
-        self.children = []
+        # The empty tuple is shared, a list is only created once a child is added (most nodes are end nodes)
+        self.children = ()
 
         self.variable_value = variable_value
 
@@ -853,9 +1063,8 @@ class Circuit_node(object):
         # Rejection trees act the same as a negated obseervation
         self.observation_tree = observation_tree
 
-        # Stores the compressed information
+        # Stores the compressed information, the compressed environment is kept as the node environment
         self.compressed_node = compressed_node
-        self.compressed_environment = compressed_environment
 
         self.deadend = deadend
 
@@ -863,10 +1072,46 @@ class Circuit_node(object):
         if parents != [None]:
 
             for ma in range(0, len(parents)):
-                self.parents[ma].children.append(self)
+                self.parents[ma].add_child(self)
+
+        # Stores the probability of the upward chain of events, computed only once when the node is created
+        # Compressed nodes (corresponding to variable elimination or marginalization) already store the combined chain probability
+        if (parents == [None]) or compressed_node:
+            self.chain_probability = current_probability
+        else:
+            self.chain_probability = parents[0].chain_probability*current_probability
+
+        # Stores the environment of the upward chain of events, only built when it is first requested (see build_environment)
+        # Nodes only keep their parent (parents[0]) and their own variable, so that environments are not copied node by node
+        # Compressed nodes store their merged environment directly
+        # {"variable token":variable_value, ...}
+        if parents == [None]:
+            self.environment = {}
+        elif compressed_node:
+            self.environment = compressed_environment
+        else:
+            self.environment = None
+
+        # Only the node owning its environment may hand it down to a child (compressed environments may be shared)
+        self.owns_environment = False
+
+        # Number of children which will build their environment from this one, the last of them takes it over
+        self.unbuilt_child_environments = 0
+
+        if (parents != [None]) and (not compressed_node):
+            parents[0].unbuilt_child_environments += 1
 
         # Assigns an unique ID to each node
-        self.node_ID = str(uuid4())
+        self.node_ID = next(node_ID_counter)
+
+
+    # Adds a child node
+    def add_child(self, child_node):
+
+        if len(self.children) == 0:
+            self.children = [child_node]
+        else:
+            self.children.append(child_node)
 
 
     # Custom node representation in string form
@@ -890,63 +1135,65 @@ class Circuit_node(object):
 
     # Checks if the node is an end node (no children)
     def is_end_node(self):
-        return self.children == []
+        return len(self.children) == 0
 
 
     # Obtains the probability of the current upwards chain of events, going until the head (self.parent == None)
-    # Implemented in a tail-recursive way for efficiency
-    def obtain_chain_probability(self, probability_so_far=1):
-
-        if self.parents == [None]:
-            return probability_so_far*self.current_probability
-
-        # For compressed nodes (corresponding to variable elimination or marginalization), get their probability as well
-        elif self.compressed_node:
-            return probability_so_far*self.current_probability
-        else:
-            return self.parents[0].obtain_chain_probability(probability_so_far*self.current_probability)
+    def obtain_chain_probability(self):
+        return self.chain_probability
 
 
     # Obtains the environment dictionary of the current upwards chain of events
-    # Implemented in a tail-recursive way for efficiency
     # return environment dictionary = {"token":[variable, current_probability (float)]}
-    def obtain_chain_environment(self, environment_so_far = {}):
+    def obtain_chain_environment(self):
+        return {a_token:[a_var, a_var.probability] for a_token, a_var in self.obtain_chain_environment_vars_only().items()}
 
-        recursive_environment = deepcopy(environment_so_far)
 
-        # Ignores observation nodes
-        if not self.observation_node:
 
-            # In the case of compressed nodes, retreive all values unless already seen
-            if self.compressed_node:
+    # Obtains the variables alone from a chain/trace
+    # The returned dictionary is shared between nodes, it must not be modified
+    # return # {"variable token":variable_value, ...}
+    def obtain_chain_environment_vars_only(self):
+        if self.environment == None:
+            self.build_environment()
 
-                for a_var_name in self.compressed_environment:
+        return self.environment
 
-                    if a_var_name not in recursive_environment:
-                        recursive_environment[a_var_name] = self.compressed_environment[a_var_name]
-            # Normal nodes
-            else:
-                # Stores using variable name, not the circuit token
-                var_val = self.variable_value
 
-                if var_val.variable_name not in recursive_environment:
-                    recursive_environment[var_val.variable_name] = [var_val, self.current_probability]
+    # Builds the environment of the node (and of the nodes above without one) from the one of its parent
+    # The last child to build its environment takes over the dictionary of its parent instead of copying it (which is then rebuilt
+    # only if requested again), so that dictionaries are only copied where the traces branch off
+    # Nodes which do not bind a new variable (observations, rejections, dead ends) keep the dictionary of their parent as it is,
+    # unless another child could still take it over
+    def build_environment(self):
 
-        if self.parents == [None]:
-            return environment_so_far
-        else:
-            return self.parents[0].obtain_chain_environment(recursive_environment)
+        # The head and the compressed nodes always hold their environment
+        unbuilt_nodes = [self]
 
+        while unbuilt_nodes[-1].parents[0].environment == None:
+            unbuilt_nodes.append(unbuilt_nodes[-1].parents[0])
 
+        for a_node in reversed(unbuilt_nodes):
 
-    # Obtains the variables alone from a chain/trace
-    # return # {"variable token":variable_value, ...}
-    def obtain_chain_environment_vars_only(self):
-        # Obtains the environment, tokens and variable values only
-        complete_environment = self.obtain_chain_environment()
+            parent_node = a_node.parents[0]
+            parent_node.unbuilt_child_environments -= 1
 
-        # {"variable token":variable_value, ...}
-        return{a_token:complete_environment[a_token][0] for a_token in complete_environment}
+            # Takes over the parent environment
+            if parent_node.owns_environment and (parent_node.unbuilt_child_environments <= 0):
+                a_node.environment = parent_node.environment
+                a_node.owns_environment = True
+
+                parent_node.environment = None
+                parent_node.owns_environment = False
+            elif (a_node.observation_node or a_node.deadend) and (not parent_node.owns_environment):
+                a_node.environment = parent_node.environment
+            else:
+                # Shallow copy, the variables themselves are shared
+                a_node.environment = dict(parent_node.environment)
+                a_node.owns_environment = True
+
+            if not (a_node.observation_node or a_node.deadend):
+                a_node.environment[a_node.variable_value.variable_name] = a_node.variable_value
 
 
 
@@ -961,7 +1208,7 @@ class Circuit_node(object):
         environment_2 = self.obtain_chain_environment_vars_only()
 
         # Verifies if the output (return) statement is met
-        meets_output = logical_value.TRUE == logical_evaluator(given_output_tree, environment_2, True, False)
+        meets_output = logical_value.TRUE == compile_logical_evaluator(given_output_tree, True, False)(environment_2)
 
         return [chain_Pr, meets_output]
 
@@ -970,13 +1217,10 @@ class Circuit_node(object):
     # Evaluates whether or not the upward chain meets an if condition
     def evaluate_if_condition(self, given_condition):
 
-        # Obtains the chain probability
-        chain_Pr = self.obtain_chain_probability()
-
         # Obtains the environment, tokens and variable values only
         environment_2 = self.obtain_chain_environment_vars_only()
 
-        logical_evaluation_result = logical_evaluator(given_condition, environment_2, True, False)
+        logical_evaluation_result = compile_logical_evaluator(given_condition, True, False)(environment_2)
 
         # Verifies if the output (return) statement is met
         # Not strict due to lazy evaluation
@@ -990,27 +1234,37 @@ class Circuit_node(object):
     def obtain_circuit_top(self):
 
         # No parents necessarily implies being the top node
-        if self.parents == [None]:
-            return self
-        else:
-            return self.parents[0].obtain_circuit_top()
+        # Followed without recursion, since circuits have one level per statement
+        circuit_top = self
+
+        while circuit_top.parents != [None]:
+            circuit_top = circuit_top.parents[0]
+
+        return circuit_top
 
 
 # Creates a circuit node for a variable.
 # Each node has 1 token, 1 parent (None if it is the circuit head), a variable, and a probability of being true
 class Circuit_node_variable(Circuit_node):
 
+    __slots__ = []
+
     # Inheritance information obtained from https://www.programiz.com/python-programming/inheritance
-    def __init__(self, token, parent, variable_value):
+    # assigned (bool): Whether or not the variable comes from an assignment, which always happens (probability 1) once the parent
+    # chain has been selected, even if the assigned variable has been selected with a lower probability (e.g. "y = x")
+    def __init__(self, token, parent, variable_value, assigned = False):
 
         # Enforces the token being different from "OBSERVATION"
-        assert token not in  ["OBSERVATION", "MARG", "ELIM", "DEADEND"], "Token cannot be '%s', reserved name" % (token, )
+        assert token not in  ["OBSERVATION", "MARG", "ELIM", "MERGE", "DEADEND", "FRONTIER"], "Token cannot be '%s', reserved name" % (token, )
 
         # Changes the name of the variable to be the same as the token
-        variable_value.variable_name = token
+        # Variables are shared between environments (e.g. "y = x"), so a renamed copy is used instead of the original
+        if variable_value.variable_name != token:
+            variable_value = copy(variable_value)
+            variable_value.variable_name = token
 
         Circuit_node.__init__(self, token, observation_node=False, parents=[parent], variable_value=variable_value,
-            current_probability=variable_value.probability, observation_tree=None, compressed_node=False,  compressed_environment=None,
+            current_probability=1 if assigned else variable_value.probability, observation_tree=None, compressed_node=False,  compressed_environment=None,
             deadend=False)
 
 
@@ -1018,10 +1272,12 @@ class Circuit_node_variable(Circuit_node):
 # Creates a circuit node for an observation.
 class Circuit_node_observation(Circuit_node):
 
+    __slots__ = []
+
     # Inheritance information obtained from https://www.programiz.com/python-programming/inheritance
     def __init__(self, parent, given_observation_tree):
 
-        Circuit_node.__init__(self, "OBSERVATION", observation_node=True, parents=[parent], variable_value=generate_true_fixed_var(),
+        Circuit_node.__init__(self, "OBSERVATION", observation_node=True, parents=[parent], variable_value=sentinel_true_var,
             current_probability=1, observation_tree=given_observation_tree, compressed_node=False,  compressed_environment=None,
             deadend=False)
 
@@ -1030,10 +1286,12 @@ class Circuit_node_observation(Circuit_node):
 # Creates a circuit node for an rejection.
 class Circuit_node_rejection(Circuit_node):
 
+    __slots__ = []
+
     # Inheritance information obtained from https://www.programiz.com/python-programming/inheritance
     def __init__(self, parent, given_observation_tree):
 
-        Circuit_node.__init__(self, "REJECTION", observation_node=True, parents=[parent], variable_value=generate_true_fixed_var(),
+        Circuit_node.__init__(self, "REJECTION", observation_node=True, parents=[parent], variable_value=sentinel_true_var,
             current_probability=1, observation_tree=given_observation_tree, compressed_node=False,  compressed_environment=None,
             deadend=False)
 
@@ -1043,38 +1301,65 @@ class Circuit_node_rejection(Circuit_node):
 # This node is used for for storage, it gets the probabilities of the nodes above, but it does not select them itself
 class Circuit_node_compressed(Circuit_node):
 
+    __slots__ = []
+
     # Inheritance information obtained from https://www.programiz.com/python-programming/inheritance
     # pre_compression_nodes (arr) (Circuit_node): Refers to the nodes before compression
     # variable_names_to_ignore {"variable name":True, ...}: Variable names which are not to be stored
     def __init__(self, requested_operation, pre_compression_nodes, variable_names_to_ignore={}):
-        valid_operations = ["MARG", "ELIM", "DEADEND"]
-        assert requested_operation in  ["MARG", "ELIM"],...
+        valid_operations = ["MARG", "ELIM", "MERGE", "DEADEND"]
+        assert requested_operation in  ["MARG", "ELIM", "MERGE"],...
         "Operation must be in '%s', currrently is '%s'" % (str(valid_operations), requested_operation)
 
         # Obtains all the probabilities
-        combined_Pr = 0
-
-        for a_parent_node in pre_compression_nodes:
-            combined_Pr += a_parent_node.obtain_chain_probability()
+        combined_Pr = sum(a_parent_node.chain_probability for a_parent_node in pre_compression_nodes)
 
         # Assumed that the variables after compression which have been compressed will not be used
         # and that different compressed nodes will have separate variables of interest
-        post_compression_env = pre_compression_nodes[0].obtain_chain_environment()
+        post_compression_env = pre_compression_nodes[0].obtain_chain_environment_vars_only()
 
-        for a_var_to_ignore in variable_names_to_ignore:
-            post_compression_env.pop(a_var_to_ignore, None)
+        # Only copied if there is something to remove, otherwise the environment is shared
+        if any(a_var_to_ignore in post_compression_env for a_var_to_ignore in variable_names_to_ignore):
+            post_compression_env = {a_token:post_compression_env[a_token] for a_token in post_compression_env
+                                        if a_token not in variable_names_to_ignore}
 
-        Circuit_node.__init__(self, requested_operation, observation_node=False, parents=pre_compression_nodes, variable_value=generate_true_fixed_var(),
+        Circuit_node.__init__(self, requested_operation, observation_node=False, parents=pre_compression_nodes, variable_value=sentinel_true_var,
             current_probability=combined_Pr, observation_tree=None, compressed_node=True,  compressed_environment=post_compression_env,
             deadend=False)
 
 
 
+# Node holding the environment and the chain probability of a trace built in another process (see inference_parallel.py)
+class Circuit_node_frontier(Circuit_node):
+
+    __slots__ = []
+
+    # given_environment {"variable token":variable_value, ...}
+    # chain_probability (float)
+    def __init__(self, parent, given_environment, chain_probability):
+        Circuit_node.__init__(self, "FRONTIER", observation_node=False, parents=[parent], variable_value=sentinel_true_var,
+            current_probability=chain_probability, observation_tree=None, compressed_node=True,  compressed_environment=given_environment,
+            deadend=False)
+
+
+
 # Creates a deadend node
 # Designed for traces where observations are not met
 class Circuit_node_deadend(Circuit_node):
+
+    __slots__ = []
+
     # Inheritance information obtained from https://www.programiz.com/python-programming/inheritance
     # pre_compression_nodes (arr) (Circuit_node): Refers to the nodes before compression
     def __init__(self, parent):
-        Circuit_node.__init__(self, "DEADEND", observation_node=False, parents=[parent], variable_value=generate_true_fixed_var(),
-            current_probability=1, observation_tree=None, compressed_node=False,  compressed_environment=None, deadend=True)
\ No newline at end of file
+        Circuit_node.__init__(self, "DEADEND", observation_node=False, parents=[parent], variable_value=sentinel_true_var,
+            current_probability=1, observation_tree=None, compressed_node=False,  compressed_environment=None, deadend=True)
+
+
+
+# Value of the nodes which do not bind a variable (observations, rejections, compressed nodes, dead ends), shared between all of them
+sentinel_true_var = generate_true_fixed_var()
+
+
+# Dead end node shared by the traces not meeting the observations, used unless the circuit retains its dead ends
+shared_deadend_node = Circuit_node_deadend(None)
\ No newline at end of file
@@ -0,0 +1,648 @@
+"""
+SUMMARY
+
+Implements exact inference by variable elimination over a factor graph.
+The program is first translated into factors, with every assignment creating a new version of its variable (static single
+assignment), so that each version is defined once:
+    - random variables: conditional probability tables given the variables their distribution depends on
+    - assignments and "if" conditions: deterministic tables (1 for the resulting value, 0 otherwise)
+    - observations and rejections: tables which are 1 where they are met and 0 otherwise
+Statements within an "if" branch depend on the boolean "path" variable of the branch: outside of it, the variables keep their
+previous versions and the observations are met.
+All the variables except the one of the return expression are then summed out one by one, following a min-fill or
+min-degree elimination order.
+Only discrete (binary, numeric, and qualitative) programs are supported. Marginalizations are only supported when they do not
+change the value of any variable read afterwards (each group of traces would keep the values of its first trace for the variables
+not listed), since summing out the variables already combines the grouped traces.
+"""
+
+
+import heapq
+from itertools import product
+import sys
+
+import numpy as np
+
+from .aux_inference import add_to_stack, Simple_Stack
+from .inference_bdd import canonical_value
+from .vectorized_evaluation import broadcast_to_rows, vectorized_evaluator
+from parser.independence import marginalization_changes_read_variables
+
+
+
+# Statements which cannot be represented as factors
+unsupported_statements = ["d_uniform", "d_gaussian", "d_pareto", "d_beta", "d_uniform_num", "d_gaussian_num", "d_pareto_num", "d_beta_num",
+                            "wlsr", "print", "print_combined"]
+
+
+# Prefix for the internal variables (versions, paths, branch selectors), it cannot be part of a variable name
+internal_variable_prefix = "#"
+
+
+# Heuristics for choosing the next variable to eliminate
+valid_elimination_orders = ["min-fill", "min-degree"]
+
+
+
+# Function of some variables, stored as a table with one axis per variable
+class Factor(object):
+
+    # variables [str, ...]: Variables in the same order as the table axes
+    # table (np.array): Values, table.shape[i] is the domain size of variables[i]
+    def __init__(self, variables, table):
+        self.variables = variables
+        self.table = table
+
+
+    # Number of entries
+    def size(self):
+        return self.table.size
+
+
+    # Transposes and reshapes the table so that it can be broadcast against tables of all the given variables
+    # all_variables [str, ...]: Contains all the variables of this factor
+    def expanded_table(self, all_variables):
+
+        axes_order = sorted(range(0, len(self.variables)), key=lambda an_axis: all_variables.index(self.variables[an_axis]))
+        expanded_shape = [self.table.shape[self.variables.index(a_variable)] if a_variable in self.variables else 1
+                            for a_variable in all_variables]
+
+        return np.transpose(self.table, axes_order).reshape(expanded_shape)
+
+
+    # Sums out a variable
+    def sum_out(self, variable):
+
+        summed_axis = self.variables.index(variable)
+
+        return Factor(self.variables[:summed_axis] + self.variables[summed_axis + 1:], np.sum(self.table, axis=summed_axis))
+
+
+
+# Multiplies a list of factors
+def multiply_factors(given_factors):
+
+    all_variables = []
+    for a_factor in given_factors:
+        for a_variable in a_factor.variables:
+            if a_variable not in all_variables:
+                all_variables.append(a_variable)
+
+    multiplied_table = np.ones([1]*len(all_variables))
+
+    for a_factor in given_factors:
+        multiplied_table = multiplied_table*a_factor.expanded_table(all_variables)
+
+    return Factor(all_variables, multiplied_table)
+
+
+
+# Translates a program into a factor graph
+class Factor_graph(object):
+
+    # Translates the instruction tree
+    def __init__(self, given_instructions_tree, given_output_tree):
+
+        if marginalization_changes_read_variables(given_instructions_tree, given_output_tree):
+            print("Marginalizations keeping the first value of a variable read afterwards are not supported by variable elimination, "
+                "use 'enumerate' instead", file=sys.stderr)
+            sys.exit(1)
+
+        self.factors = []
+
+        # Possible values of each variable (program variable versions and internal variables)
+        # {"variable":[value 1, ...], ...}
+        self.domains = {}
+
+        # Current version of each program variable
+        # {"token":"variable", ...}
+        self.current_versions = {}
+
+        # Used to create unique variable names
+        self.num_created_variables = 0
+
+        self.translate_block(given_instructions_tree, None)
+
+        # Variable holding the logical value of the return expression (1.0 if met)
+        self.output_variable = self.add_deterministic_variable("return", self.expression_function(given_output_tree, True),
+            self.read_variables([given_output_tree]))
+
+
+
+    # Translates a tree of statements
+    # path_variable (str): Boolean variable which is 1.0 when the statements are executed, None if they always are
+    # Statements are visited in the same order as when building a circuit
+    def translate_block(self, contained_tree, path_variable):
+
+        available_trees_to_be_explored = Simple_Stack()
+        add_to_stack(available_trees_to_be_explored, contained_tree.children)
+
+        while available_trees_to_be_explored.has_contents():
+
+            present_tree = available_trees_to_be_explored.get()
+
+            # Do nothing if not a tree
+            if type(present_tree).__name__ != "Tree":
+                continue
+
+            data_from_tree = present_tree.data
+
+            if data_from_tree in unsupported_statements:
+                print("'%s' statements are not supported by variable elimination, use 'enumerate' instead" % (data_from_tree, ), file=sys.stderr)
+                sys.exit(1)
+
+
+            elif data_from_tree in ["observe", "reject"]:
+
+                expression_tree = present_tree.children[0]
+                meets_expression = self.expression_function(expression_tree, True)
+
+                if data_from_tree == "observe":
+                    is_met = lambda combinations: [a_value == 1.0 for a_value in meets_expression(combinations)]
+                else:
+                    is_met = lambda combinations: [a_value != 1.0 for a_value in meets_expression(combinations)]
+
+                self.add_constraint(is_met, self.read_variables([expression_tree]), path_variable)
+
+
+            # Summing out the variables already combines the grouped traces, and no variable read afterwards changes (see __init__)
+            elif data_from_tree == "marg":
+                pass
+
+
+            # Eliminated variables cannot be used afterwards
+            elif data_from_tree == "elimvar":
+                for a_child_token in present_tree.children:
+                    self.current_versions.pop(a_child_token.value, None)
+
+
+            # "if" statements: each trace follows the first branch whose condition is met
+            # ite:          [condition, contents if, contents else]
+            # ite_elseif:   [condition, contents, condition, contents, ...]
+            # ite_complete: [condition, contents, condition, contents, ..., contents else]
+            elif data_from_tree in ["ite", "ite_elseif", "ite_complete"]:
+                self.translate_conditional(present_tree, path_variable)
+
+
+            elif data_from_tree == "flip":
+
+                variable_flip_value = float(present_tree.children[1].value)
+
+                assert (0 <= variable_flip_value) and (variable_flip_value <= 1), "Required 0 <= p <= 1, p =%.4f" % (variable_flip_value, )
+
+                flip_distribution = lambda columns, num_rows: [np.array([[0.0, 1.0]]), np.array([[1 - variable_flip_value, variable_flip_value]])]
+
+                self.add_random_variable(present_tree.children[0].value, flip_distribution, [], path_variable)
+
+
+            elif data_from_tree == "bern":
+
+                probability_tree = present_tree.children[1]
+
+                def bernoulli_distribution(columns, num_rows, probability_tree=probability_tree):
+
+                    flip_values = broadcast_to_rows(vectorized_evaluator(probability_tree, columns, num_rows, False), num_rows).astype(float)
+
+                    assert np.all((0 <= flip_values) & (flip_values <= 1)), "Required 0 <= p <= 1"
+
+                    return [np.array([[0.0, 1.0]]), np.stack([1 - flip_values, flip_values], axis=1)]
+
+                self.add_random_variable(present_tree.children[0].value, bernoulli_distribution, self.read_variables([probability_tree]),
+                    path_variable)
+
+
+            elif data_from_tree in ["disc_num", "disc_qual"]:
+
+                num_value_assignments = (len(present_tree.children) - 1)//2
+                value_trees = [present_tree.children[1 + 2*an_assignment] for an_assignment in range(0, num_value_assignments)]
+                odds_trees  = [present_tree.children[2 + 2*an_assignment] for an_assignment in range(0, num_value_assignments)]
+
+                def discrete_distribution(columns, num_rows, value_trees=value_trees, odds_trees=odds_trees):
+
+                    assigned_values = [broadcast_to_rows(vectorized_evaluator(a_tree, columns, num_rows, False), num_rows) for a_tree in value_trees]
+                    assigned_odds   = [broadcast_to_rows(vectorized_evaluator(a_tree, columns, num_rows, False), num_rows).astype(float)
+                                        for a_tree in odds_trees]
+
+                    assigned_values = np.stack([a_column.astype(object) for a_column in assigned_values], axis=1)
+                    assigned_odds = np.stack(assigned_odds, axis=1)
+                    combined_odds = np.sum(assigned_odds, axis=1, keepdims=True)
+
+                    # Enforced overall odds are larger than zero
+                    assert np.all(combined_odds > 0), "Sum of odds must be > 0"
+
+                    return [assigned_values, assigned_odds/combined_odds]
+
+                self.add_random_variable(present_tree.children[0].value, discrete_distribution, self.read_variables(value_trees + odds_trees),
+                    path_variable)
+
+
+            elif data_from_tree == "assgn":
+
+                expression_tree = present_tree.children[1]
+                assigned_variable = self.add_deterministic_variable(present_tree.children[0].value,
+                    self.expression_function(expression_tree, False), self.read_variables([expression_tree]))
+
+                self.set_version(present_tree.children[0].value, assigned_variable, path_variable)
+
+
+            # There is no circuit to show
+            elif data_from_tree == "show_circuit":
+                print("show_circuit() is ignored by variable elimination", file=sys.stderr)
+
+
+            # Otherwise, find the children trees and explore them
+            else:
+                add_to_stack(available_trees_to_be_explored, present_tree.children)
+
+
+
+    # Translates an "if" statement
+    # A selector variable holds the number of the first branch whose condition is met (the number of branches if none)
+    def translate_conditional(self, given_tree, path_variable):
+
+        if given_tree.data == "ite_elseif":
+            num_branches = len(given_tree.children)//2
+        else:
+            num_branches = (len(given_tree.children) - 1)//2
+
+        condition_trees = [given_tree.children[2*a_branch] for a_branch in range(0, num_branches)]
+        condition_functions = [self.expression_function(a_tree, True) for a_tree in condition_trees]
+
+        def first_met_branch(combinations):
+
+            selected_branches = [float(num_branches)]*len(combinations)
+
+            # Goes backwards, so that the first met condition is the one kept
+            for a_branch in reversed(range(0, num_branches)):
+                for a_row, a_condition_value in enumerate(condition_functions[a_branch](combinations)):
+                    if a_condition_value == 1.0:
+                        selected_branches[a_row] = float(a_branch)
+
+            return selected_branches
+
+        selector_variable = self.add_deterministic_variable("branch", first_met_branch, self.read_variables(condition_trees))
+
+        # Branches, including the "else" one
+        branch_contents = [given_tree.children[2*a_branch + 1] for a_branch in range(0, num_branches)]
+
+        if given_tree.data != "ite_elseif":
+            branch_contents.append(given_tree.children[-1])
+
+        # Branches are chained: each branch starts from the versions left by the previous one
+        # Outside of its path a branch keeps the previous versions, so the resulting versions are correct for all the paths
+        for a_branch in range(0, len(branch_contents)):
+            branch_path = self.add_path_variable(selector_variable, float(a_branch), path_variable)
+            self.translate_block(branch_contents[a_branch], branch_path)
+
+
+
+    # Creates a new variable name
+    def new_variable_name(self, name_hint):
+
+        self.num_created_variables += 1
+
+        return "%s%s%d" % (internal_variable_prefix, name_hint, self.num_created_variables)
+
+
+
+    # Obtains the current versions of the program variables read by some expressions
+    # return ["variable", ...]
+    def read_variables(self, given_trees):
+
+        read_variables = []
+
+        for a_tree in given_trees:
+            if type(a_tree).__name__ != "Tree":
+                continue
+
+            for a_token in a_tree.scan_values(lambda v: getattr(v, "type", None) == "NAME"):
+                if (a_token.value in self.current_versions) and (self.current_versions[a_token.value] not in read_variables):
+                    read_variables.append(self.current_versions[a_token.value])
+
+        return read_variables
+
+
+
+    # Obtains a function evaluating an expression on combinations of values of the current versions
+    # The function receives [{"variable":value, ...}, ...] and returns the canonical values, None where a variable is not defined
+    # final_result (bool): Whether or not the result is a logical value (1.0 or 0.0)
+    def expression_function(self, expression_tree, final_result):
+
+        read_variables = self.read_variables([expression_tree])
+
+        # The columns are indexed by variable, but the expressions use the program tokens
+        variables_to_tokens = {self.current_versions[a_token]:a_token for a_token in self.current_versions}
+
+        def evaluate_expression(combinations):
+
+            resulting_values = [None]*len(combinations)
+
+            # Variables assigned only in some branches are undefined in the other ones
+            defined_rows = [a_row for a_row in range(0, len(combinations))
+                                if all(combinations[a_row][a_variable] != None for a_variable in read_variables)]
+
+            if defined_rows == []:
+                return resulting_values
+
+            columns = {}
+
+            for a_variable in read_variables:
+
+                column_values = [combinations[a_row][a_variable] for a_row in defined_rows]
+
+                # Qualitative values are stored as objects
+                if any(type(a_value).__name__ == "str" for a_value in column_values):
+                    columns[variables_to_tokens[a_variable]] = np.array(column_values, dtype=object)
+                else:
+                    columns[variables_to_tokens[a_variable]] = np.array(column_values, dtype=float)
+
+            expression_values = broadcast_to_rows(vectorized_evaluator(expression_tree, columns, len(defined_rows), final_result),
+                len(defined_rows))
+
+            for a_row, a_value in zip(defined_rows, expression_values):
+                resulting_values[a_row] = canonical_value(a_value)
+
+            return resulting_values
+
+        return evaluate_expression
+
+
+
+    # Obtains all the combinations of values of some variables
+    # return [{"variable":value, ...}, ...], in the same order as the table entries
+    def value_combinations(self, given_variables):
+        return [dict(zip(given_variables, some_values)) for some_values in product(*[self.domains[a_variable] for a_variable in given_variables])]
+
+
+
+    # Adds a variable which is a function of others
+    # deterministic_function (function): [{"variable":value, ...}, ...] -> [value, ...]
+    # return "variable"
+    def add_deterministic_variable(self, name_hint, deterministic_function, parent_variables):
+
+        variable_name = self.new_variable_name(name_hint)
+
+        parent_combinations = self.value_combinations(parent_variables)
+        resulting_values = deterministic_function(parent_combinations)
+
+        # Keeps the order of appearance
+        variable_domain = list(dict.fromkeys(resulting_values))
+        value_indices = {a_value:a_value_index for a_value_index, a_value in enumerate(variable_domain)}
+
+        table = np.zeros([len(self.domains[a_parent]) for a_parent in parent_variables] + [len(variable_domain)])
+        table.reshape(len(parent_combinations), len(variable_domain))[np.arange(len(parent_combinations)),
+            [value_indices[a_value] for a_value in resulting_values]] = 1.0
+
+        self.domains[variable_name] = variable_domain
+        self.factors.append(Factor(parent_variables + [variable_name], table))
+
+        return variable_name
+
+
+
+    # Adds a random variable, it takes the new values on the path and keeps the previous ones outside of it
+    # distribution_function (function): (columns, number of rows) -> [values (np.array), probabilities (np.array)], with one row per
+    #   combination of the parent variables (or a single row shared by all of them) and one column per possible value
+    def add_random_variable(self, token_name, distribution_function, parent_variables, path_variable):
+
+        variable_name = self.new_variable_name(token_name)
+
+        parent_combinations = self.value_combinations(parent_variables)
+        num_rows = len(parent_combinations)
+
+        [variable_values, variable_probabilities] = distribution_function(self.combinations_as_columns(parent_variables, parent_combinations),
+            num_rows)
+
+        num_values = max(variable_values.shape[1], variable_probabilities.shape[1])
+        variable_values = np.broadcast_to(variable_values, (num_rows, num_values))
+        variable_probabilities = np.broadcast_to(variable_probabilities, (num_rows, num_values))
+
+        canonical_values = [[canonical_value(a_value) for a_value in a_row] for a_row in variable_values]
+
+        variable_domain = list(dict.fromkeys(a_value for a_row in canonical_values for a_value in a_row))
+        value_indices = {a_value:a_value_index for a_value_index, a_value in enumerate(variable_domain)}
+
+        table = np.zeros((num_rows, len(variable_domain)))
+
+        # Repeated values add up their probabilities
+        for a_row in range(0, num_rows):
+            for a_value, a_probability in zip(canonical_values[a_row], variable_probabilities[a_row]):
+                table[a_row, value_indices[a_value]] += a_probability
+
+        self.domains[variable_name] = variable_domain
+        self.factors.append(Factor(parent_variables + [variable_name],
+            table.reshape([len(self.domains[a_parent]) for a_parent in parent_variables] + [len(variable_domain)])))
+
+        self.set_version(token_name, variable_name, path_variable)
+
+
+
+    # Transforms combinations of values into columns for the vectorized evaluator, indexed by program token
+    # Combinations with undefined values are not supported by the distributions
+    def combinations_as_columns(self, parent_variables, parent_combinations):
+
+        variables_to_tokens = {self.current_versions[a_token]:a_token for a_token in self.current_versions}
+
+        columns = {}
+
+        for a_variable in parent_variables:
+
+            column_values = [a_combination[a_variable] for a_combination in parent_combinations]
+
+            if any(a_value == None for a_value in column_values):
+                print("Variable %s not in environment" % (variables_to_tokens[a_variable], ), file=sys.stderr)
+                sys.exit(1)
+
+            if any(type(a_value).__name__ == "str" for a_value in column_values):
+                columns[variables_to_tokens[a_variable]] = np.array(column_values, dtype=object)
+            else:
+                columns[variables_to_tokens[a_variable]] = np.array(column_values, dtype=float)
+
+        return columns
+
+
+
+    # Sets the new version of a program variable, outside of the path it keeps the previous version (undefined if none)
+    def set_version(self, token_name, new_variable, path_variable):
+
+        if path_variable == None:
+            self.current_versions[token_name] = new_variable
+            return
+
+        previous_variable = self.current_versions.get(token_name, None)
+
+        if previous_variable == None:
+            selection_function = lambda combinations: [values[new_variable] if values[path_variable] == 1.0 else None
+                                                        for values in combinations]
+            parent_variables = [path_variable, new_variable]
+        else:
+            selection_function = lambda combinations: [values[new_variable] if values[path_variable] == 1.0 else values[previous_variable]
+                                                        for values in combinations]
+            parent_variables = [path_variable, new_variable, previous_variable]
+
+        self.current_versions[token_name] = self.add_deterministic_variable(token_name, selection_function, parent_variables)
+
+
+
+    # Adds a boolean variable, 1.0 when the selector has the given value (and the parent path is followed)
+    def add_path_variable(self, selector_variable, selected_value, path_variable):
+
+        if path_variable == None:
+            return self.add_deterministic_variable("path",
+                lambda combinations: [float(values[selector_variable] == selected_value) for values in combinations], [selector_variable])
+
+        return self.add_deterministic_variable("path",
+            lambda combinations: [float((values[path_variable] == 1.0) and (values[selector_variable] == selected_value)) for values in combinations],
+            [path_variable, selector_variable])
+
+
+
+    # Adds a factor which is 1 where the constraint is met (or outside of the path) and 0 otherwise
+    # constraint_function (function): [{"variable":value, ...}, ...] -> [bool, ...]
+    def add_constraint(self, constraint_function, parent_variables, path_variable):
+
+        if path_variable != None:
+            parent_variables = [path_variable] + [a_parent for a_parent in parent_variables if a_parent != path_variable]
+
+        parent_combinations = self.value_combinations(parent_variables)
+
+        constraint_values = [1.0 if ((path_variable != None) and (a_combination[path_variable] != 1.0)) or is_met else 0.0
+                                for a_combination, is_met in zip(parent_combinations, constraint_function(parent_combinations))]
+
+        self.factors.append(Factor(parent_variables, np.array(constraint_values).reshape([len(self.domains[a_parent])
+                                for a_parent in parent_variables])))
+
+
+
+    # Sums out all the variables except the output one
+    # elimination_order (str): Heuristic used to choose the next variable, see valid_elimination_orders
+    # return [factor over the output variable (Factor), intermediate factor sizes ([int, ...], one per eliminated variable)]
+    def eliminate_variables(self, elimination_order):
+
+        assert elimination_order in valid_elimination_orders, "Elimination order must be in '%s', currently is '%s'" % (
+            str(valid_elimination_orders), elimination_order)
+
+        # Factors indexed by number, in creation order, and the numbers of the factors containing each variable
+        # {factor number:Factor, ...}, {"variable":{factor number, ...}, ...}
+        remaining_factors = dict(enumerate(self.factors))
+        containing_factor_numbers = {a_variable:set() for a_variable in self.domains}
+
+        for a_factor_number, a_factor in remaining_factors.items():
+            for a_variable in a_factor.variables:
+                containing_factor_numbers[a_variable].add(a_factor_number)
+
+        # Interaction graph, variables are neighbors if they share a factor
+        # {"variable":{"neighbor variable", ...}, ...}
+        neighbors = {a_variable:set() for a_variable in self.domains}
+
+        for a_factor in remaining_factors.values():
+            for a_variable in a_factor.variables:
+                neighbors[a_variable] |= set(a_factor.variables)
+                neighbors[a_variable].discard(a_variable)
+
+        # Variables are considered in creation order when tied
+        # {"variable":creation position, ...}
+        variable_positions = {a_variable:a_position for a_position, a_variable in enumerate(a_variable for a_variable in self.domains
+                                if a_variable != self.output_variable)}
+
+        # Costs are kept in a heap, only recalculated for the variables whose neighbors change, outdated entries are skipped
+        # [(cost, creation position, "variable"), ...], {"variable":cost, ...}
+        current_costs = {a_variable:elimination_cost(a_variable, neighbors, elimination_order) for a_variable in variable_positions}
+        cost_heap = [(a_cost, variable_positions[a_variable], a_variable) for a_variable, a_cost in current_costs.items()]
+        heapq.heapify(cost_heap)
+
+        intermediate_factor_sizes = []
+
+        while current_costs != {}:
+
+            [next_cost, _, next_variable] = heapq.heappop(cost_heap)
+
+            if current_costs.get(next_variable, None) != next_cost:
+                continue
+
+            del current_costs[next_variable]
+
+            # Multiplies all the factors containing the variable, and sums it out
+            multiplied_factor_numbers = containing_factor_numbers.pop(next_variable)
+            containing_factors = [remaining_factors.pop(a_factor_number) for a_factor_number in sorted(multiplied_factor_numbers)]
+
+            for a_factor in containing_factors:
+                for a_variable in a_factor.variables:
+                    if a_variable != next_variable:
+                        containing_factor_numbers[a_variable] -= multiplied_factor_numbers
+
+            multiplied_factor = multiply_factors(containing_factors)
+            intermediate_factor_sizes.append(multiplied_factor.size())
+
+            summed_out_factor = multiplied_factor.sum_out(next_variable)
+            summed_out_factor_number = len(self.factors) + len(intermediate_factor_sizes)
+            remaining_factors[summed_out_factor_number] = summed_out_factor
+
+            for a_variable in summed_out_factor.variables:
+                containing_factor_numbers[a_variable].add(summed_out_factor_number)
+
+            # Its neighbors become connected between them
+            # The cost only changes for its neighbors, and the fill also for the neighbors of the variables with new edges
+            changed_variables = set(neighbors[next_variable])
+
+            for a_neighbor in neighbors[next_variable]:
+
+                previous_num_neighbors = len(neighbors[a_neighbor])
+
+                neighbors[a_neighbor] |= neighbors[next_variable]
+                neighbors[a_neighbor].discard(a_neighbor)
+                neighbors[a_neighbor].discard(next_variable)
+
+                if (elimination_order == "min-fill") and (len(neighbors[a_neighbor]) >= previous_num_neighbors):
+                    changed_variables |= neighbors[a_neighbor]
+
+            del neighbors[next_variable]
+
+            for a_variable in changed_variables:
+                if a_variable in current_costs:
+                    current_costs[a_variable] = elimination_cost(a_variable, neighbors, elimination_order)
+                    heapq.heappush(cost_heap, (current_costs[a_variable], variable_positions[a_variable], a_variable))
+
+        return [multiply_factors(list(remaining_factors.values())), intermediate_factor_sizes]
+
+
+
+    # Obtains the exact probability by variable elimination
+    # Prints the final results
+    # return intermediate factor sizes ([int, ...], one per eliminated variable)
+    def infer_by_variable_elimination(self, elimination_order="min-fill"):
+
+        [output_factor, intermediate_factor_sizes] = self.eliminate_variables(elimination_order)
+
+        # The remaining factor only contains the output variable
+        output_probabilities = output_factor.expanded_table([self.output_variable]).ravel()
+
+        Pr_meets_observes = np.sum(output_probabilities)
+        Pr_meets_output_and_observes = sum(a_probability for a_value, a_probability in zip(self.domains[self.output_variable], output_probabilities)
+                                            if a_value == 1.0)
+
+        if (Pr_meets_output_and_observes == 0) and (Pr_meets_observes == 0):
+            print(0)
+        else:
+            print("%.4f" % (Pr_meets_output_and_observes/Pr_meets_observes))
+
+        return intermediate_factor_sizes
+
+
+
+# Cost of eliminating a variable
+# min-degree: number of neighbors
+# min-fill: number of edges added between its neighbors
+def elimination_cost(given_variable, neighbors, elimination_order):
+
+    variable_neighbors = neighbors[given_variable]
+
+    if elimination_order == "min-degree":
+        return len(variable_neighbors)
+
+    # Pairs of neighbors minus the edges between them, each edge is counted from both ends
+    # The intersection is iterated over the smaller set, so variables with many neighbors are not traversed for each of them
+    num_neighbors = len(variable_neighbors)
+    num_edge_ends = sum(len(variable_neighbors & neighbors[a_neighbor]) for a_neighbor in variable_neighbors)
+
+    return (num_neighbors*(num_neighbors - 1) - num_edge_ends)//2
@@ -0,0 +1,352 @@
+"""
+SUMMARY
+
+Implements forward sampling without a circuit: the program is executed statement by statement on one trace at a time, each
+random variable takes a single value selected according to its probability, and observations are checked as soon as they are
+reached (a trace which does not meet one is rejected right away).
+Only the variables of the current trace are stored, so the memory used does not depend on the width of the circuit.
+
+The program is compiled once into a list of steps (functions), "if" statements keep the steps of each branch.
+The values of a random variable (discrete values or discretized intervals) are only created the first time a trace needs them
+with a given set of parameters, and reused afterwards.
+Programs where a marginalization changes the value of a variable read afterwards are rejected (each group of traces would keep
+the values of its first trace for the variables not listed), since a single trace cannot know which trace comes first.
+"""
+
+
+from bisect import bisect_right
+from copy import copy
+import sys
+
+from .inference_circuit import parscon_to_con, parsdisc_to_disc, parsnumcon_to_con
+from .inference_sampling import DEADEND_OUTCOME, MEETS_OBSERVES_OUTCOME, MEETS_OUTPUT_OUTCOME, obtain_random_generator
+from .sentence_evaluation import compile_logical_evaluator
+from .variable.continuous import generate_discretized_continuous_distribution, generate_discretized_continuous_distribution_from_n
+from .variable.discrete import discrete_creator, generate_bernoulli
+from .variable.logical_variables import logical_value
+from parser.independence import marginalization_changes_read_variables
+
+
+
+# Statements which require all the traces at once
+unsupported_statements = ["print", "print_combined", "show_circuit", "wlsr"]
+
+
+# Statements creating a random variable
+random_variable_statements = ["flip", "bern"] + list(parsdisc_to_disc) + list(parscon_to_con) + list(parsnumcon_to_con)
+
+
+# Maximum number of distinct variable value sets kept, the cache is emptied once exceeded
+max_cached_distributions = 10000
+
+
+
+# Selects the location of a value according to the cumulative probabilities of all the values
+# If all values have probability zero, the first one is always selected
+def select_value_location(cumulative_probabilities, random_generator):
+    return min(bisect_right(cumulative_probabilities, random_generator.random()*cumulative_probabilities[-1]), len(cumulative_probabilities) - 1)
+
+
+
+# Executes steps on a trace, stopping as soon as one of them rejects it
+# return True if the trace meets all the observations within the steps, False otherwise
+def run_steps(given_steps, environment, random_generator):
+
+    for a_step in given_steps:
+        if not a_step(environment, random_generator):
+            return False
+
+    return True
+
+
+
+# Program compiled into steps, sampled one trace at a time
+class Forward_sampler(object):
+
+    # Shown when a program cannot be sampled
+    method_name = "forward sampling"
+
+    def __init__(self, given_instructions_tree, given_output_tree):
+
+        # Enumeration keeps the values of the first trace of each marginalized group, which a single trace cannot reproduce
+        if marginalization_changes_read_variables(given_instructions_tree, given_output_tree):
+            print("Marginalizations keeping the first value of a variable read afterwards are not supported by %s, "
+                "use 'enumerate' instead" % (self.method_name, ), file=sys.stderr)
+            sys.exit(1)
+
+        # Possible values of random variables, with their cumulative probabilities
+        # {(statement kind, variable name, parameters, ...):[[variable, ...], [cumulative probability (float), ...]], ...}
+        self.distribution_cache = {}
+
+        self.program_steps = self.compile_program(given_instructions_tree)
+        self.output_evaluator = compile_logical_evaluator(given_output_tree, True, False)
+
+
+
+    # Obtains the possible values of a random variable, created the first time they are requested
+    # value_generator (function: () -> [variable, ...])
+    # return [[variable, ...], [cumulative probability (float), ...]]
+    def obtain_distribution(self, distribution_key, value_generator):
+
+        if distribution_key in self.distribution_cache:
+            return self.distribution_cache[distribution_key]
+
+        if len(self.distribution_cache) >= max_cached_distributions:
+            self.distribution_cache = {}
+
+        possible_values = value_generator()
+
+        cumulative_probabilities = []
+        combined_probability = 0
+
+        for a_value in possible_values:
+            combined_probability += a_value.probability
+            cumulative_probabilities.append(combined_probability)
+
+        self.distribution_cache[distribution_key] = [possible_values, cumulative_probabilities]
+
+        return self.distribution_cache[distribution_key]
+
+
+
+    # Compiles a random variable statement into a step, which assigns one of its values selected according to its probability
+    # distribution_key_function (function: environment -> hashable key)
+    # value_generator_function (function: key -> [variable, ...])
+    # return step (function: (environment, random generator) -> True)
+    def random_variable_step(self, variable_name, distribution_key_function, value_generator_function):
+
+        def assign_random_value(environment, random_generator):
+
+            a_key = distribution_key_function(environment)
+            [possible_values, cumulative_probabilities] = self.obtain_distribution(a_key, lambda: value_generator_function(a_key))
+
+            environment[variable_name] = possible_values[select_value_location(cumulative_probabilities, random_generator)]
+
+            return True
+
+        return assign_random_value
+
+
+
+    # Compiles the whole program, see compile_block
+    def compile_program(self, given_instructions_tree):
+        return self.compile_block(given_instructions_tree)
+
+
+
+    # Compiles an observation or a rejection into a step, which rejects the trace unless the statement is met
+    def observation_step(self, observation_tree):
+
+        observation_evaluator = compile_logical_evaluator(observation_tree.children[0], True)
+
+        # Rejections are the opposite of observations
+        if observation_tree.data == "observe":
+            return lambda environment, _random_generator: logical_value.TRUE == observation_evaluator(environment)
+
+        return lambda environment, _random_generator: logical_value.FALSE == observation_evaluator(environment)
+
+
+
+    # Obtains how the values of a random variable statement are created
+    # present_tree (lark Tree): One of random_variable_statements
+    # return [variable name (str), distribution key function, value generator function] (see random_variable_step)
+    def compile_random_variable(self, present_tree):
+
+        data_from_tree = present_tree.data
+
+        if data_from_tree == "flip":
+
+            token_name = present_tree.children[0].value
+            flip_probability = float(present_tree.children[1].value)
+
+            return [token_name, lambda _environment: ("flip", flip_probability), lambda a_key: generate_bernoulli(token_name, a_key[1])]
+
+        if data_from_tree == "bern":
+
+            token_name = present_tree.children[0].value
+            probability_evaluator = compile_logical_evaluator(present_tree.children[1], final_result=False, numeric_final_result=True)
+
+            return [token_name, lambda environment: ("bern", probability_evaluator(environment)),
+                    lambda a_key: generate_bernoulli(token_name, a_key[1])]
+
+        variable_name = present_tree.children[0].value
+        parameter_evaluators = [compile_logical_evaluator(a_parameter, final_result=False, numeric_final_result=True)
+                                    for a_parameter in present_tree.children[1:]]
+
+        distribution_key_function = lambda environment: (data_from_tree, tuple(ev(environment) for ev in parameter_evaluators))
+
+        # Values and odds alternate in the parameters
+        if data_from_tree in parsdisc_to_disc:
+            value_generator = lambda a_key: discrete_creator(parsdisc_to_disc[a_key[0]], variable_name, list(a_key[1][0::2]), list(a_key[1][1::2]))
+        elif data_from_tree in parscon_to_con:
+            value_generator = lambda a_key: generate_discretized_continuous_distribution(variable_name, parscon_to_con[a_key[0]], list(a_key[1]))
+        else:
+            value_generator = lambda a_key: generate_discretized_continuous_distribution_from_n(variable_name, parsnumcon_to_con[a_key[0]],
+                                                                                                    list(a_key[1]))
+
+        return [variable_name, distribution_key_function, value_generator]
+
+
+
+    # Compiles the statements within a tree into steps, in order
+    # return [step (function: (environment, random generator) -> bool, False if the trace is rejected), ...]
+    def compile_block(self, contained_tree):
+
+        compiled_steps = []
+
+        trees_to_be_explored = list(reversed(contained_tree.children))
+
+        while trees_to_be_explored != []:
+
+            present_tree = trees_to_be_explored.pop()
+
+            # Do nothing if not a tree
+            if type(present_tree).__name__ != "Tree":
+                continue
+
+            data_from_tree = present_tree.data
+
+            if data_from_tree in unsupported_statements:
+                print("'%s' statements are not supported when sampling one trace at a time, use 'rejection' instead" % (data_from_tree, ),
+                    file=sys.stderr)
+                sys.exit(1)
+
+            elif data_from_tree in ["observe", "reject"]:
+                compiled_steps.append(self.observation_step(present_tree))
+
+            # A single trace is not changed by marginalization, programs where it would change a variable read afterwards are rejected
+            elif data_from_tree == "marg":
+                continue
+
+            # Eliminated variables are no longer stored
+            elif data_from_tree == "elimvar":
+                compiled_steps.append(self.elimination_step([a_child_token.value for a_child_token in present_tree.children]))
+
+            elif data_from_tree in ["ite", "ite_elseif", "ite_complete"]:
+                compiled_steps.append(self.conditional_step(present_tree))
+
+            elif data_from_tree in random_variable_statements:
+                compiled_steps.append(self.random_variable_step(*self.compile_random_variable(present_tree)))
+
+            elif data_from_tree == "assgn":
+                compiled_steps.append(self.assignment_step(present_tree.children[0].value, present_tree.children[1]))
+
+            # Otherwise, find the children trees and explore them
+            else:
+                trees_to_be_explored.extend(reversed(present_tree.children))
+
+        return compiled_steps
+
+
+
+    # Compiles the elimination of variables into a step
+    def elimination_step(self, eliminated_names):
+
+        def eliminate_variables(environment, _random_generator):
+
+            for a_name in eliminated_names:
+                environment.pop(a_name, None)
+
+            return True
+
+        return eliminate_variables
+
+
+
+    # Compiles an assignment into a step
+    def assignment_step(self, token_name, operation_tree):
+
+        operation_evaluator = compile_logical_evaluator(operation_tree, final_result=False, numeric_final_result=False)
+
+        def assign_value(environment, _random_generator):
+
+            assigned_variable = operation_evaluator(environment)
+
+            # Renamed copy, the same as circuit variable nodes
+            if assigned_variable.variable_name != token_name:
+                assigned_variable = copy(assigned_variable)
+                assigned_variable.variable_name = token_name
+
+            environment[token_name] = assigned_variable
+
+            return True
+
+        return assign_value
+
+
+
+    # Compiles an "if" statement into a step, the first branch whose condition is met is executed
+    # Statements without "else" keep the trace as it is if no condition is met
+    def conditional_step(self, conditional_tree):
+
+        if conditional_tree.data == "ite":
+            num_branches = 1
+        elif conditional_tree.data == "ite_elseif":
+            num_branches = len(conditional_tree.children)//2
+        else:
+            num_branches = (len(conditional_tree.children) - 1)//2
+
+        # [[condition evaluator, [step, ...]], ...]
+        compiled_branches = [[compile_logical_evaluator(conditional_tree.children[2*a_branch], True, False),
+                                self.compile_block(conditional_tree.children[2*a_branch + 1])] for a_branch in range(0, num_branches)]
+
+        if conditional_tree.data == "ite_elseif":
+            else_steps = []
+        else:
+            else_steps = self.compile_block(conditional_tree.children[-1])
+
+        def execute_branch(environment, random_generator):
+
+            for condition_evaluator, branch_steps in compiled_branches:
+                if logical_value.TRUE == condition_evaluator(environment):
+                    return run_steps(branch_steps, environment, random_generator)
+
+            return run_steps(else_steps, environment, random_generator)
+
+        return execute_branch
+
+
+
+    # Samples one trace
+    # return DEADEND_OUTCOME, MEETS_OBSERVES_OUTCOME, or MEETS_OUTPUT_OUTCOME (see inference_sampling)
+    def sample_trace(self, random_generator):
+
+        # {"variable token":variable_value, ...}
+        environment = {}
+
+        if not run_steps(self.program_steps, environment, random_generator):
+            return DEADEND_OUTCOME
+
+        if logical_value.TRUE == self.output_evaluator(environment):
+            return MEETS_OUTPUT_OUTCOME
+
+        return MEETS_OBSERVES_OUTCOME
+
+
+
+    # Samples traces one after the other, with the same interface as Batch_sampler (see inference_sampling.adaptive_sampling)
+    # random_generator (np.random.Generator): A new one with the default seed is created if None
+    # sampling_mode (str): Only "rejection" is available
+    # uniform_sequence (str): Only "random" is available, traces do not share a number of levels
+    # return [number of samples meeting the output and the observations (int), number of samples meeting the observations (int)]
+    def rejection_counts(self, num_samples, random_generator=None, sampling_mode="rejection", uniform_sequence="random"):
+
+        assert sampling_mode == "rejection", "Forward sampling only implements rejection sampling, '%s' was requested" % (sampling_mode, )
+        assert uniform_sequence == "random", "Forward sampling only draws independent variates, '%s' was requested" % (uniform_sequence, )
+
+        random_generator = obtain_random_generator(random_generator)
+
+        valid_output_observes = 0
+        valid_observes = 0
+
+        for a_sample in range(0, num_samples):
+
+            sample_outcome = self.sample_trace(random_generator)
+
+            if sample_outcome != DEADEND_OUTCOME:
+                valid_observes += 1
+
+                if sample_outcome == MEETS_OUTPUT_OUTCOME:
+                    valid_output_observes += 1
+
+        return [valid_output_observes, valid_observes]
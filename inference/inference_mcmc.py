@@ -0,0 +1,378 @@
+"""
+SUMMARY
+
+Implements Metropolis-Hastings over program traces, without a circuit (lightweight Metropolis-Hastings, based on
+http://proceedings.mlr.press/v15/wingate11a/wingate11a.pdf).
+A trace holds the random choices of one execution of the program: the value selected for each random variable statement reached.
+Each step changes a single choice, selected uniformly among the ones of the current trace, to a value drawn from its own
+distribution, and executes the program again from that statement only. The following choices keep their value (the same
+location within their values) when their statement is reached again with the same number of values, otherwise a new value is
+drawn. The new trace is rejected right away if it does not meet an observation, and accepted otherwise with probability
+    min(1, (choices in the current trace)/(choices in the new trace)*Π Pr(kept value, new trace)/Pr(kept value, current trace))
+
+The program is compiled into a flat list of instructions ("if" statements jump over the branches not taken), so that execution
+can continue from any statement given the environment before it, which every choice stores.
+
+Chains start from a trace meeting the observations (see Metropolis_hastings_sampler.initial_trace). The first steps of each chain are
+discarded (burn-in), and only one step out of every few is kept as a sample (thinning). The effective sample size of each chain is
+estimated from the autocorrelation of its samples (Geyer's initial monotone sequence), at most its number of samples, and a
+single sample for chains whose result never changes.
+"""
+
+
+import math
+import sys
+
+import numpy as np
+
+from .inference_forward import Forward_sampler, random_variable_statements, select_value_location, unsupported_statements
+from .inference_sampling import default_num_samples, sampling_seed, Sampled_estimate
+from .sentence_evaluation import compile_logical_evaluator
+from .variable.logical_variables import logical_value
+
+
+
+# Defaults when not requested
+default_burn_in = 500
+default_thinning = 1
+default_num_chains = 4
+
+
+# Maximum number of executions to find the first trace of a chain
+max_initial_attempts = 100000
+
+
+# Instruction kinds
+# ["choice", variable name, distribution key function, value generator function] (see inference_forward.random_variable_step)
+# ["step", step function] (see inference_forward.run_steps)
+# ["branch", [[condition evaluator, instruction location], ...], instruction location if no condition is met]
+# ["jump", instruction location]
+CHOICE_INSTRUCTION = "choice"
+STEP_INSTRUCTION   = "step"
+BRANCH_INSTRUCTION = "branch"
+JUMP_INSTRUCTION   = "jump"
+
+
+
+# Estimates the effective sample size of the samples of a chain, from their autocorrelation (Geyer's initial monotone sequence)
+# Chains whose samples never change are not known to have mixed, so they count as a single sample
+# Antithetic chains (negative autocorrelations) do not count as more samples than they have
+# given_samples (np.array)
+def effective_sample_size(given_samples):
+
+    num_samples = len(given_samples)
+    centered_samples = given_samples - np.mean(given_samples)
+
+    if num_samples < 2:
+        return float(num_samples)
+
+    if not np.any(centered_samples):
+        return 1.0
+
+    # Autocorrelation of every lag, computed with the FFT (zero padded, so that it does not wrap around)
+    sample_transform = np.fft.rfft(centered_samples, 2*num_samples)
+    autocorrelation = np.fft.irfft(sample_transform*np.conj(sample_transform))[0:num_samples]
+    autocorrelation = autocorrelation/autocorrelation[0]
+
+    # Sums of consecutive pairs of lags, kept while positive and made non-increasing
+    integrated_time = -1
+    previous_pair = math.inf
+
+    for a_lag in range(0, num_samples - 1, 2):
+
+        a_pair = min(autocorrelation[a_lag] + autocorrelation[a_lag + 1], previous_pair)
+
+        if a_pair <= 0:
+            break
+
+        integrated_time += 2*a_pair
+        previous_pair = a_pair
+
+    return float(min(num_samples/max(integrated_time, 1e-12), num_samples))
+
+
+
+# Program compiled into instructions, sampled by changing one choice of a trace at a time
+class Metropolis_hastings_sampler(Forward_sampler):
+
+    # Shown when a program cannot be sampled, marginalizations are checked by Forward_sampler
+    method_name = "Metropolis-Hastings"
+
+    # Compiles the whole program into a flat list of instructions
+    # return [instruction, ...]
+    def compile_program(self, given_instructions_tree):
+
+        compiled_instructions = []
+        self.compile_instructions(given_instructions_tree, compiled_instructions)
+
+        return compiled_instructions
+
+
+
+    # Compiles the statements within a tree, adding their instructions at the end of a list
+    def compile_instructions(self, contained_tree, compiled_instructions):
+
+        trees_to_be_explored = list(reversed(contained_tree.children))
+
+        while trees_to_be_explored != []:
+
+            present_tree = trees_to_be_explored.pop()
+
+            # Do nothing if not a tree
+            if type(present_tree).__name__ != "Tree":
+                continue
+
+            data_from_tree = present_tree.data
+
+            if data_from_tree in unsupported_statements:
+                print("'%s' statements are not supported when sampling one trace at a time, use 'rejection' instead" % (data_from_tree, ),
+                    file=sys.stderr)
+                sys.exit(1)
+
+            elif data_from_tree in ["observe", "reject"]:
+                compiled_instructions.append([STEP_INSTRUCTION, self.observation_step(present_tree)])
+
+            # A single trace is not changed by marginalization, programs where it would change a variable read afterwards are rejected
+            elif data_from_tree == "marg":
+                continue
+
+            elif data_from_tree == "elimvar":
+                compiled_instructions.append([STEP_INSTRUCTION, self.elimination_step([a_child_token.value for a_child_token in present_tree.children])])
+
+            elif data_from_tree in ["ite", "ite_elseif", "ite_complete"]:
+                self.compile_conditional(present_tree, compiled_instructions)
+
+            elif data_from_tree in random_variable_statements:
+                compiled_instructions.append([CHOICE_INSTRUCTION] + self.compile_random_variable(present_tree))
+
+            elif data_from_tree == "assgn":
+                compiled_instructions.append([STEP_INSTRUCTION, self.assignment_step(present_tree.children[0].value, present_tree.children[1])])
+
+            # Otherwise, find the children trees and explore them
+            else:
+                trees_to_be_explored.extend(reversed(present_tree.children))
+
+
+
+    # Compiles an "if" statement, a branch instruction followed by the instructions of each branch
+    # Each branch ends with a jump after the whole statement, statements without "else" continue after it if no condition is met
+    def compile_conditional(self, conditional_tree, compiled_instructions):
+
+        if conditional_tree.data == "ite":
+            num_branches = 1
+        elif conditional_tree.data == "ite_elseif":
+            num_branches = len(conditional_tree.children)//2
+        else:
+            num_branches = (len(conditional_tree.children) - 1)//2
+
+        branch_instruction = [BRANCH_INSTRUCTION, [], None]
+        compiled_instructions.append(branch_instruction)
+
+        branch_end_jumps = []
+
+        for a_branch in range(0, num_branches):
+
+            branch_instruction[1].append([compile_logical_evaluator(conditional_tree.children[2*a_branch], True, False), len(compiled_instructions)])
+            self.compile_instructions(conditional_tree.children[2*a_branch + 1], compiled_instructions)
+
+            branch_end_jumps.append([JUMP_INSTRUCTION, None])
+            compiled_instructions.append(branch_end_jumps[-1])
+
+        branch_instruction[2] = len(compiled_instructions)
+
+        if conditional_tree.data != "ite_elseif":
+            self.compile_instructions(conditional_tree.children[-1], compiled_instructions)
+
+        for a_jump in branch_end_jumps:
+            a_jump[1] = len(compiled_instructions)
+
+
+
+    # Executes the program from an instruction until the end
+    # environment {"variable token":variable_value, ...}: Environment before the first instruction, modified in place
+    # kept_choices {instruction location:choice, ...}: Choices whose value is kept if their instruction is reached again with
+    # the same number of values, a new value is drawn for the other ones
+    # A choice is [value location (int), log probability (float), environment before it (dict), number of values (int)]
+    # return [{instruction location:choice, ...} of the executed instructions, sum of the log probability ratios (new/previous)
+    # of the kept choices, None if the trace does not meet an observation (the choices are then the ones made until it)]
+    def execute_from(self, first_instruction, environment, random_generator, kept_choices={}):
+
+        executed_choices = {}
+        kept_log_ratio = 0
+
+        present_instruction = first_instruction
+
+        while present_instruction < len(self.program_steps):
+
+            an_instruction = self.program_steps[present_instruction]
+
+            if an_instruction[0] == CHOICE_INSTRUCTION:
+
+                [_kind, variable_name, distribution_key_function, value_generator_function] = an_instruction
+
+                a_key = distribution_key_function(environment)
+                [possible_values, cumulative_probabilities] = self.obtain_distribution(a_key, lambda: value_generator_function(a_key))
+
+                if (present_instruction in kept_choices) and (kept_choices[present_instruction][3] == len(possible_values)):
+                    value_location = kept_choices[present_instruction][0]
+                else:
+                    value_location = select_value_location(cumulative_probabilities, random_generator)
+
+                value_probability = possible_values[value_location].probability/cumulative_probabilities[-1] if cumulative_probabilities[-1] > 0 else 0
+                log_probability = math.log(value_probability) if value_probability > 0 else -math.inf
+
+                if (present_instruction in kept_choices) and (kept_choices[present_instruction][3] == len(possible_values)):
+                    kept_log_ratio += log_probability - kept_choices[present_instruction][1]
+
+                executed_choices[present_instruction] = [value_location, log_probability, dict(environment), len(possible_values)]
+                environment[variable_name] = possible_values[value_location]
+
+                present_instruction += 1
+
+            elif an_instruction[0] == STEP_INSTRUCTION:
+
+                if not an_instruction[1](environment, random_generator):
+                    return [executed_choices, None]
+
+                present_instruction += 1
+
+            elif an_instruction[0] == BRANCH_INSTRUCTION:
+
+                present_instruction = an_instruction[2]
+
+                for condition_evaluator, branch_start in an_instruction[1]:
+                    if logical_value.TRUE == condition_evaluator(environment):
+                        present_instruction = branch_start
+                        break
+
+            else:
+                present_instruction = an_instruction[1]
+
+        return [executed_choices, kept_log_ratio]
+
+
+
+    # Finds a first trace meeting the observations, executing the program forward
+    # Whenever an observation is not met, execution continues again from one of the last choices made (with a new value): the
+    # last one half of the time, the one before it a quarter of the time, and so on
+    # return [{instruction location:choice, ...}, environment at the end (dict)]
+    def initial_trace(self, random_generator):
+
+        first_instruction = 0
+        environment = {}
+        previous_choices = {}
+
+        for an_attempt in range(0, max_initial_attempts):
+
+            [executed_choices, kept_log_ratio] = self.execute_from(first_instruction, environment, random_generator)
+
+            reached_choices = dict(previous_choices)
+            reached_choices.update(executed_choices)
+
+            if kept_log_ratio != None:
+                return [reached_choices, environment]
+
+            if len(reached_choices) == 0:
+                continue
+
+            choice_locations = list(reached_choices)
+            first_instruction = choice_locations[-min(int(random_generator.geometric(0.5)), len(choice_locations))]
+
+            environment = dict(reached_choices[first_instruction][2])
+            previous_choices = {a_location:reached_choices[a_location] for a_location in choice_locations if a_location < first_instruction}
+
+        print("No trace meeting the observations was found after %d executions" % (max_initial_attempts, ), file=sys.stderr)
+        sys.exit(1)
+
+
+
+    # Runs a chain
+    # num_samples (int): Samples kept after the burn-in
+    # burn_in (int): Steps discarded at the start
+    # thinning (int): One step out of every this many is kept
+    # return [np.array of the kept samples (1 if they meet the return statement, 0 otherwise), accepted steps (int), steps (int)]
+    def run_chain(self, num_samples, burn_in, thinning, random_generator):
+
+        [current_choices, current_environment] = self.initial_trace(random_generator)
+        meets_output = logical_value.TRUE == self.output_evaluator(current_environment)
+
+        kept_samples = np.zeros(num_samples, dtype=np.int8)
+        accepted_steps = 0
+        num_steps = burn_in + num_samples*thinning
+
+        for a_step in range(0, num_steps):
+
+            # Programs without random choices never change
+            if len(current_choices) > 0:
+
+                # Choices are stored in execution order, which is also the order of their instructions
+                choice_locations = list(current_choices)
+                changed_location = choice_locations[int(random_generator.integers(len(choice_locations)))]
+
+                environment = dict(current_choices[changed_location][2])
+                kept_choices = {a_location:current_choices[a_location] for a_location in choice_locations if a_location > changed_location}
+
+                [executed_choices, kept_log_ratio] = self.execute_from(changed_location, environment, random_generator, kept_choices)
+
+                if kept_log_ratio != None:
+
+                    proposed_choices = {a_location:current_choices[a_location] for a_location in choice_locations if a_location < changed_location}
+                    proposed_choices.update(executed_choices)
+
+                    log_acceptance = kept_log_ratio + math.log(len(current_choices)) - math.log(len(proposed_choices))
+
+                    if math.log(1 - random_generator.random()) < log_acceptance:
+                        current_choices = proposed_choices
+                        meets_output = logical_value.TRUE == self.output_evaluator(environment)
+                        accepted_steps += 1
+
+            if (a_step >= burn_in) and ((a_step - burn_in) % thinning == thinning - 1):
+                kept_samples[(a_step - burn_in)//thinning] = meets_output
+
+        return [kept_samples, accepted_steps, num_steps]
+
+
+
+# Runs Metropolis-Hastings chains on independent programs, each chain with its own random stream spawned from the seed
+# given_samplers [Metropolis_hastings_sampler, ...]
+# num_samples, burn_in, thinning, num_chains (int): Per chain (see Metropolis_hastings_sampler.run_chain), defaults if None
+# The sums of each chain are given in terms of its effective sample size, so that the estimate and its confidence interval
+# use it (see Sampled_estimate)
+# return [Sampled_estimate, accepted steps (int), steps (int)]
+def metropolis_hastings(given_samplers, num_samples=None, burn_in=None, thinning=None, num_chains=None, seed=sampling_seed):
+
+    num_samples = default_num_samples if num_samples == None else num_samples
+    burn_in = default_burn_in if burn_in == None else burn_in
+    thinning = default_thinning if thinning == None else thinning
+    num_chains = default_num_chains if num_chains == None else num_chains
+
+    sampled_estimate = Sampled_estimate(len(given_samplers), weighted=True)
+
+    accepted_steps = 0
+    num_steps = 0
+    num_constant_chains = 0
+
+    chain_seed_sequences = np.random.SeedSequence(seed).spawn(len(given_samplers)*num_chains)
+
+    for a_circuit_index, a_sampler in enumerate(given_samplers):
+        for a_chain in range(0, num_chains):
+
+            random_generator = np.random.default_rng(chain_seed_sequences[a_circuit_index*num_chains + a_chain])
+
+            [kept_samples, chain_accepted_steps, chain_steps] = a_sampler.run_chain(num_samples, burn_in, thinning, random_generator)
+            chain_effective_size = effective_sample_size(kept_samples.astype(np.float64))
+
+            if (num_samples > 1) and np.all(kept_samples == kept_samples[0]):
+                num_constant_chains += 1
+
+            sampled_estimate.add_counts(a_circuit_index, num_samples, [float(np.mean(kept_samples))*chain_effective_size, chain_effective_size,
+                                                                        chain_effective_size])
+
+            accepted_steps += chain_accepted_steps
+            num_steps += chain_steps
+
+    if num_constant_chains > 0:
+        print("%d of %d chains kept the same result in all their samples, each one counts as a single sample (they may not have mixed, "
+            "try a longer burn-in or more samples)" % (num_constant_chains, len(given_samplers)*num_chains), file=sys.stderr)
+
+    return [sampled_estimate, accepted_steps, num_steps]
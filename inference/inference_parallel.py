@@ -0,0 +1,168 @@
+"""
+SUMMARY
+
+Builds the circuit of a program in multiple processes, designed for enumeration.
+The program is followed one statement at a time in this process until the frontier (the nodes at the bottom of the circuit) has
+enough nodes to be split among the workers. The frontier is then split into contiguous parts, each one built by a worker process
+until the next marginalization or variable elimination joins the traces, or until the end of the program. Workers are forked, so
+that they inherit the circuit above their part of the frontier.
+
+Workers reaching the end of the program only send back their probability sums. Workers reaching a join send back their joined
+frontier instead (the environment and the chain probability of each node), which is compact. Nodes of different workers may hold
+the same values, so the received frontier is joined again in this process and followed as before.
+Parts are kept in program order, so the first node of each joined group (whose environment is kept) is the same one as when the
+circuit is built in a single process.
+"""
+
+
+import multiprocessing
+
+from lark import Tree
+
+from parser.liveness import circuit_inspection_statements, flatten_statements
+from .aux_inference import available_num_workers, receive_from_worker
+from .inference_circuit import Circuit, Circuit_node_frontier
+
+
+
+# Statements joining traces, the workers stop after them
+joining_statements = ["marg", "elimvar"]
+
+
+# Statements needing the whole frontier at once, programs containing them are built in a single process
+whole_frontier_statements = circuit_inspection_statements + ["wlsr"]
+
+
+# The frontier is only split once it has at least this many nodes per worker, smaller frontiers are faster to build than to fork
+min_nodes_per_worker = 64
+
+
+
+# Runs in a worker process, builds a part of the frontier and sends the result through its connection
+# frontier_nodes [Circuit node, ...]
+# given_statements [statement tree, ...]
+# reaches_end (bool): Whether or not the statements reach the end of the program
+# Also sends the number of nodes merged by the worker
+def frontier_worker(worker_connection, frontier_circuit, frontier_nodes, given_statements, reaches_end):
+
+    inherited_merged_nodes = frontier_circuit.num_merged_nodes
+    bottom_nodes = frontier_circuit.build_statements(frontier_nodes, given_statements)
+
+    if reaches_end:
+        frontier_circuit.bottom_nodes = bottom_nodes
+        worker_result = frontier_circuit.enumeration_probabilities()
+    else:
+        worker_result = [[a_node.obtain_chain_environment_vars_only(), a_node.chain_probability] for a_node in bottom_nodes]
+
+    worker_connection.send([worker_result, frontier_circuit.num_merged_nodes - inherited_merged_nodes])
+
+    worker_connection.close()
+
+
+
+# Enumeration with the circuit built by multiple processes, with the same interface as Circuit (enumeration only)
+class Parallel_enumeration(object):
+
+    # num_workers (int): Number of processes building the circuit at the same time
+    # merge_equivalent_nodes (bool): See Circuit
+    def __init__(self, given_instructions_tree, given_output_tree, num_workers, merge_equivalent_nodes=False):
+
+        self.num_workers = available_num_workers(num_workers)
+
+        # Circuit of the empty program, its ground node is the top of the frontier
+        self.frontier_circuit = Circuit(Tree("s", []), given_output_tree, merge_equivalent_nodes=merge_equivalent_nodes)
+
+        statements = flatten_statements(given_instructions_tree)
+
+        if any(True for _tree in given_instructions_tree.find_pred(lambda t: t.data in whole_frontier_statements)):
+            self.num_workers = 1
+
+        # [probability of meeting the output and the observations (float), probability of meeting the observations (float)]
+        self.probabilities = None
+
+        # Number of nodes merged into others, in this process and in the workers (see Circuit)
+        self.num_merged_nodes = 0
+
+        frontier_nodes = [self.frontier_circuit.ground_node]
+        next_statement = 0
+
+        while next_statement < len(statements):
+
+            if (self.num_workers == 1) or (len(frontier_nodes) < min_nodes_per_worker*self.num_workers):
+                frontier_nodes = self.frontier_circuit.build_statements(frontier_nodes, [statements[next_statement]])
+                next_statement += 1
+                continue
+
+            # Workers build up to the next join, included
+            join_statement = next_statement
+
+            while (join_statement < len(statements) - 1) and (statements[join_statement].data not in joining_statements):
+                join_statement += 1
+
+            reaches_end = join_statement == len(statements) - 1
+
+            worker_results = self.build_in_workers(frontier_nodes, statements[next_statement:join_statement + 1], reaches_end)
+
+            if reaches_end:
+                self.probabilities = [sum(some_probabilities) for some_probabilities in zip(*worker_results)]
+                self.num_merged_nodes = self.frontier_circuit.num_merged_nodes
+                return
+
+            # Nodes of different workers holding the same values are joined again
+            received_nodes = [Circuit_node_frontier(self.frontier_circuit.ground_node, an_environment, a_chain_probability)
+                                for a_worker_frontier in worker_results for an_environment, a_chain_probability in a_worker_frontier]
+
+            frontier_nodes = self.frontier_circuit.build_statements(received_nodes, [statements[join_statement]])
+            next_statement = join_statement + 1
+
+        self.frontier_circuit.bottom_nodes = frontier_nodes
+        self.probabilities = self.frontier_circuit.enumeration_probabilities()
+        self.num_merged_nodes = self.frontier_circuit.num_merged_nodes
+
+
+
+    # Splits the frontier into contiguous parts, each one built by a worker process
+    # return [result sent by the worker (see frontier_worker), ...], in frontier order
+    def build_in_workers(self, frontier_nodes, given_statements, reaches_end):
+
+        process_context = multiprocessing.get_context("fork")
+
+        worker_connections = []
+        worker_processes = []
+
+        part_start = 0
+
+        for a_worker_index in range(0, self.num_workers):
+
+            part_end = part_start + len(frontier_nodes)//self.num_workers + (1 if a_worker_index < len(frontier_nodes) % self.num_workers else 0)
+
+            [parent_connection, child_connection] = process_context.Pipe()
+
+            a_worker_process = process_context.Process(target=frontier_worker, args=(child_connection, self.frontier_circuit,
+                                                        frontier_nodes[part_start:part_end], given_statements, reaches_end), daemon=True)
+            a_worker_process.start()
+            child_connection.close()
+
+            worker_connections.append(parent_connection)
+            worker_processes.append(a_worker_process)
+
+            part_start = part_end
+
+        worker_results = []
+
+        for a_connection in worker_connections:
+            [a_worker_result, worker_merged_nodes] = receive_from_worker(a_connection)
+
+            worker_results.append(a_worker_result)
+            self.frontier_circuit.num_merged_nodes += worker_merged_nodes
+
+        for a_worker_process in worker_processes:
+            a_worker_process.join()
+
+        return worker_results
+
+
+
+    # return [probability of meeting the output and the observations (float), probability of meeting the observations (float)]
+    def enumeration_probabilities(self):
+        return self.probabilities
@@ -0,0 +1,871 @@
+"""
+SUMMARY
+
+Implements batched direct sampling (rejection method) over a built circuit.
+The circuit is stored once as arrays (children of node i are child_indices[child_offsets[i]:child_offsets[i] + num_children[i]])
+together with an alias table per node (Vose, https://www.keithschwarz.com/darts-dice-coins/), so that selecting a child takes
+a constant number of operations regardless of the number of children.
+All the samples of a batch are advanced at the same time, one circuit level per step, using NumPy.
+Whether or not each end node meets the observations and the return statement is evaluated only once, the first time a sample
+reaches it.
+
+Likelihood weighting draws the samples in the same way, except that the children of a node which can only lead to dead ends
+(e.g. a variable value which a later observation never accepts) are never selected. Each sample is instead weighted by the
+probability of the children which were not excluded, so the samples are not wasted on unlikely observations.
+
+Sampling from the posterior distribution multiplies the probability of each child by its surviving mass (the probability of
+meeting the observations from it, computed once from the end nodes up), so that no sample ever reaches a dead end.
+
+Samples may be drawn until a budget is reached (number of samples, standard error of the estimate, or time), in rounds of
+increasing size. The standard error and the 95% confidence interval use the Agresti-Coull adjustment (two successes and two
+failures added to the accepted samples), so that they are meaningful even when no accepted sample meets the return statement.
+Weighted samples use their effective sample size, (sum of weights)^2/(sum of squared weights), instead of the accepted samples.
+The estimates of independent circuits (see parser/independence.py) are multiplied, their standard error is combined with the
+delta method.
+
+Sampling may be split among worker processes, each one with its own random stream spawned from the seed (see
+np.random.SeedSequence), so that the streams are independent and the estimate only depends on the seed and the number of workers.
+Every round is split evenly among the workers, and their sums are added in worker order.
+
+The uniform variates selecting the children of each level may be independent ("random"), stratified, or taken from a scrambled
+Sobol sequence (randomized quasi-Monte Carlo), with one dimension per circuit level. Stratified variates split [0, 1) into as
+many equal strata as there are samples in the batch, and place one variate in each of them in a random order (a Latin hypercube,
+one level per dimension), so every child receives close to its expected share of the samples. Sobol points also spread the
+samples evenly over the combinations of levels, which helps the most on rare observations reached through a few choices. Both
+are unbiased, and their estimates usually vary much less than the ones of independent samples, so the reported standard error
+(which assumes independent samples) is conservative.
+"""
+
+
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+import numpy as np
+
+from .aux_inference import available_num_workers, receive_from_worker
+from .sentence_evaluation import compile_logical_evaluator
+from .variable.logical_variables import logical_value
+
+
+
+# Seed of the random generator used when none is provided, for repeatability
+sampling_seed = 0
+
+
+# Maximum number of samples advanced at the same time
+default_batch_size = 100000
+
+
+# Number of samples drawn when no budget is requested
+default_num_samples = 5000
+
+# Seconds after which sampling stops when sampling until a standard error with no other budget, the error may never be reached
+# (e.g. if no sample meets the observations)
+# Unlike a time budget, it does not size the rounds, so the estimate does not depend on the time if the error is reached
+max_target_error_time = 60
+
+# Number of posterior traces shown when no number of samples is requested
+default_num_traces = 10
+
+# Samples drawn (per circuit) in the first round when sampling until a standard error or time budget, the following rounds
+# double it up to default_batch_size
+initial_round_size = 1000
+
+# Normal quantile of the 95% confidence intervals
+confidence_z = 1.959963984540054
+
+
+# End node outcomes, stored as int8
+UNKNOWN_OUTCOME         = -1
+DEADEND_OUTCOME         = 0
+MEETS_OBSERVES_OUTCOME  = 1
+MEETS_OUTPUT_OUTCOME    = 2
+
+
+# Ways of drawing samples (see Batch_sampler.obtain_sampling_tables)
+sampling_modes = ["rejection", "likelihood", "posterior"]
+
+
+# Sources of the uniform variates selecting the children (see Batch_sampler.draw_end_nodes)
+uniform_sequences = ["random", "stratified", "sobol"]
+
+# Levels of the circuit taking their variates from Sobol points, deeper levels use stratified variates, since the points of a batch
+# are kept in memory and low discrepancy is mostly lost in many dimensions
+max_sobol_dimensions = 64
+
+
+# Samplers of the running adaptive_sampling call, inherited by the worker processes when they are created (forked), since built
+# circuits and compiled programs cannot be sent to them
+worker_samplers = []
+
+
+
+# Obtains the random generator used by the samplers
+# random_generator (np.random.Generator): Returned as is, a new one with the default seed is created if None
+def obtain_random_generator(random_generator=None):
+
+    if random_generator == None:
+        return np.random.default_rng(sampling_seed)
+
+    return random_generator
+
+
+
+# Stratified uniform variates, one in each of num_samples equal strata of [0, 1), in a random order
+# return np.array of floats
+def stratified_uniforms(num_samples, random_generator):
+    return (random_generator.permutation(num_samples) + random_generator.random(num_samples))/num_samples
+
+
+
+# Points of a scrambled Sobol sequence, the scrambling is drawn from the random generator
+# The points are drawn in a power of two (the size keeping their balance), only the first num_samples are returned
+# scipy takes most of the startup time, so it is only imported once Sobol points are requested
+# The generator is given as seed, since rng is only accepted from scipy 1.15 on (qmc exists from 1.7)
+# return np.array of shape (num_samples, num_dimensions)
+def sobol_uniforms(num_samples, num_dimensions, random_generator):
+
+    from scipy.stats import qmc
+
+    sobol_engine = qmc.Sobol(num_dimensions, scramble=True, seed=random_generator)
+
+    return sobol_engine.random_base2(max(0, (num_samples - 1).bit_length()))[:num_samples]
+
+
+
+# Draws samples with the requested sampling mode
+# given_sampler (Batch_sampler or inference_forward.Forward_sampler)
+# uniform_sequence (str): One of uniform_sequences (see Batch_sampler.draw_end_nodes)
+# return sums (see Sampled_estimate.add_counts)
+def draw_sums(given_sampler, num_samples, random_generator, sampling_mode, uniform_sequence="random"):
+
+    if sampling_mode == "likelihood":
+        return given_sampler.likelihood_weights(num_samples, random_generator, uniform_sequence=uniform_sequence)
+
+    return given_sampler.rejection_counts(num_samples, random_generator, sampling_mode=sampling_mode, uniform_sequence=uniform_sequence)
+
+
+
+# Runs in a worker process, draws the samples requested through its connection until None is received
+# Python's random module is also seeded from the worker stream, it is used when variables compute their inner points
+# requests [[circuit index (int), number of samples (int)], ...], answered with [sums, ...] (see Sampled_estimate.add_counts)
+# worker_seed_sequence (np.random.SeedSequence)
+def sampling_worker(worker_connection, worker_seed_sequence, sampling_mode, uniform_sequence):
+
+    random_generator = np.random.default_rng(worker_seed_sequence)
+    random.seed(int(worker_seed_sequence.generate_state(1)[0]))
+
+    while True:
+
+        sampling_requests = worker_connection.recv()
+
+        if sampling_requests == None:
+            break
+
+        worker_connection.send([draw_sums(worker_samplers[a_circuit_index], a_num_samples, random_generator, sampling_mode, uniform_sequence)
+                                    for a_circuit_index, a_num_samples in sampling_requests])
+
+    worker_connection.close()
+
+
+
+# Sampling workers, each one a process with its own random stream
+# Workers are forked, so that they inherit the samplers (see worker_samplers)
+class Sampling_workers(object):
+
+    # given_samplers [Batch_sampler or inference_forward.Forward_sampler, ...]
+    # seed (int): The stream of each worker is spawned from it
+    def __init__(self, given_samplers, num_workers, seed, sampling_mode, uniform_sequence="random"):
+
+        global worker_samplers
+        worker_samplers = given_samplers
+
+        # Tables are created before forking, otherwise every worker would create its own
+        if sampling_mode != "rejection":
+            for a_sampler in given_samplers:
+                a_sampler.obtain_sampling_tables(sampling_mode)
+
+        process_context = multiprocessing.get_context("fork")
+
+        self.worker_connections = []
+        self.worker_processes = []
+
+        for a_worker_seed_sequence in np.random.SeedSequence(seed).spawn(num_workers):
+
+            [parent_connection, child_connection] = process_context.Pipe()
+
+            a_worker_process = process_context.Process(target=sampling_worker, args=(child_connection, a_worker_seed_sequence, sampling_mode,
+                                                        uniform_sequence), daemon=True)
+            a_worker_process.start()
+            child_connection.close()
+
+            self.worker_connections.append(parent_connection)
+            self.worker_processes.append(a_worker_process)
+
+
+    # Splits a round evenly among the workers (the first ones draw one more sample if it cannot be split evenly)
+    # return [sums, ...], one per sampler, the sums of all the workers added in worker order
+    def draw_round(self, round_size):
+
+        num_workers = len(self.worker_connections)
+
+        for a_worker_index, a_connection in enumerate(self.worker_connections):
+            worker_round_size = round_size//num_workers + (1 if a_worker_index < round_size % num_workers else 0)
+            a_connection.send([[a_circuit_index, worker_round_size] for a_circuit_index in range(0, len(worker_samplers))])
+
+        worker_sums = [receive_from_worker(a_connection) for a_connection in self.worker_connections]
+
+        return [[sum(some_values) for some_values in zip(*circuit_sums)] for circuit_sums in zip(*worker_sums)]
+
+
+    # Stops the workers
+    def close(self):
+
+        for a_connection in self.worker_connections:
+            a_connection.send(None)
+            a_connection.close()
+
+        for a_worker_process in self.worker_processes:
+            a_worker_process.join()
+
+
+
+# Formats the value of a variable in a trace
+# Qualitative values are shown as they are, numeric ones with 4 decimals
+def trace_value(a_variable):
+
+    if type(a_variable.expectation).__name__ == "str":
+        return a_variable.expectation
+
+    return "%.4f" % (a_variable.expectation, )
+
+
+
+# Builds the alias table of a list of weights
+# Selecting column j uniformly and then keeping it with probability kept_probability[j] (or moving to alias_column[j] otherwise)
+# selects each column with probability proportional to its weight
+# If all weights are zero, the first item is always selected (the same as aux_inference.select_random_by_weight)
+# return [kept_probability [float, ...], alias_column [int, ...]]
+def alias_table(given_weights):
+
+    num_items = len(given_weights)
+    total_weight = sum(given_weights)
+
+    if total_weight == 0:
+        return [[1.0] + [0.0]*(num_items - 1), [0]*num_items]
+
+    scaled_weights = [num_items*a_weight/total_weight for a_weight in given_weights]
+
+    kept_probability = [1.0]*num_items
+    alias_column = list(range(0, num_items))
+
+    small_columns = [a_column for a_column in range(0, num_items) if scaled_weights[a_column] < 1]
+    large_columns = [a_column for a_column in range(0, num_items) if scaled_weights[a_column] >= 1]
+
+    while (small_columns != []) and (large_columns != []):
+
+        small_column = small_columns.pop()
+        large_column = large_columns[-1]
+
+        kept_probability[small_column] = scaled_weights[small_column]
+        alias_column[small_column] = large_column
+
+        # The large column gives away the remainder of the small one
+        scaled_weights[large_column] -= 1 - scaled_weights[small_column]
+
+        if scaled_weights[large_column] < 1:
+            small_columns.append(large_columns.pop())
+
+    # Columns left only differ from 1 due to rounding errors, they are kept in full
+
+    return [kept_probability, alias_column]
+
+
+
+# Circuit stored as arrays, prepared for drawing many samples at once
+class Batch_sampler(object):
+
+    # given_circuit (Circuit or Array_circuit): Already built
+    def __init__(self, given_circuit):
+
+        self.output_evaluator = compile_logical_evaluator(given_circuit.output_tree, True, False)
+
+        # The ground node is node 0, the children of node i are child_indices[child_offsets[i]:child_offsets[i] + num_children[i]]
+        # and their probabilities are at the same locations of child_probability
+        [self.child_offsets, self.num_children, self.child_indices, self.child_probability, self.deadend_nodes,
+            self.obtain_end_node_environment] = given_circuit.sampling_structure()
+
+        # One entry per child, in the same order as the children of each node
+        kept_probability = np.ones(len(self.child_indices), dtype=np.float64)
+        alias_indices    = self.child_indices.copy()
+
+        # If there is a single child node, it is always selected (observations and compressed nodes)
+        for a_node_index in np.flatnonzero(self.num_children >= 2).tolist():
+
+            [node_children, child_weights] = self.weighted_children(a_node_index)
+            [node_kept_probability, node_alias_columns] = alias_table(child_weights)
+
+            node_offset = int(self.child_offsets[a_node_index])
+
+            kept_probability[node_offset:node_offset + len(node_children)] = node_kept_probability
+            alias_indices[node_offset:node_offset + len(node_children)] = [node_children[an_alias_column] for an_alias_column in node_alias_columns]
+
+        self.kept_probability = kept_probability
+        self.alias_indices    = alias_indices
+
+        # Outcome of each end node, evaluated when first reached
+        # Items which do not meet observations cannot meet output requirements
+        self.end_node_outcomes = np.full(self.num_nodes(), UNKNOWN_OUTCOME, dtype=np.int8)
+        self.end_node_outcomes[self.deadend_nodes] = DEADEND_OUTCOME
+
+        # Tables of each sampling mode, the other ones are only created once their samples are drawn (see obtain_sampling_tables)
+        # {"sampling mode":[kept probability (np.array), alias indices (np.array), sample weight factor of each node (np.array) or None], ...}
+        self.sampling_tables = {"rejection":[self.kept_probability, self.alias_indices, None]}
+
+        # Number of levels of the longest path from the ground node to an end node, found when first needed (see obtain_circuit_depth)
+        self.circuit_depth = None
+
+
+
+    # Number of nodes
+    def num_nodes(self):
+        return len(self.num_children)
+
+
+
+    # Orders the nodes so that each one comes after all its children (iterative depth-first search, post-order)
+    # A negative entry -(i + 1) in the exploration stack adds node i once all its children have been added
+    # return [node index, ...]
+    def children_first_order(self):
+
+        num_children = self.num_children.tolist()
+        child_offsets = self.child_offsets.tolist()
+        child_indices = self.child_indices.tolist()
+
+        ordered_node_indices = []
+        explored_nodes = [False]*self.num_nodes()
+
+        nodes_to_be_explored = [0]
+
+        while nodes_to_be_explored != []:
+
+            a_node_index = nodes_to_be_explored.pop()
+
+            if a_node_index < 0:
+                ordered_node_indices.append(-a_node_index - 1)
+                continue
+
+            if explored_nodes[a_node_index]:
+                continue
+
+            explored_nodes[a_node_index] = True
+            nodes_to_be_explored.append(-(a_node_index + 1))
+            nodes_to_be_explored.extend(a_child_index
+                                            for a_child_index in child_indices[child_offsets[a_node_index]:child_offsets[a_node_index] + num_children[a_node_index]]
+                                            if not explored_nodes[a_child_index])
+
+        return ordered_node_indices
+
+
+
+    # Obtains the number of levels of the longest path from the ground node to an end node, found the first time
+    # return int
+    def obtain_circuit_depth(self):
+
+        if self.circuit_depth != None:
+            return self.circuit_depth
+
+        node_depths = [0]*self.num_nodes()
+
+        for a_node_index in self.children_first_order():
+            if self.num_children[a_node_index] > 0:
+                node_depths[a_node_index] = 1 + max(node_depths[a_child_index] for a_child_index in self.weighted_children(a_node_index)[0])
+
+        self.circuit_depth = node_depths[0]
+
+        return self.circuit_depth
+
+
+
+    # Obtains the children of a node and their probabilities
+    # return [[child node index (int), ...], [child probability (float), ...]]
+    def weighted_children(self, node_index):
+
+        node_offset = int(self.child_offsets[node_index])
+        node_end = node_offset + int(self.num_children[node_index])
+
+        return [self.child_indices[node_offset:node_end].tolist(), self.child_probability[node_offset:node_end].tolist()]
+
+
+
+    # Finds the nodes which can only lead to a dead end, all the end nodes below them are dead ends
+    # return [bool, ...], one per node
+    def find_deadend_subtrees(self):
+
+        deadend_subtrees = [False]*self.num_nodes()
+
+        for a_node_index in self.children_first_order():
+
+            if self.num_children[a_node_index] == 0:
+                deadend_subtrees[a_node_index] = bool(self.deadend_nodes[a_node_index])
+            else:
+                deadend_subtrees[a_node_index] = all(deadend_subtrees[a_child_index] for a_child_index in self.weighted_children(a_node_index)[0])
+
+        return deadend_subtrees
+
+
+
+    # Finds the probability of meeting the observations from each node, following the child probabilities down to the end nodes
+    # (1 for end nodes which are not dead ends, 0 for dead ends)
+    # return [float, ...], one per node
+    def find_surviving_masses(self):
+
+        surviving_masses = [0]*self.num_nodes()
+
+        for a_node_index in self.children_first_order():
+
+            if self.num_children[a_node_index] == 0:
+                surviving_masses[a_node_index] = 0 if self.deadend_nodes[a_node_index] else 1
+                continue
+
+            [node_children, child_weights] = self.weighted_children(a_node_index)
+
+            # If all children have probability zero, the first one is always selected
+            if sum(child_weights) == 0:
+                surviving_masses[a_node_index] = surviving_masses[node_children[0]]
+            else:
+                surviving_masses[a_node_index] = sum(a_weight*surviving_masses[a_child_index]
+                                                        for a_child_index, a_weight in zip(node_children, child_weights))/sum(child_weights)
+
+        return surviving_masses
+
+
+
+    # Creates the alias tables of nodes with multiple children, with new child weights
+    # reweight_children (function: ([child node index, ...], [child probability, ...]) -> [new child weight, ...])
+    # Nodes whose new weights are all zero keep their tables
+    # return [kept probability (np.array), alias indices (np.array), fraction of the child probabilities kept by each node (np.array)]
+    def reweighted_tables(self, reweight_children):
+
+        kept_fraction = np.ones(self.num_nodes(), dtype=np.float64)
+        kept_probability = self.kept_probability.copy()
+        alias_indices = self.alias_indices.copy()
+
+        for a_node_index in np.flatnonzero(self.num_children >= 2).tolist():
+
+            [node_children, child_weights] = self.weighted_children(a_node_index)
+            new_weights = reweight_children(node_children, child_weights)
+
+            if sum(child_weights) == 0:
+                continue
+
+            kept_fraction[a_node_index] = sum(new_weights)/sum(child_weights)
+
+            if sum(new_weights) == 0:
+                continue
+
+            [node_kept_probability, node_alias_columns] = alias_table(new_weights)
+
+            node_offset = int(self.child_offsets[a_node_index])
+
+            kept_probability[node_offset:node_offset + len(node_children)] = node_kept_probability
+            alias_indices[node_offset:node_offset + len(node_children)] = [node_children[an_alias_column] for an_alias_column in node_alias_columns]
+
+        return [kept_probability, alias_indices, kept_fraction]
+
+
+
+    # Obtains the tables used by a sampling mode, created the first time
+    # "rejection": Child probabilities
+    # "likelihood": Only the children which do not only lead to dead ends, samples are weighted by the fraction of the child
+    # probabilities kept
+    # "posterior": Child probabilities multiplied by their surviving mass, so that the samples follow the posterior distribution
+    # and never reach a dead end (unless no trace meets the observations)
+    # return [kept probability (np.array), alias indices (np.array), sample weight factor of each node (np.array) or None]
+    def obtain_sampling_tables(self, sampling_mode):
+
+        if sampling_mode in self.sampling_tables:
+            return self.sampling_tables[sampling_mode]
+
+        if sampling_mode == "likelihood":
+
+            deadend_subtrees = self.find_deadend_subtrees()
+
+            self.sampling_tables["likelihood"] = self.reweighted_tables(lambda node_children, child_weights:
+                [0 if deadend_subtrees[a_child_index] else a_weight for a_child_index, a_weight in zip(node_children, child_weights)])
+
+        elif sampling_mode == "posterior":
+
+            surviving_masses = self.find_surviving_masses()
+
+            self.sampling_tables["posterior"] = self.reweighted_tables(lambda node_children, child_weights:
+                [a_weight*surviving_masses[a_child_index] for a_child_index, a_weight in zip(node_children, child_weights)])[:2] + [None]
+
+        return self.sampling_tables[sampling_mode]
+
+
+
+    # Goes down from the ground node num_samples times at once, according to the tables of a sampling mode
+    # random_generator (np.random.Generator)
+    # sampling_mode (str): One of sampling_modes (see obtain_sampling_tables)
+    # uniform_sequence (str): One of uniform_sequences, the variates of each level are independent ("random"), stratified among the
+    # samples of the batch ("stratified"), or a dimension of scrambled Sobol points ("sobol"), see stratified_uniforms and sobol_uniforms
+    # return [np.array of end node indices (int), np.array of sample weights (float) or None if not weighted], one item per sample
+    def draw_end_nodes(self, num_samples, random_generator, sampling_mode="rejection", uniform_sequence="random"):
+
+        [kept_probability, alias_indices, weight_factors] = self.obtain_sampling_tables(sampling_mode)
+
+        sample_weights = None if weight_factors is None else np.ones(num_samples, dtype=np.float64)
+
+        current_nodes = np.zeros(num_samples, dtype=np.int64)
+
+        # Samples which have not reached an end node yet
+        moving_samples = np.arange(0, num_samples) if self.num_children[0] > 0 else np.zeros(0, dtype=np.int64)
+
+        # Variates of every sample, one column per level, levels beyond the columns are stratified
+        if (uniform_sequence == "sobol") and (len(moving_samples) > 0):
+            level_uniforms = sobol_uniforms(num_samples, min(self.obtain_circuit_depth(), max_sobol_dimensions), random_generator)
+        else:
+            level_uniforms = np.zeros((num_samples, 0), dtype=np.float64)
+
+        current_level = 0
+
+        while len(moving_samples) > 0:
+
+            moving_nodes = current_nodes[moving_samples]
+            moving_num_children = self.num_children[moving_nodes]
+
+            if uniform_sequence == "random":
+                moving_uniforms = random_generator.random(len(moving_samples))
+            elif current_level < level_uniforms.shape[1]:
+                moving_uniforms = level_uniforms[moving_samples, current_level]
+            else:
+                moving_uniforms = stratified_uniforms(num_samples, random_generator)[moving_samples]
+
+            current_level += 1
+
+            # The integer part selects a column of the alias table, the fractional part decides between the column and its alias
+            scaled_uniforms = moving_uniforms*moving_num_children
+            selected_columns = np.minimum(scaled_uniforms.astype(np.int64), moving_num_children - 1)
+            column_uniforms = scaled_uniforms - selected_columns
+
+            table_locations = self.child_offsets[moving_nodes] + selected_columns
+
+            next_nodes = np.where(column_uniforms < kept_probability[table_locations], self.child_indices[table_locations],
+                                    alias_indices[table_locations])
+
+            if weight_factors is not None:
+                sample_weights[moving_samples] *= weight_factors[moving_nodes]
+
+            current_nodes[moving_samples] = next_nodes
+            moving_samples = moving_samples[self.num_children[next_nodes] > 0]
+
+        return [current_nodes, sample_weights]
+
+
+
+    # Obtains the outcome of end nodes, evaluating the ones reached for the first time
+    # return np.array of outcomes (int8), one per given end node
+    def outcomes(self, end_node_indices):
+
+        known_outcomes = self.end_node_outcomes[end_node_indices]
+
+        for an_end_node_index in np.unique(end_node_indices[known_outcomes == UNKNOWN_OUTCOME]).tolist():
+
+            if logical_value.TRUE == self.output_evaluator(self.obtain_end_node_environment(an_end_node_index)):
+                self.end_node_outcomes[an_end_node_index] = MEETS_OUTPUT_OUTCOME
+            else:
+                self.end_node_outcomes[an_end_node_index] = MEETS_OBSERVES_OUTCOME
+
+        return self.end_node_outcomes[end_node_indices]
+
+
+
+    # Draws samples in batches
+    # random_generator (np.random.Generator): A new one with the default seed is created if None
+    # sampling_mode (str): "rejection", or "posterior" (all samples meet the observations)
+    # uniform_sequence (str): One of uniform_sequences (see draw_end_nodes)
+    # return [number of samples meeting the output and the observations (int), number of samples meeting the observations (int)]
+    def rejection_counts(self, num_samples, random_generator=None, batch_size=default_batch_size, sampling_mode="rejection",
+        uniform_sequence="random"):
+
+        random_generator = obtain_random_generator(random_generator)
+
+        valid_output_observes = 0
+        valid_observes = 0
+
+        for a_batch_start in range(0, num_samples, batch_size):
+
+            [end_nodes, _weights] = self.draw_end_nodes(min(batch_size, num_samples - a_batch_start), random_generator, sampling_mode,
+                                        uniform_sequence)
+            sample_outcomes = self.outcomes(end_nodes)
+
+            valid_output_observes += int(np.count_nonzero(sample_outcomes == MEETS_OUTPUT_OUTCOME))
+            valid_observes += int(np.count_nonzero(sample_outcomes != DEADEND_OUTCOME))
+
+        return [valid_output_observes, valid_observes]
+
+
+
+    # Draws likelihood weighted samples in batches
+    # random_generator (np.random.Generator): A new one with the default seed is created if None
+    # uniform_sequence (str): One of uniform_sequences (see draw_end_nodes)
+    # return [sum of the weights of the samples meeting the output and the observations (float), sum of the weights of the samples
+    # meeting the observations (float), sum of their squared weights (float)]
+    def likelihood_weights(self, num_samples, random_generator=None, batch_size=default_batch_size, uniform_sequence="random"):
+
+        random_generator = obtain_random_generator(random_generator)
+
+        weight_output_observes = 0
+        weight_observes = 0
+        squared_weight_observes = 0
+
+        for a_batch_start in range(0, num_samples, batch_size):
+
+            [end_nodes, sample_weights] = self.draw_end_nodes(min(batch_size, num_samples - a_batch_start), random_generator, "likelihood",
+                                            uniform_sequence)
+            sample_outcomes = self.outcomes(end_nodes)
+
+            # Samples reaching a dead end have no weight
+            sample_weights[sample_outcomes == DEADEND_OUTCOME] = 0
+
+            weight_output_observes += float(np.sum(sample_weights[sample_outcomes == MEETS_OUTPUT_OUTCOME]))
+            weight_observes += float(np.sum(sample_weights))
+            squared_weight_observes += float(np.sum(sample_weights**2))
+
+        return [weight_output_observes, weight_observes, squared_weight_observes]
+
+
+
+    # Shows traces drawn from the posterior distribution, as comma separated values with one row per trace
+    # The first row contains the variable names, in alphabetical order, variables not present in a trace are left empty
+    # Continuous variables show the expectation of their discretized interval
+    # If no trace meets the observations, only the header is shown
+    # random_generator (np.random.Generator): A new one with the default seed is created if None
+    # uniform_sequence (str): One of uniform_sequences (see draw_end_nodes)
+    def show_posterior_traces(self, num_traces, random_generator=None, uniform_sequence="random"):
+
+        [end_nodes, _weights] = self.draw_end_nodes(num_traces, obtain_random_generator(random_generator), "posterior", uniform_sequence)
+
+        unique_end_nodes, trace_rows = np.unique(end_nodes, return_inverse=True)
+        unique_end_nodes = unique_end_nodes.tolist()
+
+        # Dead ends have no trace to show
+        shown_environments = [{} if self.deadend_nodes[an_end_node_index] else self.obtain_end_node_environment(an_end_node_index)
+                                for an_end_node_index in unique_end_nodes]
+
+        variable_names = sorted({a_name for an_environment in shown_environments for a_name in an_environment})
+
+        formatted_rows = []
+
+        for an_end_node_index, an_environment in zip(unique_end_nodes, shown_environments):
+
+            if self.deadend_nodes[an_end_node_index]:
+                formatted_rows.append(None)
+                continue
+
+            formatted_rows.append(",".join(trace_value(an_environment[a_name]) if a_name in an_environment else ""
+                                            for a_name in variable_names))
+
+        print(",".join(variable_names))
+
+        if all(a_row != None for a_row in formatted_rows):
+            sys.stdout.write("".join(formatted_rows[a_row] + "\n" for a_row in trace_rows.reshape(-1).tolist()))
+
+
+
+# Sums of the (weighted) samples drawn from one or more independent circuits, whose estimates are multiplied
+# Rejection samples have a weight of 1 if they meet the observations and 0 otherwise
+class Sampled_estimate(object):
+
+    # weighted (bool): Whether or not the samples are likelihood weighted, only changes the summary shown
+    def __init__(self, num_circuits, weighted=False):
+
+        self.weighted = weighted
+
+        # One entry per circuit
+        self.meets_output_and_observes = [0]*num_circuits
+        self.meets_observes = [0]*num_circuits
+        self.squared_weights = [0]*num_circuits
+        self.num_samples = [0]*num_circuits
+
+
+    # Adds the sums of new samples of a circuit
+    # given_sums [weight meeting the output and the observations, weight meeting the observations, squared weight meeting the
+    # observations], the last one may be omitted for rejection samples (it is the same as the number meeting the observations)
+    def add_counts(self, circuit_index, num_new_samples, given_sums):
+
+        self.meets_output_and_observes[circuit_index] += given_sums[0]
+        self.meets_observes[circuit_index] += given_sums[1]
+        self.squared_weights[circuit_index] += given_sums[2] if len(given_sums) == 3 else given_sums[1]
+        self.num_samples[circuit_index] += num_new_samples
+
+
+    # return [meets output and observes, meets observes, ...], one pair per circuit (see print_conditional_probability)
+    def probability_pairs(self):
+        return [a_count for a_pair in zip(self.meets_output_and_observes, self.meets_observes) for a_count in a_pair]
+
+
+    # Effective sample size of each circuit, the number of accepted samples if not weighted
+    # return [float, ...]
+    def effective_sample_sizes(self):
+        return [(a_meets_observes**2)/a_squared_weight if a_squared_weight > 0 else 0
+                    for a_meets_observes, a_squared_weight in zip(self.meets_observes, self.squared_weights)]
+
+
+    # Obtains the Agresti-Coull adjusted estimate and its variance for each circuit
+    # return [[adjusted estimate (float), variance (float)], ...]
+    def adjusted_estimates(self):
+
+        adjusted = []
+
+        for a_meets_output, a_meets_observes, an_effective_size in zip(self.meets_output_and_observes, self.meets_observes,
+            self.effective_sample_sizes()):
+
+            an_estimate = a_meets_output/a_meets_observes if a_meets_observes > 0 else 0
+
+            adjusted_num_samples = an_effective_size + confidence_z**2
+            adjusted_estimate = (an_estimate*an_effective_size + confidence_z**2/2)/adjusted_num_samples
+
+            adjusted.append([adjusted_estimate, adjusted_estimate*(1 - adjusted_estimate)/adjusted_num_samples])
+
+        return adjusted
+
+
+    # Standard error of the (multiplied) estimate
+    # Delta method: Var(p1*p2*...) ~ sum_i (product of the other estimates)^2*Var(pi)
+    def standard_error(self):
+
+        adjusted = self.adjusted_estimates()
+
+        combined_variance = 0
+
+        for a_circuit_index in range(0, len(adjusted)):
+            other_estimates = math.prod(an_estimate for another_index, [an_estimate, _variance] in enumerate(adjusted) if another_index != a_circuit_index)
+            combined_variance += (other_estimates**2)*adjusted[a_circuit_index][1]
+
+        return math.sqrt(combined_variance)
+
+
+    # 95% confidence interval of the (multiplied) estimate, centered on the adjusted estimate and limited to [0, 1]
+    # return [lower bound (float), upper bound (float)]
+    def confidence_interval(self):
+
+        adjusted_estimate = math.prod(an_estimate for an_estimate, _variance in self.adjusted_estimates())
+        interval_half_width = confidence_z*self.standard_error()
+
+        return [max(0, adjusted_estimate - interval_half_width), min(1, adjusted_estimate + interval_half_width)]
+
+
+    # Shows the confidence interval and the accepted samples, or the effective sample size if weighted (as an error, so that the
+    # result is still the only standard output)
+    # Independent circuits show their accepted samples and acceptance rates one after the other
+    def show_summary(self):
+
+        [lower_bound, upper_bound] = self.confidence_interval()
+
+        if self.weighted:
+            sample_summary = "effective sample size: %s" % (", ".join("%.1f of %d" % (an_effective_size, a_num_samples)
+                                for an_effective_size, a_num_samples in zip(self.effective_sample_sizes(), self.num_samples)), )
+        else:
+            sample_summary = "accepted samples: %s (acceptance rate: %s)" % (
+                ", ".join("%d of %d" % (a_meets_observes, a_num_samples)
+                            for a_meets_observes, a_num_samples in zip(self.meets_observes, self.num_samples)),
+                ", ".join("%.2f%%" % (100*a_meets_observes/max(a_num_samples, 1), )
+                            for a_meets_observes, a_num_samples in zip(self.meets_observes, self.num_samples)))
+
+        print("95%% confidence interval: [%.4f, %.4f], standard error: %.4f, %s" % (lower_bound, upper_bound, self.standard_error(),
+            sample_summary), file=sys.stderr)
+
+
+
+# Samples independent circuits until any of the requested budgets is reached
+# If no budget is requested, default_num_samples samples are drawn from each circuit
+# given_samplers [Batch_sampler or inference_forward.Forward_sampler, ...]
+# num_samples (int): Maximum number of samples drawn from each circuit
+# target_error (float): Stops once the standard error of the estimate is at most this one, or after max_target_error_time seconds if
+# it is the only budget (a warning is shown then)
+# time_budget (float): Stops once this many seconds have passed, the last round is sized according to the samples per second so far
+# sampling_mode (str): One of sampling_modes (see Batch_sampler.obtain_sampling_tables)
+# num_workers (int): Number of worker processes, a single one samples within this process
+# seed (int): Seed of the random streams, the estimate only depends on it and the number of workers (unless a time budget is used)
+# uniform_sequence (str): One of uniform_sequences (see Batch_sampler.draw_end_nodes), each round (and the part of each worker) is
+# stratified or scrambled on its own
+# return Sampled_estimate
+def adaptive_sampling(given_samplers, num_samples=None, target_error=None, time_budget=None, sampling_mode="rejection", num_workers=1,
+    seed=sampling_seed, uniform_sequence="random"):
+
+    num_workers = available_num_workers(num_workers)
+
+    if num_workers > 1:
+        sampling_workers = Sampling_workers(given_samplers, num_workers, seed, sampling_mode, uniform_sequence)
+    else:
+        random_generator = np.random.default_rng(seed)
+
+    if (num_samples == None) and (target_error == None) and (time_budget == None):
+        num_samples = default_num_samples
+
+    only_target_error = (target_error != None) and (num_samples == None) and (time_budget == None)
+
+    # A fixed number of samples is drawn at once
+    if (target_error == None) and (time_budget == None):
+        round_size = num_samples
+    else:
+        round_size = initial_round_size
+
+    sampled_estimate = Sampled_estimate(len(given_samplers), sampling_mode == "likelihood")
+
+    t1 = time.time()
+
+    while True:
+
+        if num_samples != None:
+            round_size = min(round_size, num_samples - sampled_estimate.num_samples[0])
+
+        if round_size <= 0:
+            break
+
+        if num_workers > 1:
+            round_sums = sampling_workers.draw_round(round_size)
+        else:
+            round_sums = [draw_sums(a_sampler, round_size, random_generator, sampling_mode, uniform_sequence) for a_sampler in given_samplers]
+
+        for a_circuit_index, sampled_sums in enumerate(round_sums):
+            sampled_estimate.add_counts(a_circuit_index, round_size, sampled_sums)
+
+        if (target_error != None) and (sampled_estimate.standard_error() <= target_error):
+            break
+
+        elapsed_time = time.time() - t1
+
+        if only_target_error and (elapsed_time >= max_target_error_time):
+            break
+
+        if time_budget != None:
+
+            if elapsed_time >= time_budget:
+                break
+
+            # Not beyond the remaining time, at the current samples per second
+            samples_per_second = sampled_estimate.num_samples[0]/max(elapsed_time, 1e-6)
+            round_size = min(2*round_size, default_batch_size, max(1, int(samples_per_second*(time_budget - elapsed_time))))
+
+        else:
+            round_size = min(2*round_size, default_batch_size)
+
+    if num_workers > 1:
+        sampling_workers.close()
+
+    if only_target_error and (sampled_estimate.standard_error() > target_error):
+
+        if 0 in sampled_estimate.meets_observes:
+            print("No sample met the observations within %d seconds, they may be impossible to meet" % (max_target_error_time, ),
+                file=sys.stderr)
+        else:
+            print("The target error was not reached within %d seconds, request a number of samples or a time budget to sample further" % (
+                max_target_error_time, ), file=sys.stderr)
+
+    return sampled_estimate
@@ -0,0 +1,395 @@
+"""
+SUMMARY
+
+Implements exact enumeration over a columnar frontier: one column per program variable and one probability per trace.
+Every statement is executed as a column operation over all the traces at once instead of node by node.
+Only discrete (binary, numeric, and qualitative) programs are supported.
+"""
+
+
+import sys
+
+import numpy as np
+
+from .aux_inference import add_to_stack, canonical_grouping_value, grouping_decimals, Simple_Stack
+from .vectorized_evaluation import broadcast_to_rows, vectorized_evaluator
+
+
+
+# Statements which cannot be represented as columns of point values
+unsupported_statements = ["d_uniform", "d_gaussian", "d_pareto", "d_beta", "d_uniform_num", "d_gaussian_num", "d_pareto_num", "d_beta_num",
+                            "wlsr", "print", "print_combined"]
+
+
+# Prefix for the internal columns, it cannot be part of a variable name
+# Internal columns keep track of the trace each row originates from inside "if" statements
+origin_column_prefix = "#ORIGIN"
+
+
+
+# Frontier of traces stored as a table
+class Frontier_table(object):
+
+    # columns ({"token":column (np.array), ...}): Variable values, all columns have the same length
+    # probabilities (np.array): Probability of each trace (row)
+    def __init__(self, columns, probabilities):
+        self.columns = columns
+        self.probabilities = probabilities
+
+
+    # Number of traces
+    def num_rows(self):
+        return len(self.probabilities)
+
+
+    # Obtains a new table with only the selected rows
+    # selected_rows (np.array): boolean mask or row indices
+    def select(self, selected_rows):
+        return Frontier_table({a_token:self.columns[a_token][selected_rows] for a_token in self.columns}, self.probabilities[selected_rows])
+
+
+    # Obtains a new table where each row is repeated a number of times, in order
+    # [r0, r1] -> [r0, r0, r1, r1] (for 2 repetitions)
+    def repeat(self, num_repetitions):
+        return Frontier_table({a_token:np.repeat(self.columns[a_token], num_repetitions) for a_token in self.columns},
+            np.repeat(self.probabilities, num_repetitions))
+
+
+    # Combines all the rows with the same values for the given key columns, adding their probabilities
+    # The remaining columns keep the values of the first row of each group
+    # key_columns [np.array, ...]
+    def group_by(self, key_columns):
+
+        num_rows = self.num_rows()
+
+        # Encodes all the keys as a single integer per row
+        combined_codes = np.zeros(num_rows, dtype=np.int64)
+
+        for a_key_column in key_columns:
+            column_codes, num_codes = factorize_column(broadcast_to_rows(a_key_column, num_rows))
+            combined_codes = combined_codes*num_codes + column_codes
+
+            # Recompresses the codes to avoid overflows with many keys
+            _unique_codes, combined_codes = np.unique(combined_codes, return_inverse=True)
+
+        _unique_codes, first_rows, group_of_each_row = np.unique(combined_codes, return_index=True, return_inverse=True)
+
+        # Keeps the groups in order of first appearance
+        group_order = np.argsort(first_rows, kind="stable")
+        first_rows = first_rows[group_order]
+
+        group_probabilities = np.bincount(group_of_each_row.ravel(), weights=self.probabilities, minlength=len(group_order))[group_order]
+
+        grouped_table = self.select(first_rows)
+        grouped_table.probabilities = group_probabilities
+
+        return grouped_table
+
+
+
+# Joins the rows of multiple tables, variables missing from a table are stored as None
+# given_tables [Frontier_table, ...]: An empty list results in a table without rows nor columns
+def concatenate_tables(given_tables):
+
+    if given_tables == []:
+        return Frontier_table({}, np.zeros(0, dtype=np.float64))
+
+    # Keeps the column order of appearance
+    all_tokens = []
+    for a_table in given_tables:
+        for a_token in a_table.columns:
+            if a_token not in all_tokens:
+                all_tokens.append(a_token)
+
+    joined_columns = {}
+
+    for a_token in all_tokens:
+
+        column_pieces = []
+
+        for a_table in given_tables:
+            if a_token in a_table.columns:
+                column_pieces.append(a_table.columns[a_token])
+            else:
+                column_pieces.append(np.full(a_table.num_rows(), None, dtype=object))
+
+        joined_columns[a_token] = np.concatenate(column_pieces)
+
+    return Frontier_table(joined_columns, np.concatenate([a_table.probabilities for a_table in given_tables]))
+
+
+
+# Encodes the values of a column as integers, equal values get the same code
+# return [codes (np.array), number of different codes (int)]
+def factorize_column(given_column):
+
+    # Numeric columns can be sorted directly
+    # Rounded with the same numeric tolerance as the circuit grouping
+    if given_column.dtype != object:
+        if given_column.dtype.kind == "f":
+            given_column = np.round(given_column, grouping_decimals)
+
+        unique_values, column_codes = np.unique(given_column, return_inverse=True)
+        return [column_codes.ravel(), len(unique_values)]
+
+    # Object columns may mix types (e.g. None), so they are encoded by hashing
+    value_to_code = {}
+    column_codes = np.array([value_to_code.setdefault(a_value if a_value == None else canonical_grouping_value(a_value), len(value_to_code))
+                                for a_value in given_column], dtype=np.int64)
+
+    return [column_codes, len(value_to_code)]
+
+
+
+# Transforms a list of scalars or columns into a matrix with one row per trace
+def stack_as_matrix(given_values, num_rows):
+
+    matrix_columns = [broadcast_to_rows(a_value, num_rows) for a_value in given_values]
+
+    # Qualitative values are stored as objects
+    if any(a_column.dtype == object for a_column in matrix_columns):
+        return np.stack([a_column.astype(object) for a_column in matrix_columns], axis=1)
+
+    return np.stack(matrix_columns, axis=1).astype(float)
+
+
+
+# Creates a vectorized enumeration
+class Vectorized_enumeration(object):
+
+    # Executes the instruction tree over a frontier table
+    def __init__(self, given_instructions_tree, given_output_tree):
+
+        # Starts with a single trace with no variables
+        self.ground_table = Frontier_table({}, np.ones(1))
+
+        # Keeps track of the final output requirements
+        self.output_tree = given_output_tree
+
+        # Keeps track of the nesting of "if" statements
+        self.if_depth = 0
+
+        self.bottom_table = self.build_subtable(self.ground_table, given_instructions_tree)
+
+
+
+    # Executes a tree of statements over a given table
+    # Statements are visited in the same order as when building a circuit
+    def build_subtable(self, given_table, contained_tree):
+
+        available_trees_to_be_explored = Simple_Stack()
+        add_to_stack(available_trees_to_be_explored, contained_tree.children)
+
+        current_table = given_table
+
+        while available_trees_to_be_explored.has_contents():
+
+            present_tree = available_trees_to_be_explored.get()
+
+            # Do nothing if not a tree
+            if type(present_tree).__name__ != "Tree":
+                continue
+
+            data_from_tree = present_tree.data
+
+            num_rows = current_table.num_rows()
+
+            if data_from_tree in unsupported_statements:
+                print("'%s' statements are not supported by vectorized enumeration, use 'enumerate' instead" % (data_from_tree, ), file=sys.stderr)
+                sys.exit(1)
+
+
+            # Keeps the traces which meet the observation
+            elif data_from_tree == "observe":
+                current_table = current_table.select(vectorized_evaluator(present_tree.children[0], current_table.columns, num_rows, True))
+
+
+            # Keeps the traces which do not meet the expression
+            elif data_from_tree == "reject":
+                current_table = current_table.select(~vectorized_evaluator(present_tree.children[0], current_table.columns, num_rows, True))
+
+
+            # Combines the traces with the same values for all the marginalization expressions
+            elif data_from_tree == "marg":
+                key_columns = [vectorized_evaluator(a_marg_condition, current_table.columns, num_rows, False)
+                                for a_marg_condition in present_tree.children]
+                current_table = current_table.group_by(key_columns)
+
+
+            # Removes the variables and combines the traces with the same values for all the remaining ones
+            elif data_from_tree == "elimvar":
+
+                elimination_variable_names = {a_child_token.value:True for a_child_token in present_tree.children}
+
+                remaining_columns = {a_token:current_table.columns[a_token] for a_token in current_table.columns
+                                        if a_token not in elimination_variable_names}
+                current_table = Frontier_table(remaining_columns, current_table.probabilities)
+
+                current_table = current_table.group_by([remaining_columns[a_token] for a_token in sorted(remaining_columns)
+                                                        if not a_token.startswith(origin_column_prefix)])
+
+
+            # "if" statements: each trace follows the first branch whose condition is met
+            # ite:          [condition, contents if, contents else]
+            # ite_elseif:   [condition, contents, condition, contents, ...]
+            # ite_complete: [condition, contents, condition, contents, ..., contents else]
+            elif data_from_tree in ["ite", "ite_elseif", "ite_complete"]:
+
+                if data_from_tree == "ite_elseif":
+                    num_branches = len(present_tree.children)//2
+                    contents_else = None
+                else:
+                    num_branches = (len(present_tree.children) - 1)//2
+                    contents_else = present_tree.children[-1]
+
+                branch_conditions = [present_tree.children[2*a_branch] for a_branch in range(0, num_branches)]
+                branch_contents   = [present_tree.children[2*a_branch + 1] for a_branch in range(0, num_branches)]
+
+                current_table = self.execute_branches(current_table, branch_conditions, branch_contents, contents_else)
+
+
+            # Two rows per trace, one for each binary value
+            elif data_from_tree == "flip":
+
+                token_name = present_tree.children[0].value
+                variable_flip_value = float(present_tree.children[1].value)
+
+                assert (0 <= variable_flip_value) and (variable_flip_value <= 1), "Required 0 <= p <= 1, p =%.4f" % (variable_flip_value, )
+
+                current_table = self.add_discrete_variable(current_table, token_name, np.array([[0.0, 1.0]]),
+                    np.array([[1 - variable_flip_value, variable_flip_value]]))
+
+
+            elif data_from_tree == "bern":
+
+                token_name = present_tree.children[0].value
+                flip_values = broadcast_to_rows(vectorized_evaluator(present_tree.children[1], current_table.columns, num_rows, False), num_rows)
+                flip_values = flip_values.astype(float)
+
+                assert np.all((0 <= flip_values) & (flip_values <= 1)), "Required 0 <= p <= 1"
+
+                current_table = self.add_discrete_variable(current_table, token_name, np.array([[0.0, 1.0]]),
+                    np.stack([1 - flip_values, flip_values], axis=1))
+
+
+            elif data_from_tree in ["disc_num", "disc_qual"]:
+
+                token_name = present_tree.children[0].value
+                num_value_assignments = (len(present_tree.children) - 1)//2
+
+                assigned_values = [vectorized_evaluator(present_tree.children[1 + 2*an_assignment], current_table.columns, num_rows, False)
+                                    for an_assignment in range(0, num_value_assignments)]
+                assigned_odds   = [vectorized_evaluator(present_tree.children[2 + 2*an_assignment], current_table.columns, num_rows, False)
+                                    for an_assignment in range(0, num_value_assignments)]
+
+                assigned_odds = stack_as_matrix(assigned_odds, num_rows)
+                combined_odds = np.sum(assigned_odds, axis=1, keepdims=True)
+
+                # Enforced overall odds are larger than zero
+                assert np.all(combined_odds > 0), "Sum of odds must be > 0"
+
+                current_table = self.add_discrete_variable(current_table, token_name, stack_as_matrix(assigned_values, num_rows),
+                    assigned_odds/combined_odds)
+
+
+            elif data_from_tree == "assgn":
+
+                token_name = present_tree.children[0].value
+                assigned_values = vectorized_evaluator(present_tree.children[1], current_table.columns, num_rows, False)
+
+                current_table = Frontier_table(dict(current_table.columns), current_table.probabilities)
+                current_table.columns[token_name] = broadcast_to_rows(assigned_values, num_rows)
+
+
+            # There is no circuit to show
+            elif data_from_tree == "show_circuit":
+                print("show_circuit() is ignored by vectorized enumeration", file=sys.stderr)
+
+
+            # Otherwise, find the children trees and explore them
+            else:
+                add_to_stack(available_trees_to_be_explored, present_tree.children)
+
+
+        return current_table
+
+
+
+    # Adds a discrete variable to all the traces, each trace is repeated once per possible value
+    # variable_values (np.array): [[value 1, value 2, ...], ...], one row per trace or a single row shared by all of them
+    # variable_probabilities (np.array): Same shape as variable_values
+    def add_discrete_variable(self, given_table, token_name, variable_values, variable_probabilities):
+
+        num_rows = given_table.num_rows()
+        num_values = max(variable_values.shape[1], variable_probabilities.shape[1])
+
+        expanded_table = given_table.repeat(num_values)
+
+        expanded_table.columns[token_name] = np.broadcast_to(variable_values, (num_rows, num_values)).ravel()
+        expanded_table.probabilities = expanded_table.probabilities*np.broadcast_to(variable_probabilities, (num_rows, num_values)).ravel()
+
+        return expanded_table
+
+
+
+    # Executes an "if" statement, each trace follows the first branch whose condition is met
+    # The resulting traces are kept in the same order as their original traces
+    # contents_else (Parse Tree): None if traces which do not meet any condition continue as they are
+    def execute_branches(self, given_table, branch_conditions, branch_contents, contents_else):
+
+        self.if_depth += 1
+        origin_column = "%s%d" % (origin_column_prefix, self.if_depth)
+
+        given_table = Frontier_table(dict(given_table.columns), given_table.probabilities)
+        given_table.columns[origin_column] = np.arange(given_table.num_rows())
+
+        # Traces which have not yet met a condition
+        remaining_table = given_table
+
+        resulting_tables = []
+
+        for condition, contents in zip(branch_conditions, branch_contents):
+
+            meets_condition = vectorized_evaluator(condition, remaining_table.columns, remaining_table.num_rows(), True)
+
+            if np.any(meets_condition):
+                resulting_tables.append(self.build_subtable(remaining_table.select(meets_condition), contents))
+
+            remaining_table = remaining_table.select(~meets_condition)
+
+        # Traces which have not met any condition
+        if contents_else == None:
+            resulting_tables.append(remaining_table)
+        elif remaining_table.num_rows() > 0:
+            resulting_tables.append(self.build_subtable(remaining_table, contents_else))
+
+        # If no trace is left (e.g. all of them were rejected before) and no branch was followed, the remaining table is kept as it is
+        if resulting_tables == []:
+            joined_table = remaining_table
+        else:
+            joined_table = concatenate_tables(resulting_tables)
+
+        # Restores the original trace order
+        joined_table = joined_table.select(np.argsort(joined_table.columns[origin_column], kind="stable"))
+        del joined_table.columns[origin_column]
+
+        self.if_depth -= 1
+
+        return joined_table
+
+
+
+    # Obtains the enumeration probability
+    # Prints the final results
+    def infer_by_enumeration(self):
+
+        meets_output = vectorized_evaluator(self.output_tree, self.bottom_table.columns, self.bottom_table.num_rows(), True)
+
+        Pr_meets_observes = np.sum(self.bottom_table.probabilities)
+        Pr_meets_output_and_observes = np.sum(self.bottom_table.probabilities[meets_output])
+
+        if (Pr_meets_output_and_observes == 0) and (Pr_meets_observes == 0):
+            print(0)
+            return
+
+        print("%.4f" % (Pr_meets_output_and_observes/Pr_meets_observes))
@@ -7,7 +7,7 @@ Implements regression functions.
 
 import numpy as np
 
-from .sentence_evaluation import logical_evaluator
+from .sentence_evaluation import compile_logical_evaluator
 from .variable.common import Fixed
 
 
@@ -22,6 +22,8 @@ def wls_uncorrelated(present_tree, available_parent_nodes):
     num_coef = len(coef_names)
 
     datapoint_expressions = [a_child.children for a_child in present_tree.children[1:]]
+    datapoint_evaluators  = [[compile_logical_evaluator(an_expression, final_result=False, numeric_final_result=False) for an_expression in a_datapoint]
+                                for a_datapoint in datapoint_expressions]
     num_datapoints = len(datapoint_expressions)
     num_expressions_X = len(datapoint_expressions[0]) - 1
 
@@ -71,7 +73,7 @@ def wls_uncorrelated(present_tree, available_parent_nodes):
 
 
         # Goes input vector by input vector
-        for a_datapoint_expressions in datapoint_expressions:
+        for a_datapoint_evaluators in datapoint_evaluators:
 
             # Obtains the current row index
             row_index += 1
@@ -80,9 +82,8 @@ def wls_uncorrelated(present_tree, available_parent_nodes):
             tmp_wls_vars = []
 
             # Goes expression by expression
-            for an_expression in a_datapoint_expressions:
-                tmp_wls_vars.append(logical_evaluator(an_expression, a_parent_env,
-                    final_result=False, numeric_final_result=False))
+            for an_expression_evaluator in a_datapoint_evaluators:
+                tmp_wls_vars.append(an_expression_evaluator(a_parent_env))
 
             # Computes an error variable equal to the variances multiplied by a constant (constant is disregarded)
 
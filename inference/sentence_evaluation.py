@@ -5,8 +5,10 @@ Evaluates a sentence, logical only, provided the meaning of the tokens.
 """
 
 
+import operator
 import re
 import sys
+import weakref
 
 from .variable.common import Fixed, generate_true_fixed_var, generate_false_fixed_var
 from .variable.logical_variables import logical_value
@@ -253,3 +255,203 @@ def numeric_string(something):
         return True
     except:
         return False
+
+
+
+# Comparison and arithmetic operations, matched directly to the variable operators
+comparison_operators = {
+    "equal_operation":operator.eq,
+    "not_equal_operation":operator.ne,
+    "less_operation":operator.lt,
+    "lt_operation":operator.le,
+    "greater_operation":operator.gt,
+    "gt_operation":operator.ge
+}
+
+arithmetic_operators = {
+    "add":operator.add,
+    "substract":operator.sub,
+    "opposite":lambda x: x.opposite(),
+    "product":operator.mul,
+    "division":operator.truediv,
+    "exponentiation":operator.pow
+}
+
+
+# Shared results of logical operations, designed to avoid allocating a new variable per evaluation
+# Variables assigned to a token are renamed on a copy, so these are never modified
+true_fixed_var  = generate_true_fixed_var()
+false_fixed_var = generate_false_fixed_var()
+
+
+# Already compiled evaluators of the trees still in use, the ones of a tree are removed as soon as it is no longer referenced (so
+# that its id is not reused meanwhile), the evaluators themselves never reference the trees
+# {id(tree):{(final_result, numeric_final_result):evaluator, ...}, ...}
+compiled_evaluators = {}
+
+
+
+# Compiles a sentence into a function which only requires the variable environment, obtaining the same results as logical_evaluator
+# The tree is only walked once, constants are parsed once and the operations are selected directly
+# Compiled evaluators are cached while the tree is in use, so compiling the same tree again has no cost
+# return evaluator (function): evaluator(environment_dict) = logical_evaluator(tree_to_be_considered, environment_dict, final_result, numeric_final_result)
+def compile_logical_evaluator(tree_to_be_considered, final_result=True, numeric_final_result=False):
+
+    if tree_to_be_considered == None:
+        return lambda environment_dict: logical_value.TRUE
+
+    tree_id = id(tree_to_be_considered)
+
+    if tree_id not in compiled_evaluators:
+        compiled_evaluators[tree_id] = {}
+        weakref.finalize(tree_to_be_considered, compiled_evaluators.pop, tree_id, None)
+
+    tree_evaluators = compiled_evaluators[tree_id]
+    compilation_key = (final_result, numeric_final_result)
+
+    if compilation_key in tree_evaluators:
+        return tree_evaluators[compilation_key]
+
+    variable_evaluator = compile_variable_evaluator(tree_to_be_considered)
+
+    if numeric_final_result:
+        compiled_evaluator = lambda environment_dict: variable_evaluator(environment_dict).expectation
+    elif final_result:
+        compiled_evaluator = lambda environment_dict: variable_evaluator(environment_dict).get_logical_value()
+    else:
+        compiled_evaluator = variable_evaluator
+
+    tree_evaluators[compilation_key] = compiled_evaluator
+
+    return compiled_evaluator
+
+
+
+# Compiles a sentence into a function returning its resulting variable (Common)
+def compile_variable_evaluator(tree_to_be_considered):
+
+    operation_name = tree_to_be_considered.data
+
+    if operation_name == "e":
+        return compile_token_evaluator(tree_to_be_considered.children[0])
+
+
+    elif operation_name in ["and_operation", "or_operation"]:
+
+        first_tree, second_tree = tree_to_be_considered.children[0].children
+
+        first_evaluator  = compile_logical_evaluator(first_tree, True)
+        second_evaluator = compile_logical_evaluator(second_tree, True)
+
+        # Both elements are always evaluated, as in logical_evaluator
+        if operation_name == "and_operation":
+            def compiled_and(environment_dict):
+                first_evaluated  = first_evaluator(environment_dict)
+                second_evaluated = second_evaluator(environment_dict)
+
+                if (first_evaluated == logical_value.TRUE) and (second_evaluated == logical_value.TRUE):
+                    return true_fixed_var
+                return false_fixed_var
+
+            return compiled_and
+
+        else:
+            def compiled_or(environment_dict):
+                first_evaluated  = first_evaluator(environment_dict)
+                second_evaluated = second_evaluator(environment_dict)
+
+                if (first_evaluated == logical_value.TRUE) or (second_evaluated == logical_value.TRUE):
+                    return true_fixed_var
+                return false_fixed_var
+
+            return compiled_or
+
+
+    elif operation_name == "not_operation":
+
+        sole_evaluator = compile_logical_evaluator(tree_to_be_considered.children[0].children[0], True)
+
+        def compiled_not(environment_dict):
+            if sole_evaluator(environment_dict) == logical_value.TRUE:
+                return false_fixed_var
+            return true_fixed_var
+
+        return compiled_not
+
+
+    elif operation_name == "expectation_operation":
+        sole_evaluator = compile_variable_evaluator(tree_to_be_considered.children[0].children[0])
+        return lambda environment_dict: sole_evaluator(environment_dict).get_expectation()
+
+
+    elif operation_name == "variance_operation":
+        sole_evaluator = compile_variable_evaluator(tree_to_be_considered.children[0].children[0])
+        return lambda environment_dict: sole_evaluator(environment_dict).get_variance()
+
+
+    elif operation_name in comparison_operators:
+
+        first_tree, second_tree = tree_to_be_considered.children[0].children
+
+        first_evaluator  = compile_variable_evaluator(first_tree)
+        second_evaluator = compile_variable_evaluator(second_tree)
+        comparison = comparison_operators[operation_name]
+
+        return lambda environment_dict: comparison(first_evaluator(environment_dict), second_evaluator(environment_dict))
+
+
+    elif operation_name == "arithmetic_operation":
+
+        subtree = tree_to_be_considered.children[0].children[0]
+
+        operand_evaluators = [compile_variable_evaluator(another_subtree) for another_subtree in subtree.children]
+        arithmetic = arithmetic_operators[subtree.data]
+
+        if len(operand_evaluators) == 1:
+            sole_evaluator = operand_evaluators[0]
+            return lambda environment_dict: arithmetic(sole_evaluator(environment_dict))
+
+        first_evaluator, second_evaluator = operand_evaluators
+        return lambda environment_dict: arithmetic(first_evaluator(environment_dict), second_evaluator(environment_dict))
+
+
+    raise ValueError("Unknown operation '%s'" % (operation_name, ))
+
+
+
+# Compiles a single token (variable or constant)
+# Strings and numbers are parsed only once, names are looked up in the environment first as in logical_evaluator
+def compile_token_evaluator(given_token):
+
+    variable_name = given_token.value
+
+    # Obtains the value used when the token is not a variable in the environment, None if there is not one
+    if variable_name == "true":
+        default_value = true_fixed_var
+    elif variable_name == "false":
+        default_value = false_fixed_var
+    elif re.match("\".*\"", variable_name):
+        default_value = Fixed("PLACEHOLDER", variable_name.replace("\"", ""))
+    elif numeric_string(variable_name):
+        default_value = Fixed("PLACEHOLDER", float(variable_name))
+    else:
+        default_value = None
+
+    # Only names can be variables
+    if (given_token.type != "NAME") and (default_value is not None):
+        return lambda environment_dict: default_value
+
+    def compiled_variable(environment_dict):
+
+        if variable_name in environment_dict:
+            return environment_dict[variable_name]
+
+        if default_value is None:
+            # Based on "MarcH"'s answer on
+            # https://stackoverflow.com/questions/5574702/how-to-print-to-stderr-in-python
+            print("Variable %s not in environment" % (variable_name, ), file=sys.stderr)
+            sys.exit(1)
+
+        return default_value
+
+    return compiled_variable
@@ -2,6 +2,8 @@
 SUMMARY
 
 Common variable to inherit from, not designed to be used directly.
+Inner points are stored as NumPy arrays, so that operations are computed on all of them at once. Variables holding a single
+value (fixed and discrete ones) use that value instead of an array, broadcast against the inner points of the other operand.
 """
 
 
@@ -11,6 +13,8 @@ import sys
 
 import math
 
+import numpy as np
+
 from .logical_variables import logical_value
 
 
@@ -36,7 +40,8 @@ class Common(object):
         self.probability = probability
 
         # Each variable has inner points, which are not calaculated unless needed to save memory space
-        self.inner_points = None 
+        # np.array of num_inner_points floats, or a single value standing for all of them
+        self.inner_points = None
 
 
 
@@ -61,7 +66,7 @@ class Common(object):
 
     # Obteins the inner points, only calculated once if needed to save memory space (and then saved)
     def get_inner_points(self):
-        if self.inner_points == None:
+        if self.inner_points is None:
             # Calculates the inner points and saves them
              self.inner_points = self.calculate_inner_points()
 
@@ -124,7 +129,7 @@ class Common(object):
     def __add__(self, another_variable):
 
         # Z = X + Y
-        Z = [x + y for x, y in zip(self.get_inner_points(), another_variable.get_inner_points())]
+        Z = self.get_inner_points() + another_variable.get_inner_points()
 
         # E[Z] = E[X] + E[Y]
         E_Z = self.expectation + another_variable.expectation
@@ -146,7 +151,7 @@ class Common(object):
     def __sub__(self, another_variable):
 
         # Z = X - Y
-        Z = [x - y for x, y in zip(self.get_inner_points(), another_variable.get_inner_points())]
+        Z = self.get_inner_points() - another_variable.get_inner_points()
 
         # E[Z] = E[X] - E[Y]
         E_Z = self.expectation - another_variable.expectation
@@ -157,7 +162,7 @@ class Common(object):
 
         A = Common("SUBSTRACT", "operation result", E_Z, Var_Z,
             self.lower_bound - another_variable.upper_bound,
-            self.upper_bound + another_variable.lower_bound,
+            self.upper_bound - another_variable.lower_bound,
             1)
         A.inner_points = Z
 
@@ -168,8 +173,8 @@ class Common(object):
     def __mul__(self, another_variable):
 
         # Z = X * Y
-        Z = [x * y for x, y in zip(self.get_inner_points(), another_variable.get_inner_points())]
-        E_Z = sum(Z)/len(Z)
+        Z = self.get_inner_points() * another_variable.get_inner_points()
+        E_Z = calculate_expectation(Z)
 
 
         # The variance needs to be calculated, always done with trapezoidal integration
@@ -196,32 +201,16 @@ class Common(object):
         a_x, b_x = [self.lower_bound, self.upper_bound]
         a_y, b_y = [another_variable.lower_bound, another_variable.upper_bound]
 
-        # Z = X / Y
-        Z = []
-        for x, y in zip(self.get_inner_points(), another_variable.get_inner_points()):
-
-            # If the denominator is zero
-            if y == 0:
-
-                # If the numerator is zero, set as 0
-                if x == 0:
-                    Z.append(0)
-                    continue
-
-                # If the denominator bounds are both 0, set as infinity
-                # Otherwise skip
-                if (a_y == 0) and (b_y == 0):
-                    Z.append(calculate_sign(x)*math.inf)
-
-            else:
-                Z.append(x/y)
-
+        X = self.get_inner_points()
+        Y = another_variable.get_inner_points()
 
+        # An inner point of the denominator equal to zero cannot be divided by, the same as with Python numbers
+        if contains_zero(Y):
+            raise ZeroDivisionError("division by zero")
 
-        Z = [x / y for x, y in zip(self.get_inner_points(), another_variable.get_inner_points())]
-
-
-        E_Z = sum(Z)/len(Z)
+        # Z = X / Y
+        Z = X / Y
+        E_Z = calculate_expectation(Z)
 
 
         # The variance needs to be calculated, always done with trapezoidal integration
@@ -247,9 +236,21 @@ class Common(object):
     # **
     def __pow__(self, another_variable):
 
+        X = self.get_inner_points()
+        Y = another_variable.get_inner_points()
+
+        # Zero cannot be raised to a negative power, the same as with Python numbers
+        # Each pair of inner points is only checked if there are both zeros and negative exponents
+        if (smallest_value(Y) < 0) and contains_zero(X) and np.any(np.equal(X, 0) & np.less(Y, 0)):
+            raise ZeroDivisionError("0.0 cannot be raised to a negative power")
+
+        # Negative bases raised to fractional exponents have complex results, the same as with Python numbers
+        if (smallest_value(X) < 0) and np.any(np.less(X, 0) & np.not_equal(np.floor(Y), Y)):
+            X = np.asarray(X, dtype=np.complex128)
+
         # Z = X ** Y
-        Z = [x ** y for x, y in zip(self.get_inner_points(), another_variable.get_inner_points())]
-        E_Z = sum(Z)/len(Z)
+        Z = X ** Y
+        E_Z = calculate_expectation(Z)
 
 
         # The variance needs to be calculated, always done with trapezoidal integration
@@ -278,7 +279,7 @@ class Common(object):
         A = Common("OPPOSITE", "operation result", -self.expectation, self.variance, -self.upper_bound, -self.lower_bound, 1)
 
         # Its inner points are those of the original variable multiplied by (-1)
-        self.inner_points = [-a for a in self.get_inner_points()]
+        self.inner_points = -self.get_inner_points()
 
 
 
@@ -319,9 +320,9 @@ class Fixed(Common):
         Common.__init__(self, given_variable_name, "fixed", given_expectation, 0, given_expectation, given_expectation, 1)
 
 
-    # The inner points are always its value
+    # The inner points are always its value, kept as a single value
     def calculate_inner_points(self):
-        return [self.expectation for an_inner_point in range(0, num_inner_points)]
+        return self.expectation
 
 
 
@@ -343,20 +344,53 @@ def element_is_within(given_elem, range_lower_bound, range_upper_bound):
 
 
 
+# Calculates the expectation of a given set of points, assuming all of them have the same probability
+# Z (np.array of floats, or a single value standing for all the points)
+# return float (complex if the points are)
+def calculate_expectation(Z):
+
+    if type(Z) == np.ndarray:
+        return Z.sum().item()/Z.size
+
+    return Z/1
+
+
+
 # Calculates the variance of a given set of points, assuming all of them have the same probability
 # Done using the formula from https://en.wikipedia.org/wiki/Variance#Discrete_random_variable
 # Note that this does not substract (n-1)
-# Z = [(float), ...]
+# Z (np.array of floats, or a single value standing for all the points)
 # E_Z (float): Expectation of the values
 def calculate_variance(Z, E_Z):
 
-    V = 0
+    if type(Z) == np.ndarray:
+        # Sum of the squared deviations (not conjugated, as (z - E_Z)**2 for complex points)
+        deviations = Z - E_Z
+        return np.dot(deviations, deviations).item()/Z.size
+
+    return (Z - E_Z)**2
+
+
+
+# Checks if any of the given values is zero
+# values (np.array, or a single value standing for all of them)
+def contains_zero(values):
+
+    if type(values) == np.ndarray:
+        return not values.all()
+
+    return values == 0
+
+
 
-    for a_z in Z:
-        V += (a_z - E_Z)**2
+# Obtains the smallest of the given values
+# values (np.array, or a single value standing for all of them)
+def smallest_value(values):
 
+    if type(values) == np.ndarray:
+        return values.min()
 
-    return V/len(Z)
+    return values
 
 
 
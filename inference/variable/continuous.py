@@ -8,7 +8,6 @@ Continuous variables.
 import random
 
 import numpy as np
-from scipy.stats import beta, norm, pareto, uniform
 
 from .common import Common, num_inner_points
 
@@ -19,6 +18,14 @@ integral_points = 1 + integral_resolution
 
 
 
+# Obtains a scipy.stats distribution by name (e.g. "norm")
+# scipy.stats takes most of the startup time, so it is only imported once a program uses a continuous distribution
+def scipy_distribution(scipy_distribution_name):
+    import scipy.stats
+    return getattr(scipy.stats, scipy_distribution_name)
+
+
+
 # Creates a number of continuous distributions ranges
 # distribution_hp [(float), ...]: Distribution hyperparameters, refers to both distribution parameters (such as the mean) and interval separation points
 def generate_discretized_continuous_distribution(given_variable_name, distribution_name, distribution_hp):
@@ -275,7 +282,7 @@ class uniform_distribution(common_continuous):
         # https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.uniform.html
         # Based on "abeboparebop"'s answer on
         # https://stackoverflow.com/questions/44572109/what-are-the-arguments-for-scipy-stats-uniform
-        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=uniform(loc = a, scale = (b - a)))
+        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=scipy_distribution("uniform")(loc = a, scale = (b - a)))
 
         common_continuous.__init__(self, given_variable_name, "Uniform", ["a", "b"], [a, b],
             E, Var, lower_bound, upper_bound, probability)
@@ -291,14 +298,14 @@ class uniform_distribution(common_continuous):
         # If the current interval is not within bounds, select points at random
         if not (check_within_interval(self.lower_bound, self.a, self.b, contains=True) or
                 check_within_interval(self.upper_bound, self.a, self.b, contains=True)):
-            return [random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)]
+            return np.array([random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)])
         # Otherwise, select points within the overlapped range and return them
         else:
             considered_range = get_overlapped_range_p_dist([self.lower_bound, self.upper_bound], [self.a, self.b])
 
         r_lower, r_upper = considered_range
 
-        return [random.uniform(r_lower, r_upper) for an_inner_point in range(0, num_inner_points)]
+        return np.array([random.uniform(r_lower, r_upper) for an_inner_point in range(0, num_inner_points)])
 
 
 
@@ -311,7 +318,7 @@ class normal_distribution(common_continuous):
 
         # Distribution calculations completed using
         # https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.norm.html
-        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=norm(loc=μ, scale=σ))
+        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=scipy_distribution("norm")(loc=μ, scale=σ))
 
         common_continuous.__init__(self, given_variable_name, "Normal", ["μ", "σ"], [μ, σ],
             E, Var, lower_bound, upper_bound, probability)
@@ -323,7 +330,7 @@ class normal_distribution(common_continuous):
 
     # Obtains a series of inner points
     def calculate_inner_points(self):
-        return inner_points_within_range(norm(loc=self.μ, scale=self.σ), [self.lower_bound, self.upper_bound])
+        return inner_points_within_range(scipy_distribution("norm")(loc=self.μ, scale=self.σ), [self.lower_bound, self.upper_bound])
 
 
 
@@ -336,7 +343,7 @@ class beta_distribution(common_continuous):
 
         # Distribution calculations completed using
         # https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.beta.html
-        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=beta(α, β))
+        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=scipy_distribution("beta")(α, β))
 
         common_continuous.__init__(self, given_variable_name, "Beta", ["α", "β"], [α, β],
             E, Var, lower_bound, upper_bound, probability)
@@ -351,14 +358,14 @@ class beta_distribution(common_continuous):
 
         # If the current interval is not within bounds, select points at random
         if not (check_within_interval(self.lower_bound, 0, 1, contains=True) or check_within_interval(self.upper_bound, 0, 1, contains=True)):
-            return [random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)]
+            return np.array([random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)])
         # Otherwise, select points within the overlapped range and return them
         else:
             considered_range = get_overlapped_range_p_dist([self.lower_bound, self.upper_bound], [0, 1])
 
         r_lower, r_upper = considered_range
 
-        return inner_points_within_range(beta(self.α, self.β), [self.lower_bound, self.upper_bound])
+        return inner_points_within_range(scipy_distribution("beta")(self.α, self.β), [self.lower_bound, self.upper_bound])
 
 
 
@@ -378,7 +385,7 @@ class pareto_distribution(common_continuous):
         # https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.pareto.html
         # https://en.wikipedia.org/wiki/Pareto_distribution
         # https://towardsdatascience.com/generating-pareto-distribution-in-python-2c2f77f70dbf
-        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=pareto(α, scale=x_m))
+        probability, E, Var = get_PR_E_Var(ab=get_integral_points(lower_bound, upper_bound), cdist=scipy_distribution("pareto")(α, scale=x_m))
 
         common_continuous.__init__(self, given_variable_name, "Pareto", ["x_m", "α"], [x_m, α],
             E, Var, lower_bound, upper_bound, probability)
@@ -393,14 +400,14 @@ class pareto_distribution(common_continuous):
 
         # If the current interval is not within bounds, select points at random
         if self.upper_bound < self.x_m:
-            return [random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)]
+            return np.array([random.uniform(self.lower_bound, self.upper_bound) for _ in range(0, num_inner_points)])
         # Otherwise, select points within the overlapped range and return them
         else:
             considered_range = get_overlapped_range_p_dist([self.lower_bound, self.upper_bound], [self.x_m, np.inf])
 
         r_lower, r_upper = considered_range
 
-        return inner_points_within_range(pareto(self.α, scale=self.x_m), [self.lower_bound, self.upper_bound])
+        return inner_points_within_range(scipy_distribution("pareto")(self.α, scale=self.x_m), [self.lower_bound, self.upper_bound])
 
 
 
@@ -549,7 +556,11 @@ def get_overlapped_range_p_dist(R1, R2):
 
 # Obtains a series of inner points given a distribution and the range to search
 # Assumed that points may occur anywhere within the distribution
+# Candidates are drawn one after the other, but their densities are evaluated together: each group has as many candidates as
+# points are missing, so the group never accepts more than needed and the same candidates are drawn as when evaluating them one
+# at a time
 # R = [a (int | float), b (int | float)]
+# return np.array of floats
 def inner_points_within_range(cdist, R):
 
     # Gets the x, y range of valid points (Monte Carlo)
@@ -562,29 +573,25 @@ def inner_points_within_range(cdist, R):
 
     x_to_select_from = np.linspace(x1, x2, num_inner_points)
 
-    for an_x in x_to_select_from:
-        y2 = max(y2, cdist.pdf(an_x))
+    y2 = max(y2, np.max(cdist.pdf(x_to_select_from)))
 
 
     # Keeps obtaining points until it finishes
-    valid_points_so_far = 0
     P = []
-    while valid_points_so_far < num_inner_points:
+    while len(P) < num_inner_points:
 
-        xn = random.uniform(x1, x2)
-        yn = random.uniform(y1, y2)
+        # [[xn, yn], ...]
+        candidates = np.array([[random.uniform(x1, x2), random.uniform(y1, y2)] for _ in range(len(P), num_inner_points)])
 
-        if yn <= cdist.pdf(xn):
-            P.append(xn)
-            valid_points_so_far += 1
+        P.extend(candidates[candidates[:, 1] <= cdist.pdf(candidates[:, 0]), 0].tolist())
 
-    return P
+    return np.array(P)
 
 
     # Obtains a series of inner points
     def calculate_inner_points(self):
 
-        cdist=norm(loc=self.μ, scale=self.σ)
+        cdist=scipy_distribution("norm")(loc=self.μ, scale=self.σ)
 
         # Gets the x, y range of valid points (Monte Carlo)
         x1, x2 = self.lower_bound, self.upper_bound
@@ -60,9 +60,9 @@ class Discrete_Qualitative(Common):
 
         Common.__init__(self, given_variable_name, "discrete qualitative", given_expectation, 0, given_expectation, given_expectation, given_probability)
 
-    # The inner points are always its value
+    # The inner points are always its value, kept as a single value (see common.py)
     def calculate_inner_points(self):
-        return [given_expectation for an_inner_point in range(0, num_inner_points)]
+        return self.expectation
 
 
 
@@ -78,6 +78,6 @@ class Discrete_Numeric(Common):
 
         Common.__init__(self, given_variable_name, "numeric qualitative", given_expectation, 0, given_expectation, given_expectation, given_probability)
 
-    # The inner points are always its value
+    # The inner points are always its value, kept as a single value (see common.py)
     def calculate_inner_points(self):
-        return [given_expectation for an_inner_point in range(0, num_inner_points)]
+        return self.expectation
@@ -0,0 +1,172 @@
+"""
+SUMMARY
+
+Evaluates a sentence over a whole frontier table at once, provided the columns corresponding to the tokens.
+Only point (discrete) values are supported, so the comparisons reduce to the ones of the values themselves.
+"""
+
+
+import re
+import sys
+
+import numpy as np
+
+from .sentence_evaluation import numeric_string
+
+
+
+# Evaluates a sentence in a vectorized way given the frontier columns
+# tree_to_be_considered (Parse Tree): Parsed tree corresponding to the expression, or None if no observation (assumed true)
+# columns_dict ({"token":column (np.array), ...}): Values corresponding to each token, one row per frontier trace
+# num_rows (int): Number of rows in the frontier
+# final_result (bool): Whether or not this is the final or a recursion result (if yes, return a boolean column)
+# return column (np.array) or a scalar if the expression does not depend on any column
+def vectorized_evaluator(tree_to_be_considered, columns_dict, num_rows, final_result=True):
+
+    if tree_to_be_considered == None:
+        return np.ones(num_rows, dtype=bool)
+
+    operation_name = tree_to_be_considered.data
+
+    if operation_name == "e":
+
+        variable_name = tree_to_be_considered.children[0].value
+
+        # Obtains the variable column
+        if variable_name in columns_dict:
+            operation_value = columns_dict[variable_name]
+
+            # Variables assigned only in some branches are stored as None in the other ones
+            if (operation_value.dtype == object) and any(a_value is None for a_value in operation_value):
+                print("Variable %s not in environment" % (variable_name, ), file=sys.stderr)
+                sys.exit(1)
+
+        # Special case when assigned a value such as true or false
+        elif variable_name == "true":
+            operation_value = 1.0
+        elif variable_name == "false":
+            operation_value = 0.0
+
+        # Strings
+        elif re.match("\".*\"", variable_name):
+            operation_value = variable_name.replace("\"", "")
+
+        # Numbers (ints or floats)
+        elif numeric_string(variable_name):
+            operation_value = float(variable_name)
+
+        # Without traces (e.g. all of them were rejected) no variable is ever read, as in the circuit
+        elif num_rows == 0:
+            operation_value = np.full(0, None, dtype=object)
+
+        else:
+            print("Variable %s not in environment" % (variable_name, ), file=sys.stderr)
+            sys.exit(1)
+
+
+    elif operation_name == "and_operation":
+        first_tree, second_tree = tree_to_be_considered.children[0].children
+        operation_value = np.logical_and(vectorized_evaluator(first_tree, columns_dict, num_rows, True),
+                                            vectorized_evaluator(second_tree, columns_dict, num_rows, True))
+
+
+    elif operation_name == "or_operation":
+        first_tree, second_tree = tree_to_be_considered.children[0].children
+        operation_value = np.logical_or(vectorized_evaluator(first_tree, columns_dict, num_rows, True),
+                                            vectorized_evaluator(second_tree, columns_dict, num_rows, True))
+
+
+    elif operation_name == "not_operation":
+        sole_tree = tree_to_be_considered.children[0].children[0]
+        operation_value = np.logical_not(vectorized_evaluator(sole_tree, columns_dict, num_rows, True))
+
+
+    # The expectation of a point value is the value itself
+    elif operation_name == "expectation_operation":
+        sole_tree = tree_to_be_considered.children[0].children[0]
+        operation_value = vectorized_evaluator(sole_tree, columns_dict, num_rows, False)
+
+
+    # Point values have no variance
+    elif operation_name == "variance_operation":
+        operation_value = 0.0
+
+
+    elif operation_name in comparison_operations:
+
+        first_tree, second_tree = tree_to_be_considered.children[0].children
+
+        first_evaluated  = vectorized_evaluator(first_tree, columns_dict, num_rows, False)
+        second_evaluated = vectorized_evaluator(second_tree, columns_dict, num_rows, False)
+
+        operation_value = comparison_operations[operation_name](first_evaluated, second_evaluated)
+
+
+    elif operation_name == "arithmetic_operation":
+
+        subtree = tree_to_be_considered.children[0].children[0]
+
+        values_to_consider = [vectorized_evaluator(another_subtree, columns_dict, num_rows, False)
+                                for another_subtree in subtree.children]
+
+        operation_value = arithmetic_operations[subtree.data](*values_to_consider)
+
+
+    if final_result:
+        return broadcast_to_rows(obtain_logical_column(operation_value), num_rows)
+    else:
+        return operation_value
+
+
+
+# Obtains the logical value of a column (or scalar)
+# false if the value equals "" or 0, true otherwise
+def obtain_logical_column(given_values):
+
+    if type(given_values).__name__ != "ndarray":
+        return not ((given_values == 0) or (given_values == ""))
+
+    if given_values.dtype == bool:
+        return given_values
+    elif given_values.dtype != object:
+        return given_values != 0
+    else:
+        return np.array([not ((a_value == 0) or (a_value == "")) for a_value in given_values], dtype=bool)
+
+
+
+# Transforms a scalar into a column with the requested number of rows, columns are returned as is
+def broadcast_to_rows(given_values, num_rows):
+
+    if type(given_values).__name__ == "ndarray":
+        return given_values
+
+    if type(given_values).__name__ == "str":
+        return np.full(num_rows, given_values, dtype=object)
+    else:
+        return np.full(num_rows, given_values)
+
+
+
+
+# Comparisons between point values, the result is a boolean column
+comparison_operations = {
+    "equal_operation":np.equal,
+    "not_equal_operation":np.not_equal,
+    "less_operation":np.less,
+    "lt_operation":np.less_equal,
+    "greater_operation":np.greater,
+    "gt_operation":np.greater_equal
+}
+
+
+# Arithmetic operations between point values
+# Division and exponentiation follow numpy, so a zero denominator results in an infinite value instead of an exception
+arithmetic_operations = {
+    "add":np.add,
+    "substract":np.subtract,
+    "opposite":np.negative,
+    "product":np.multiply,
+    "division":np.true_divide,
+    "exponentiation":np.power
+}
@@ -6,6 +6,8 @@ Takes command line arguments and reads file contents, interacts with middle laye
 """
 
 
+import sys
+
 import aux_handler.handler
 from inference import inference
 import parser.parser
@@ -13,7 +15,7 @@ import parser.parser
 
 
 # Reads the goal and file name
-[inference_method, program_filepath, calculate_time] = aux_handler.handler.program_inputs()
+[inference_method, program_filepath, requested_options] = aux_handler.handler.program_inputs()
 
 # Parses the entire file
 # Reads the entire file as a string
@@ -21,6 +23,21 @@ import parser.parser
 with open(program_filepath, "r") as ff:
     parsed_program = parser.parser.Program_structure(ff.read(), program_filepath)
 
+# Eliminates the variables which are no longer used, unless requested otherwise
+# The changes are shown with the time
+if requested_options["automatic_elimination"]:
+    elimination_report = parsed_program.eliminate_dead_variables()
+
 
 # Runs a given inference method
-inference.infer(parsed_program, inference_method, calculate_time)
+inference.infer(parsed_program, inference_method, requested_options["calculate_time"], merge_equivalent_nodes=requested_options["merge_nodes"],
+    elimination_order=requested_options["elimination_order"], factorize=requested_options["factorize"],
+    num_samples=requested_options["num_samples"], target_error=requested_options["target_error"], time_budget=requested_options["time_budget"],
+    posterior_sampling=requested_options["posterior_sampling"], num_workers=requested_options["num_workers"], seed=requested_options["seed"],
+    burn_in=requested_options["burn_in"], thinning=requested_options["thinning"], num_chains=requested_options["num_chains"],
+    uniform_sequence=requested_options["uniform_sequence"], array_circuit=requested_options["array_circuit"])
+
+if requested_options["calculate_time"] and requested_options["automatic_elimination"]:
+    print("Automatic elimination: %d variables eliminated by %d inserted statements, %d unused assignments dropped" % (
+        elimination_report.num_eliminated_variables, elimination_report.num_inserted_eliminations, elimination_report.num_dropped_assignments),
+        file=sys.stderr)
@@ -0,0 +1,271 @@
+"""
+SUMMARY
+
+Static dependency analysis splitting a program into independent components with respect to its query.
+Two statements depend on each other if one reads (or, for "if" statements, may keep) a variable the other one assigned.
+A marginalization also depends on the variables it does not list but which are read after it, since each group of traces keeps
+the values of its first trace for them.
+Statements in different components never share random choices, so:
+    - components the return expression does not read are skipped if they have no observations or rejections
+    - components the return expression does not read but which have observations or rejections are kept (with the first
+      conjuncts of the query): their observations would cancel out, since they have the same probability with and without
+      the query, unless they can never be met, in which case the whole program has no valid trace at all
+    - if the return expression is a conjunction ("&&") of expressions reading different components, each one is inferred
+      separately and the results are multiplied
+"""
+
+
+from lark import Token, Tree
+
+from .liveness import assigned_variable_names, assignment_statements, circuit_inspection_statements, conditional_statements
+from .liveness import flatten_statements, read_variable_names, statement_block
+
+
+
+# Statements whose component is kept even if the query does not read it
+evidence_statements = ["observe", "reject"]
+
+
+
+# Union-find over statement indices
+class Disjoint_sets(object):
+
+    def __init__(self, num_elements):
+        self.parents = list(range(0, num_elements))
+
+
+    # Obtains the representative of the set of an element
+    def find(self, an_element):
+
+        while self.parents[an_element] != an_element:
+            # Path halving
+            self.parents[an_element] = self.parents[self.parents[an_element]]
+            an_element = self.parents[an_element]
+
+        return an_element
+
+
+    def union(self, first_element, second_element):
+        self.parents[self.find(first_element)] = self.find(second_element)
+
+
+
+# Splits an expression into its conjuncts, "(a && (b && c))" -> [a, b, c]
+# return [expression tree, ...]
+def obtain_conjuncts(expression_tree):
+
+    found_conjuncts = []
+    trees_to_be_explored = [expression_tree]
+
+    while trees_to_be_explored != []:
+        a_tree = trees_to_be_explored.pop()
+
+        if a_tree.data == "and_operation":
+            trees_to_be_explored.extend(reversed(a_tree.children[0].children))
+        else:
+            found_conjuncts.append(a_tree)
+
+    return found_conjuncts
+
+
+
+# Joins expressions with "&&"
+def conjunction(given_expressions):
+
+    joined_expression = given_expressions[0]
+
+    for another_expression in given_expressions[1:]:
+        joined_expression = Tree("and_operation", [Tree("and", [joined_expression, another_expression])])
+
+    return joined_expression
+
+
+
+# Obtains the variables a statement reads, including the ones whose previous values an "if" statement may keep
+def linked_variable_names(given_statement):
+
+    if given_statement.data in conditional_statements:
+        return read_variable_names(given_statement.children) | assigned_variable_names(given_statement)
+
+    # The assigned variable is the first child
+    if given_statement.data == "wlsr":
+        return read_variable_names(given_statement.children[1:])
+
+    if len(assigned_variable_names(given_statement)) > 0:
+        return read_variable_names(given_statement.children[1:])
+
+    return read_variable_names(given_statement.children)
+
+
+
+# Obtains the variables read by the statements after each one or by the return expression, before they are assigned again
+# ("if" statements may keep the previous values)
+# statements [statement tree, ...]: See liveness.flatten_statements
+# return [{"variable name", ...}, ...], one per statement
+def obtain_later_read_names(statements, output_tree):
+
+    later_read_names = [None]*len(statements)
+    read_names = read_variable_names([output_tree])
+
+    for a_statement_index in range(len(statements) - 1, -1, -1):
+
+        later_read_names[a_statement_index] = read_names
+
+        a_statement = statements[a_statement_index]
+
+        if a_statement.data == "elimvar":
+            continue
+
+        if a_statement.data in assignment_statements + ["wlsr"]:
+            read_names = read_names - assigned_variable_names(a_statement)
+
+        read_names = read_names | linked_variable_names(a_statement)
+
+    return later_read_names
+
+
+
+# Whether or not a marginalization changes the value of a variable read afterwards: each group of traces keeps the values of its
+# first trace for the variables which are not listed on their own (the ones within a listed expression may differ in the group)
+# Conservative within "if" statements, the whole statement counts as read after its marginalizations
+# return bool
+def marginalization_changes_read_variables(instructions_tree, output_tree):
+
+    statements = flatten_statements(instructions_tree)
+    later_read_names = obtain_later_read_names(statements, output_tree)
+
+    assigned_names = set()
+
+    for a_statement_index, a_statement in enumerate(statements):
+
+        assigned_names |= assigned_variable_names(a_statement)
+
+        for a_marg_tree in a_statement.find_data("marg"):
+
+            listed_names = {a_child.children[0].value for a_child in a_marg_tree.children
+                            if isinstance(a_child, Tree) and (len(a_child.children) == 1) and isinstance(a_child.children[0], Token) and
+                            (a_child.children[0].type == "NAME")}
+
+            read_names = later_read_names[a_statement_index]
+
+            if a_statement.data != "marg":
+                read_names = read_names | linked_variable_names(a_statement)
+
+            if len((read_names & assigned_names) - listed_names) > 0:
+                return True
+
+    return False
+
+
+
+# Splits a program into the independent subprograms needed by its query
+# The probability of the query is the product of the probabilities of the returned subprograms
+# return [[instructions tree, output tree], ...], the original program alone if it cannot be split
+def split_independent_components(instructions_tree, output_tree):
+
+    unsplit_program = [[instructions_tree, output_tree]]
+
+    # Their output depends on the whole program
+    if any(True for _tree in instructions_tree.find_pred(lambda t: t.data in circuit_inspection_statements)):
+        return unsplit_program
+
+    statements = flatten_statements(instructions_tree)
+    statement_sets = Disjoint_sets(len(statements))
+
+    # Last statement assigning each variable
+    # {"variable name":statement index, ...}
+    last_assignments = {}
+
+    # Statement which assigned each of the variables eliminated by a statement
+    # {statement index:{"variable name":statement index, ...}, ...}
+    elimination_assignments = {}
+
+    # Observations which do not read any variable, they are kept in every subprogram
+    constant_statements = []
+
+    later_read_names = obtain_later_read_names(statements, output_tree)
+
+    for a_statement_index in range(0, len(statements)):
+
+        a_statement = statements[a_statement_index]
+
+        if a_statement.data == "elimvar":
+            elimination_assignments[a_statement_index] = {a_name:last_assignments[a_name]
+                                                            for a_name in read_variable_names(a_statement.children) if a_name in last_assignments}
+            continue
+
+        linked_names = linked_variable_names(a_statement)
+
+        # Also within "if" statements
+        if any(True for _tree in a_statement.find_data("marg")):
+            linked_names = linked_names | later_read_names[a_statement_index]
+
+        assigned_names = assigned_variable_names(a_statement)
+
+        if (len(assigned_names) == 0) and (len([a_name for a_name in linked_names if a_name in last_assignments]) == 0):
+            constant_statements.append(a_statement_index)
+
+        for a_name in linked_names:
+            if a_name in last_assignments:
+                statement_sets.union(a_statement_index, last_assignments[a_name])
+
+        for a_name in assigned_names:
+            last_assignments[a_name] = a_statement_index
+
+    # Groups the conjuncts of the return expression reading the same components
+    # [[{component, ...}, [conjunct, ...]], ...]
+    conjunct_groups = []
+
+    for a_conjunct in obtain_conjuncts(output_tree):
+
+        conjunct_components = {statement_sets.find(last_assignments[a_name]) for a_name in read_variable_names([a_conjunct])
+                                if a_name in last_assignments}
+
+        joined_group = [conjunct_components, [a_conjunct]]
+
+        for a_group in list(conjunct_groups):
+            if len(a_group[0] & conjunct_components) > 0:
+                joined_group = [a_group[0] | joined_group[0], a_group[1] + joined_group[1]]
+                conjunct_groups.remove(a_group)
+
+        conjunct_groups.append(joined_group)
+
+    all_components = {statement_sets.find(a_statement_index) for a_statement_index in range(0, len(statements))
+                        if (a_statement_index not in elimination_assignments) and (a_statement_index not in constant_statements)}
+
+    # Components not read by the query but with evidence are kept with the first group
+    evidence_components = {statement_sets.find(a_statement_index) for a_statement_index in range(0, len(statements))
+                            if (a_statement_index not in constant_statements) and
+                            any(True for _tree in statements[a_statement_index].find_pred(lambda t: t.data in evidence_statements))}
+
+    conjunct_groups[0][0] |= evidence_components - {a_component for group_components, _group_conjuncts in conjunct_groups
+                                                    for a_component in group_components}
+
+    # Nothing to split
+    if (len(conjunct_groups) == 1) and (conjunct_groups[0][0] == all_components):
+        return unsplit_program
+
+    subprograms = []
+
+    for group_components, group_conjuncts in conjunct_groups:
+
+        group_statements = []
+
+        for a_statement_index in range(0, len(statements)):
+
+            if a_statement_index in elimination_assignments:
+
+                # Only the variables of the group are eliminated
+                kept_tokens = [a_token for a_token in statements[a_statement_index].children
+                                if (a_token.value in elimination_assignments[a_statement_index]) and
+                                (statement_sets.find(elimination_assignments[a_statement_index][a_token.value]) in group_components)]
+
+                if kept_tokens != []:
+                    group_statements.append(Tree("elimvar", kept_tokens))
+
+            elif (statement_sets.find(a_statement_index) in group_components) or (a_statement_index in constant_statements):
+                group_statements.append(statements[a_statement_index])
+
+        subprograms.append([statement_block(group_statements), conjunction(group_conjuncts)])
+
+    return subprograms
@@ -0,0 +1,240 @@
+"""
+SUMMARY
+
+Static liveness analysis over the instructions tree of a program.
+Determines, after each statement, which variables are still read by the following statements (expressions, observations,
+rejections, "if" conditions) or by the return expression. The instructions tree is then rewritten so that:
+    - variables which are no longer read are eliminated ("eliminate_variable") as soon as they become dead, which keeps the
+      frontier of traces small
+    - deterministic assignments whose result is never read are dropped
+
+The rewritten tree only uses the existing statements, so every inference method supports it.
+"""
+
+
+from lark import Token, Tree
+
+
+
+# Statements assigning a variable, the variable token is always the first child
+assignment_statements = ["assgn", "flip", "bern", "disc_num", "disc_qual", "d_uniform", "d_gaussian", "d_pareto", "d_beta",
+                            "d_uniform_num", "d_gaussian_num", "d_pareto_num", "d_beta_num"]
+
+
+# "if" statements
+conditional_statements = ["ite", "ite_elseif", "ite_complete"]
+
+
+# Statements whose output depends on the traces themselves, programs using them are not rewritten
+# so that what they show is the program as written
+circuit_inspection_statements = ["show_circuit", "print", "print_combined"]
+
+
+
+# Obtains the variable names read within a list of trees (or tokens)
+# return {"variable name", ...}
+def read_variable_names(given_trees):
+
+    found_names = set()
+
+    for a_tree in given_trees:
+
+        if isinstance(a_tree, Token):
+            if a_tree.type == "NAME":
+                found_names.add(a_tree.value)
+            continue
+
+        for a_token in a_tree.scan_values(lambda v: isinstance(v, Token) and (v.type == "NAME")):
+            found_names.add(a_token.value)
+
+    return found_names
+
+
+
+# Obtains the statements within a statement block ("s" and "seq" trees), in program order
+# return [statement tree, ...]
+def flatten_statements(given_block_tree):
+
+    found_statements = []
+    trees_to_be_explored = [given_block_tree]
+
+    while trees_to_be_explored != []:
+        a_tree = trees_to_be_explored.pop()
+
+        if a_tree.data in ["s", "seq"]:
+            trees_to_be_explored.extend(reversed(a_tree.children))
+        else:
+            found_statements.append(a_tree)
+
+    return found_statements
+
+
+
+# Creates a statement block from a list of statements
+# return block tree (lark Tree)
+def statement_block(given_statements):
+    return Tree("s", [Tree("seq", given_statements)])
+
+
+
+# Obtains the variables which may be assigned by a statement, including the ones within "if" statements
+# return {"variable name", ...}
+def assigned_variable_names(given_statement):
+
+    if given_statement.data in assignment_statements:
+        return {given_statement.children[0].value}
+
+    if given_statement.data == "wlsr":
+        return read_variable_names([given_statement.children[0]])
+
+    found_names = set()
+
+    if given_statement.data in conditional_statements:
+        for a_subtree in given_statement.find_pred(lambda t: t.data in assignment_statements + ["wlsr"]):
+            found_names |= assigned_variable_names(a_subtree)
+
+    return found_names
+
+
+
+# Keeps track of the changes made to a program
+class Liveness_report(object):
+
+    def __init__(self):
+        # Number of "eliminate_variable" statements inserted
+        self.num_inserted_eliminations = 0
+        # Number of variables eliminated by them
+        self.num_eliminated_variables = 0
+        # Number of assignments dropped
+        self.num_dropped_assignments = 0
+
+
+
+# Goes through a list of statements backwards, dropping the dead assignments
+# live_after ({"variable name", ...}): Variables read after the last statement
+# report (Liveness_report): Updated with the dropped assignments
+# return [kept statements (list), variables read before the first statement (set), variables read after each kept statement (list of sets)]
+def analyze_statements(given_statements, live_after, report):
+
+    live_variables = set(live_after)
+    kept_statements = []
+    live_after_kept_statements = []
+
+    for a_statement in reversed(given_statements):
+
+        live_after_statement = set(live_variables)
+        data_from_tree = a_statement.data
+
+        if data_from_tree in assignment_statements:
+
+            assigned_name = a_statement.children[0].value
+
+            # Only deterministic assignments are dropped, random variables may not add up to a probability of 1
+            if (data_from_tree == "assgn") and (assigned_name not in live_variables):
+                report.num_dropped_assignments += 1
+                continue
+
+            live_variables.discard(assigned_name)
+            live_variables |= read_variable_names(a_statement.children[1:])
+
+        elif data_from_tree == "wlsr":
+            live_variables -= read_variable_names([a_statement.children[0]])
+            live_variables |= read_variable_names(a_statement.children[1:])
+
+        # Eliminated variables cannot be read afterwards
+        elif data_from_tree == "elimvar":
+            live_variables -= read_variable_names(a_statement.children)
+
+        elif data_from_tree in conditional_statements:
+            [a_statement, live_variables] = analyze_conditional(a_statement, live_variables, report)
+
+        # Observations, rejections, marginalizations, and prints only read variables
+        else:
+            live_variables |= read_variable_names(a_statement.children)
+
+        kept_statements.append(a_statement)
+        live_after_kept_statements.append(live_after_statement)
+
+    kept_statements.reverse()
+    live_after_kept_statements.reverse()
+
+    return [kept_statements, live_variables, live_after_kept_statements]
+
+
+
+# Analyzes an "if" statement, its branches are analyzed (and rewritten) separately
+# Variables are live before the statement if they are read by any condition or branch,
+# or if they are live after it and there is no "else" branch
+# return [rewritten statement (lark Tree), variables read before the statement (set)]
+def analyze_conditional(given_statement, live_after, report):
+
+    if given_statement.data == "ite_elseif":
+        num_branches = len(given_statement.children)//2
+        live_variables = set(live_after)
+    else:
+        num_branches = (len(given_statement.children) - 1)//2
+        live_variables = set()
+
+    new_children = []
+
+    for a_child_index in range(0, len(given_statement.children)):
+
+        a_child = given_statement.children[a_child_index]
+
+        # Conditions
+        if (a_child_index % 2 == 0) and (a_child_index < 2*num_branches):
+            live_variables |= read_variable_names([a_child])
+            new_children.append(a_child)
+            continue
+
+        # Branch contents
+        [kept_statements, live_before_branch, _live_after_kept] = analyze_statements(flatten_statements(a_child), live_after, report)
+
+        live_variables |= live_before_branch
+        new_children.append(statement_block(kept_statements))
+
+    return [Tree(given_statement.data, new_children), live_variables]
+
+
+
+# Rewrites the instructions of a program, eliminating the variables as soon as they are no longer read and dropping the
+# assignments which are never read
+# Variables assigned within "if" statements are only eliminated after the "if" statement
+# return [instructions tree (lark Tree), report (Liveness_report)]
+def eliminate_dead_variables(instructions_tree, output_tree):
+
+    report = Liveness_report()
+
+    if any(True for _tree in instructions_tree.find_pred(lambda t: t.data in circuit_inspection_statements)):
+        return [instructions_tree, report]
+
+    [kept_statements, _live_at_start, live_after_kept_statements] = analyze_statements(flatten_statements(instructions_tree),
+        read_variable_names([output_tree]), report)
+
+    # Variables which may exist at this point of the program
+    existing_variables = set()
+    rewritten_statements = []
+
+    for a_statement, live_after_statement in zip(kept_statements, live_after_kept_statements):
+
+        rewritten_statements.append(a_statement)
+
+        if a_statement.data == "elimvar":
+            existing_variables -= read_variable_names(a_statement.children)
+            continue
+
+        existing_variables |= assigned_variable_names(a_statement)
+
+        dead_variables = existing_variables - live_after_statement
+
+        if len(dead_variables) == 0:
+            continue
+
+        # Sorted for repeatability
+        rewritten_statements.append(Tree("elimvar", [Token("NAME", a_name) for a_name in sorted(dead_variables)]))
+        existing_variables -= dead_variables
+
+        report.num_inserted_eliminations += 1
+        report.num_eliminated_variables += len(dead_variables)
+
+    return [statement_block(rewritten_statements), report]
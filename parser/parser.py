@@ -5,25 +5,37 @@ Parses the SimPPL language from .sppl file. Obtained from assignment file and ba
 Modified following the instructor comment on MS Teams using https://lark-parser.readthedocs.io/en/latest/examples/turtle_dsl.html and
 https://lark-parser.readthedocs.io/en/latest/examples/calc.html as examples.
 Modified to process return as an expression, easier to parse. This will not cause any issues since it will be the last expression.
+
+Programs are parsed with a LALR parser, whose parse table is cached on disk (per user cache directory) after the first run so
+that startup does not need to rebuild it. The cache is pickled, so it is never kept in a shared directory where other users could
+replace it; if the cache directory cannot be used, the parser is built without cache. The few programs the LALR lexer cannot tokenize unambiguously (e.g. "(-5)"
+or a variable named "E" inside an expression) are parsed with the original Earley parser instead, built only when needed.
 """
 
 
 import os
+import sys
 
 from lark import Lark
+from lark.exceptions import UnexpectedInput
+
+from .independence import split_independent_components
+from .liveness import eliminate_dead_variables
 
 
 # Common lark from https://github.com/lark-parser/lark/blob/master/lark/grammars/common.lark
+# The grammar is LALR(1) compatible:
+#   - sequences are left-recursive, so the parser can decide between a new statement and "return" after each ";"
+#   - the if/else if/else statements share their branch rules, so the statement type is only decided once its end is reached
+#   - "true" and "false" are parsed as names, which is how the evaluators already handle them
 
-SimPPL_parser = Lark(r"""
+SimPPL_grammar = r"""
     e: NAME
     | ESCAPED_STRING
     | SIGNED_NUMBER
     | and              -> and_operation
     | or               -> or_operation
     | not              -> not_operation
-    | "true"           -> true
-    | "false"          -> false
     | expect           -> expectation_operation
     | var              -> variance_operation
     | equal_check      -> equal_operation
@@ -47,7 +59,7 @@ SimPPL_parser = Lark(r"""
     less_check:       ("(" "<" e e ")"|"(" e "<" e ")")
     lt_check:         ("(" "<=" e e ")"|"(" e "<=" e ")")
     greater_check:    ("(" ">" e e ")"|"(" e ">" e ")")
-    gt_check:         ("("" >=" e e ")"|"(" e ">=" e ")")
+    gt_check:         ("(" ">=" e e ")"|"(" e ">=" e ")")
 
     arithmetic: add
     | substract
@@ -66,11 +78,13 @@ SimPPL_parser = Lark(r"""
 
 
 
-    s: assgn
+    s: _statement
+    | seq
+
+    _statement: assgn
     | flip
     | observe
     | ite
-    | seq
     | ite_elseif
     | ite_complete
     | reject
@@ -92,15 +106,22 @@ SimPPL_parser = Lark(r"""
     | wlsr
     | show_circuit
 
+    single_s: _statement -> s
+
 
     assgn: NAME "=" e
     flip: NAME ("∼"|"~") "flip" (SIGNED_NUMBER | "(" SIGNED_NUMBER ")")
     observe: "observe" e
-    seq: s ";" s
+    seq: s ";" single_s
+
+    ite: _if_branch _else_branch
+    ite_elseif: _if_branch | _if_branch _else_if_branches
+    ite_complete: _if_branch _else_if_branches _else_branch
 
-    ite: "if" e "{" s ";"* "}" "else" "{" s ";"* "}"
-    ite_elseif: "if" e "{" s ";"* "}" ["else" "if" e "{" s ";"* "}"]*
-    ite_complete: "if" e "{" s ";"* "}" ["else" "if" e "{" s ";"* "}"]* "else" "{" s ";"* "}"
+    _if_branch: "if" e "{" s ";"* "}"
+    _else_if_branches: _else_if_branch | _else_if_branches _else_if_branch
+    _else_if_branch: "else" "if" e "{" s ";"* "}"
+    _else_branch: "else" "{" s ";"* "}"
 
     reject: "reject" e
     marg: "marginalize" "(" e ["," e ]* ")"
@@ -148,7 +169,75 @@ SimPPL_parser = Lark(r"""
         %import common.ESCAPED_STRING
 
 
-    """, start="p")
+    """
+
+
+# Obtains the filepath of the on-disk cache of the LALR parser, within the cache directory of the current user
+# ($XDG_CACHE_HOME/guillemot, ~/.cache/guillemot by default), created if needed and only readable by its owner
+# lark stores the grammar hash in the cache and rebuilds it automatically if the grammar changes
+# One file per Python version, since the parse table is pickled
+# return filepath (str), or None if the directory cannot be created, is not writable, or belongs to another user
+def obtain_parser_cache_filepath():
+
+    cache_directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "guillemot")
+
+    try:
+        os.makedirs(cache_directory, mode=0o700, exist_ok=True)
+    except OSError:
+        return None
+
+    if not os.access(cache_directory, os.W_OK):
+        return None
+
+    if hasattr(os, "getuid") and (os.stat(cache_directory).st_uid != os.getuid()):
+        return None
+
+    return os.path.join(cache_directory, "parser_py%d%d.cache" % sys.version_info[:2])
+
+
+
+# Builds the LALR parser, from the on-disk cache if available
+# The parser is built without cache if the cache cannot be written
+# maybe_placeholders=False keeps the optional elements out of the tree (default since lark 1.0), the inference code expects them removed
+def build_lalr_parser(cache_filepath):
+
+    if cache_filepath != None:
+        try:
+            return Lark(SimPPL_grammar, start="p", parser="lalr", maybe_placeholders=False, cache=cache_filepath)
+        except OSError:
+            pass
+
+    return Lark(SimPPL_grammar, start="p", parser="lalr", maybe_placeholders=False)
+
+
+
+# On-disk cache of the LALR parser, None if no cache is used
+parser_cache_filepath = obtain_parser_cache_filepath()
+
+SimPPL_parser = build_lalr_parser(parser_cache_filepath)
+
+
+# Earley parser, only built if a program cannot be parsed by the LALR parser
+SimPPL_earley_parser = None
+
+
+
+# Parses a program, first with the LALR parser and then, if it fails, with the Earley parser
+# Programs invalid for both parsers raise the Earley parser exception
+# return parse tree (lark Tree)
+def parse_program_text(given_program_file_text):
+
+    global SimPPL_earley_parser
+
+    try:
+        return SimPPL_parser.parse(given_program_file_text)
+    except UnexpectedInput:
+        pass
+
+    if SimPPL_earley_parser == None:
+        SimPPL_earley_parser = Lark(SimPPL_grammar, start="p", maybe_placeholders=False)
+
+    return SimPPL_earley_parser.parse(given_program_file_text)
 
 
 
@@ -161,8 +250,26 @@ class Program_structure(object):
     def __init__(self, given_program_file_text, program_filepath):
         # Stores the original parse tree in case it is needed in the future
         # https://lark-parser.readthedocs.io/en/latest/json_tutorial.html
-        self.original_parsed_tree = SimPPL_parser.parse(given_program_file_text)
+        self.original_parsed_tree = parse_program_text(given_program_file_text)
 
         # Obtains the instructions and output (return) trees
         self.instructions_tree = self.original_parsed_tree.children[0]
         self.output_tree = self.original_parsed_tree.children[1]
+
+
+    # Eliminates the variables as soon as they are no longer used and drops the assignments which are never used
+    # (see parser/liveness.py), the original parse tree is kept unchanged
+    # return report (liveness.Liveness_report)
+    def eliminate_dead_variables(self):
+
+        [self.instructions_tree, report] = eliminate_dead_variables(self.instructions_tree, self.output_tree)
+
+        return report
+
+
+
+    # Splits the program into the independent subprograms needed by its query (see parser/independence.py)
+    # The probability of the query is the product of the probabilities of the subprograms
+    # return [[instructions tree, output tree], ...]
+    def independent_subprograms(self):
+        return split_independent_components(self.instructions_tree, self.output_tree)
@@ -0,0 +1,109 @@
+"""
+SUMMARY
+
+Compares the circuit built as objects with the circuit built into arrays (--array-circuit, see inference/inference_arrays.py):
+memory kept once built, peak memory while building and enumerating, build and enumeration times, dump size, and loading time
+(memory mapped).
+All of them obtain the same results:
+
+    python3 -m performance.array_circuit
+"""
+
+
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from inference.inference_arrays import load_array_circuit
+from inference.inference_circuit import Circuit, print_conditional_probability
+from .aux_performance import timed_result
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 14 (no marg.)", generate_pigeon_program(14, marginalize=False)],
+    ["city travel, 10", generate_city_travel_program(10)],
+    ["coin observation, 16", generate_coin_observation_program(16)]
+]
+
+
+
+# Obtains the total size of the files within a directory
+def directory_size(directory_path):
+    return sum(os.path.getsize(os.path.join(directory_path, a_filename)) for a_filename in os.listdir(directory_path))
+
+
+
+# Builds a circuit and enumerates it, tracing the memory allocated meanwhile
+# The build is timed separately, since tracing slows down every allocation
+# return [circuit, printed result (str), build time in seconds (float), enumeration time in seconds (float), bytes kept after the build
+# (int), peak bytes (int)]
+def traced_enumeration(parsed_program, array_storage):
+
+    gc.collect()
+
+    t1 = time.time()
+    Circuit(parsed_program.instructions_tree, parsed_program.output_tree, array_storage=array_storage)
+    t2 = time.time()
+
+    gc.collect()
+    tracemalloc.start()
+
+    built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree, array_storage=array_storage)
+    kept_bytes = tracemalloc.get_traced_memory()[0]
+
+    [enumeration_result, enumeration_time, _returned] = timed_result(built_circuit.infer_by_enumeration)
+
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return [built_circuit, enumeration_result, t2 - t1, enumeration_time, kept_bytes, peak_bytes]
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %-8s %-13s %-13s %-14s %-14s %-15s %-15s %-14s %-14s %-11s %-10s %-6s" % ("program", "nodes", "obj. kept (MB)",
+        "arr. kept (MB)", "obj. peak (MB)", "arr. peak (MB)", "obj. build (ms)", "arr. build (ms)", "obj. enum (ms)", "arr. enum (ms)",
+        "dump (B/n)", "load (ms)", "same"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+
+        [object_circuit, object_result, object_build_time, object_time, object_kept, object_peak] = traced_enumeration(parsed_program, False)
+        del object_circuit
+
+        [built_circuit, array_result, array_build_time, array_time, array_kept, array_peak] = traced_enumeration(parsed_program, True)
+        array_circuit = built_circuit.array_circuit
+        del built_circuit
+
+        num_nodes = array_circuit.num_nodes()
+
+        dump_directory = tempfile.mkdtemp()
+
+        try:
+            array_circuit.dump(dump_directory)
+            dump_bytes = directory_size(dump_directory)
+
+            t1 = time.time()
+            loaded_circuit = load_array_circuit(dump_directory)
+            t2 = time.time()
+
+            [loaded_result, _loaded_time, _returned] = timed_result(lambda: print_conditional_probability(*loaded_circuit.enumeration_probabilities()))
+
+            del loaded_circuit
+
+        finally:
+            shutil.rmtree(dump_directory)
+
+        print("%-24s %-8d %-14.1f %-14.1f %-14.1f %-14.1f %-15.1f %-15.1f %-14.1f %-14.1f %-11.0f %-10.1f %-6s" % (program_name, num_nodes,
+            object_kept/2**20, array_kept/2**20, object_peak/2**20, array_peak/2**20, 1000*object_build_time, 1000*array_build_time, 1000*object_time, 1000*array_time,
+            dump_bytes/num_nodes, 1000*(t2 - t1), object_result == array_result == loaded_result))
@@ -0,0 +1,52 @@
+"""
+SUMMARY
+
+Measures the nodes saved by the automatic elimination of variables which are no longer used (see parser/liveness.py):
+number of circuit nodes and inference time (circuit build and enumeration) with and without it, and whether both obtain
+the same result:
+
+    python3 -m performance.automatic_elimination
+"""
+
+
+# Imported beforehand, otherwise the first continuous program would include its import time (see inference/variable/continuous.py)
+import scipy.stats
+
+from .aux_performance import format_ms, measure_program
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+from .program_generator import generate_copy_assignment_program, generate_statement_sequence_program
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 12 (no marg.)", generate_pigeon_program(12, marginalize=False)],
+    ["city travel, 9", generate_city_travel_program(9)],
+    ["coin observation, 14", generate_coin_observation_program(14)],
+    ["statement sequence, 2k", generate_statement_sequence_program(2000)],
+    ["copy assignment, 10", generate_copy_assignment_program(10)]
+]
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/truck_engine.glmt", "benchmarks/select_square_top.glmt", "benchmarks/ship_iceberg.glmt"]
+
+
+
+if __name__ == "__main__":
+
+    for a_filepath in benchmark_filepaths:
+        with open(a_filepath, "r") as ff:
+            measured_programs.append([a_filepath.split("/")[-1], ff.read()])
+
+    print("%-26s %-12s %-12s %-10s %-14s %-14s %-6s" % ("program", "nodes (off)", "nodes (on)", "saved (%)", "time off (ms)",
+        "time on (ms)", "same"))
+
+    for program_name, program_text in measured_programs:
+
+        off_nodes, off_time, off_result, _circuits = measure_program(program_text, False, program_filepath=program_name)
+        on_nodes, on_time, on_result, _circuits = measure_program(program_text, True, program_filepath=program_name)
+
+        print("%-26s %-12d %-12d %-10.1f %-14s %-14s %-6s" % (program_name, off_nodes, on_nodes, 100*(off_nodes - on_nodes)/off_nodes,
+            format_ms(off_time), format_ms(on_time), off_result == on_result))
@@ -0,0 +1,215 @@
+"""
+SUMMARY
+
+Auxiliary functions for the performance benchmarks, added here to avoid clutter.
+"""
+
+
+from contextlib import redirect_stdout
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+
+# Root directory of the current Guillemot tree
+current_repository_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Builds a circuit in a fresh process and prints the time spent (in seconds)
+# Only relies on the parser and Circuit interfaces, so it can also be run against older Guillemot trees
+circuit_build_timer_code = """
+import sys
+import time
+
+import parser.parser
+from inference.inference_circuit import Circuit
+
+with open(sys.argv[1], "r") as ff:
+    parsed_program = parser.parser.Program_structure(ff.read(), sys.argv[1])
+
+t1 = time.time()
+Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+t2 = time.time()
+
+print(t2 - t1)
+"""
+
+
+
+# Writes a program to a temporary .glmt file
+# return filepath (str), must be deleted by the caller
+def write_temporary_program(program_text):
+
+    file_descriptor, program_filepath = tempfile.mkstemp(suffix=".glmt")
+
+    with os.fdopen(file_descriptor, "w") as ff:
+        ff.write(program_text)
+
+    return program_filepath
+
+
+
+# Times the circuit building step of a program using the Guillemot tree located at "repository_path"
+# Each repetition runs in a new process, the minimum time is kept
+# return time in seconds (float), None if the program could not be run (e.g. timeout)
+def time_circuit_build(repository_path, program_text, repetitions=3, timeout=600):
+
+    program_filepath = write_temporary_program(program_text)
+
+    measured_times = []
+
+    try:
+        for a_repetition in range(0, repetitions):
+
+            try:
+                completed_process = subprocess.run([sys.executable, "-c", circuit_build_timer_code, program_filepath],
+                    cwd=repository_path, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return None
+
+            if completed_process.returncode != 0:
+                print(completed_process.stderr, file=sys.stderr)
+                return None
+
+            measured_times.append(float(completed_process.stdout.strip().split("\n")[-1]))
+
+    finally:
+        os.remove(program_filepath)
+
+    return min(measured_times)
+
+
+
+# Formats a time in seconds as milliseconds, "-" if not available
+def format_ms(time_in_seconds):
+
+    if time_in_seconds == None:
+        return "-"
+
+    return "%.1f" % (1000*time_in_seconds, )
+
+
+
+# Runs an inference function and captures its printed result
+# Based on https://docs.python.org/3/library/contextlib.html#contextlib.redirect_stdout
+# return [printed result (str), time in seconds (float), returned value]
+def timed_result(inference_function):
+
+    printed_result = io.StringIO()
+
+    t1 = time.time()
+    with redirect_stdout(printed_result):
+        returned_value = inference_function()
+    t2 = time.time()
+
+    return [printed_result.getvalue().strip(), t2 - t1, returned_value]
+
+
+
+# Counts the distinct nodes of a circuit, compressed nodes have multiple parents
+def count_circuit_nodes(given_circuit):
+
+    seen_nodes = set()
+    nodes_to_be_explored = [given_circuit.ground_node]
+
+    while nodes_to_be_explored != []:
+        a_node = nodes_to_be_explored.pop()
+
+        if id(a_node) in seen_nodes:
+            continue
+
+        seen_nodes.add(id(a_node))
+        nodes_to_be_explored.extend(a_node.children)
+
+    return len(seen_nodes)
+
+
+
+# Parses and runs a program with a given inference method in the current process
+# The circuit building time is included
+# return [printed result (str), time in seconds (float)]
+def run_inference_in_process(program_text, inference_method):
+
+    # Imported here so that the helpers above can be used without the inference dependencies
+    from inference import inference
+    import parser.parser
+
+    parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+
+    [printed_result, inference_time, _returned] = timed_result(lambda: inference.infer(parsed_program, inference_method, False))
+
+    return [printed_result, inference_time]
+
+
+
+# Runs a program file with main.py in a new process, using the Guillemot tree located at "repository_path"
+# Measures the time until the first line is printed (usually the result), which includes the interpreter startup and imports
+# Each repetition runs in a new process, the minimum time is kept
+# return [first printed line (str), time in seconds (float)], [None, None] if the program failed
+def time_to_first_result(repository_path, program_filepath, inference_method, repetitions=3):
+
+    # Plots (show_circuit) are not displayed
+    process_environment = dict(os.environ, MPLBACKEND="Agg")
+
+    first_line = None
+    measured_times = []
+
+    for a_repetition in range(0, repetitions):
+
+        t1 = time.time()
+
+        # Based on https://docs.python.org/3/library/subprocess.html#subprocess.Popen
+        running_process = subprocess.Popen([sys.executable, "main.py", inference_method, os.path.abspath(program_filepath)],
+            cwd=repository_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=process_environment)
+
+        first_line = running_process.stdout.readline().strip()
+        t2 = time.time()
+
+        # Waits for the program to finish before the next repetition
+        running_process.communicate()
+
+        if running_process.returncode != 0:
+            return [None, None]
+
+        measured_times.append(t2 - t1)
+
+    return [first_line, min(measured_times)]
+
+
+
+# Parses a program, builds the circuit of each of its parts and enumerates them
+# The circuit building time is included
+# automatic_elimination, factorize, merge_equivalent_nodes (bool): See the options of main.py
+# return [number of nodes (int), time in seconds (float), printed result (str), built circuits [Circuit, ...]]
+def measure_program(program_text, automatic_elimination, factorize=False, merge_equivalent_nodes=False, program_filepath="generated.glmt"):
+
+    # Imported here so that the helpers above can be used without the inference dependencies
+    from inference.inference_circuit import Circuit, print_conditional_probability
+    import parser.parser
+
+    parsed_program = parser.parser.Program_structure(program_text, program_filepath)
+
+    if automatic_elimination:
+        parsed_program.eliminate_dead_variables()
+
+    if factorize:
+        subprograms = parsed_program.independent_subprograms()
+    else:
+        subprograms = [[parsed_program.instructions_tree, parsed_program.output_tree]]
+
+    def build_and_enumerate():
+
+        built_circuits = [Circuit(a_subprogram_instructions, a_subprogram_output, merge_equivalent_nodes=merge_equivalent_nodes)
+                            for a_subprogram_instructions, a_subprogram_output in subprograms]
+
+        print_conditional_probability(*[a_probability for a_circuit in built_circuits for a_probability in a_circuit.enumeration_probabilities()])
+
+        return built_circuits
+
+    [printed_result, inference_time, built_circuits] = timed_result(build_and_enumerate)
+
+    return [sum(count_circuit_nodes(a_circuit) for a_circuit in built_circuits), inference_time, printed_result, built_circuits]
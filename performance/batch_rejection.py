@@ -0,0 +1,103 @@
+"""
+SUMMARY
+
+Compares the batched rejection sampler (see inference/inference_sampling.py) against following the circuit nodes one sample at
+a time: throughput in samples per second, and the mean and standard deviation of the estimate over repeated runs of 5000
+samples (with different seeds), next to the exact (enumeration) result:
+
+    python3 -m performance.batch_rejection
+"""
+
+
+import random
+import statistics
+import time
+
+import numpy as np
+
+from inference.inference_circuit import Circuit
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 12 (no marg.)", generate_pigeon_program(12, marginalize=False)],
+    ["city travel, 9", generate_city_travel_program(9)],
+    ["coin observation, 10", generate_coin_observation_program(10)]
+]
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/truck_engine.glmt", "benchmarks/select_square_top.glmt"]
+
+
+# Samples per estimate and number of repeated estimates
+samples_per_estimate = 5000
+num_estimates = 20
+
+# Samples drawn to measure the throughput
+throughput_samples = {"single":20000, "batched":1000000}
+
+
+
+# Obtains the conditional probability from a pair of counts (or probabilities), 0 if there are no valid samples
+def conditional_probability(meets_output_and_observes, meets_observes):
+
+    if meets_observes == 0:
+        return 0
+
+    return meets_output_and_observes/meets_observes
+
+
+
+# Measures the throughput and the estimates of one sampler
+# sampling_function (function: (number of samples, seed) -> [counts meeting output and observations, counts meeting observations])
+# return [samples per second (float), mean estimate (float), standard deviation of the estimate (float)]
+def measure_sampler(sampling_function, num_throughput_samples):
+
+    # The first call may prepare the sampler, it is not timed
+    sampling_function(1, 0)
+
+    t1 = time.time()
+    sampling_function(num_throughput_samples, 0)
+    t2 = time.time()
+
+    estimates = [conditional_probability(*sampling_function(samples_per_estimate, a_seed)) for a_seed in range(1, num_estimates + 1)]
+
+    return [num_throughput_samples/(t2 - t1), statistics.mean(estimates), statistics.stdev(estimates)]
+
+
+
+if __name__ == "__main__":
+
+    for a_filepath in benchmark_filepaths:
+        with open(a_filepath, "r") as ff:
+            measured_programs.append([a_filepath.split("/")[-1], ff.read()])
+
+    print("%-24s %-8s %-16s %-16s %-18s %-18s" % ("program", "exact", "single (1/s)", "batched (1/s)", "single mean (sd)",
+        "batched mean (sd)"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+        parsed_program.eliminate_dead_variables()
+
+        built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+
+        exact_result = conditional_probability(*built_circuit.enumeration_probabilities())
+
+        def single_sampling(num_samples, seed):
+            random.seed(seed)
+            return built_circuit.single_rejection_counts(num_samples)
+
+        def batched_sampling(num_samples, seed):
+            return built_circuit.rejection_counts(num_samples, np.random.default_rng(seed))
+
+        [single_throughput, single_mean, single_deviation] = measure_sampler(single_sampling, throughput_samples["single"])
+        [batched_throughput, batched_mean, batched_deviation] = measure_sampler(batched_sampling, throughput_samples["batched"])
+
+        print("%-24s %-8.4f %-16.0f %-16.0f %-18s %-18s" % (program_name, exact_result, single_throughput, batched_throughput,
+            "%.4f (%.4f)" % (single_mean, single_deviation), "%.4f (%.4f)" % (batched_mean, batched_deviation)))
@@ -0,0 +1,89 @@
+"""
+SUMMARY
+
+Compares knowledge compilation ("bdd") against enumeration on scaled pigeon, city travel and copy assignment programs:
+
+    python3 -m performance.bdd_compilation
+
+Enumeration is timed both on the program as written (only for small sizes, its frontier grows exponentially) and with the
+automatic elimination of unused variables (the default). The size of the decision diagram is also shown.
+"""
+
+
+from inference.inference_bdd import Compiled_program
+from inference.inference_circuit import Circuit
+from .aux_performance import format_ms, timed_result
+from .program_generator import generate_city_travel_program, generate_copy_assignment_program, generate_pigeon_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program generator (function: size -> str), sizes [int, ...], largest size enumerated as written (int)], ...]
+measured_families = [
+    ["pigeon (no marg.)", lambda n: generate_pigeon_program(n, marginalize=False), [10, 20, 50, 100], 14],
+    ["pigeon, 3 holes (no marg.)", lambda n: generate_pigeon_program(n, num_holes=3, marginalize=False), [5, 10, 20, 40], 8],
+    ["city travel", generate_city_travel_program, [5, 10, 20, 50], 9],
+    ["copy assignment", generate_copy_assignment_program, [5, 10, 20, 50], 10]
+]
+
+
+
+# Builds the circuit of a program and enumerates it
+# return [printed result (str), time in seconds (float)]
+def time_enumeration(program_text, automatic_elimination):
+
+    parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+
+    if automatic_elimination:
+        parsed_program.eliminate_dead_variables()
+
+    [printed_result, enumeration_time, _returned] = timed_result(lambda: Circuit(parsed_program.instructions_tree,
+        parsed_program.output_tree).infer_by_enumeration())
+
+    return [printed_result, enumeration_time]
+
+
+
+# Compiles a program and counts its models
+# return [printed result (str), time in seconds (float), number of diagram nodes (int)]
+def time_compilation(program_text):
+
+    parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+
+    def compile_and_count():
+        compiled_program = Compiled_program(parsed_program.instructions_tree, parsed_program.output_tree)
+        compiled_program.infer_by_compilation()
+        return compiled_program
+
+    [printed_result, compilation_time, compiled_program] = timed_result(compile_and_count)
+
+    return [printed_result, compilation_time, compiled_program.diagram.num_nodes()]
+
+
+
+if __name__ == "__main__":
+
+    print("%-28s %-6s %-18s %-18s %-10s %-14s %-6s" % ("program", "size", "enum. written (ms)", "enum. auto (ms)", "bdd (ms)",
+        "diagram nodes", "same"))
+
+    for family_name, program_generator, program_sizes, as_written_max_size in measured_families:
+        for a_size in program_sizes:
+
+            program_text = program_generator(a_size)
+
+            found_results = set()
+
+            if a_size <= as_written_max_size:
+                [written_result, written_time] = time_enumeration(program_text, False)
+                found_results.add(written_result)
+            else:
+                written_time = None
+
+            [automatic_result, automatic_time] = time_enumeration(program_text, True)
+            [compiled_result, compiled_time, num_diagram_nodes] = time_compilation(program_text)
+
+            found_results |= {automatic_result, compiled_result}
+
+            print("%-28s %-6d %-18s %-18s %-10s %-14d %-6s" % (family_name, a_size, format_ms(written_time), format_ms(automatic_time),
+                format_ms(compiled_time), num_diagram_nodes, len(found_results) == 1))
@@ -0,0 +1,40 @@
+"""
+SUMMARY
+
+Measures the circuit building time for programs of increasing depth (scaled pigeon programs).
+Optionally compares it with another Guillemot tree (e.g. an older version), passed as the only argument:
+
+    python3 -m performance.circuit_build [/path/to/reference/Guillemot]
+"""
+
+
+import sys
+
+from .aux_performance import current_repository_path, format_ms, time_circuit_build
+from .program_generator import generate_pigeon_program
+
+
+
+# Number of pigeons considered, each one adds 4 statements
+pigeon_counts = [2, 8, 16, 32, 64, 128]
+
+
+
+if __name__ == "__main__":
+
+    reference_repository_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("%-10s %-16s %-18s" % ("pigeons", "current (ms)", "reference (ms)"))
+
+    for a_pigeon_count in pigeon_counts:
+
+        program_text = generate_pigeon_program(a_pigeon_count)
+
+        current_time = time_circuit_build(current_repository_path, program_text)
+
+        if reference_repository_path == None:
+            reference_time = None
+        else:
+            reference_time = time_circuit_build(reference_repository_path, program_text, repetitions=1)
+
+        print("%-10d %-16s %-18s" % (a_pigeon_count, format_ms(current_time), format_ms(reference_time)))
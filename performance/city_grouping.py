@@ -0,0 +1,46 @@
+"""
+SUMMARY
+
+Measures the circuit building time of the independent city travel programs (benchmarks/independent_city_travel_*.glmt)
+scaled to 20+ cities, where the frontier is grouped by marginalization or variable elimination after every city.
+Optionally compares it with another Guillemot tree (e.g. an older version), passed as the only argument:
+
+    python3 -m performance.city_grouping [/path/to/reference/Guillemot]
+"""
+
+
+import sys
+
+from .aux_performance import current_repository_path, format_ms, run_inference_in_process, time_circuit_build
+from .program_generator import generate_city_travel_program
+
+
+
+# Number of cities considered
+city_counts = [20, 100, 500, 1000]
+
+
+
+if __name__ == "__main__":
+
+    reference_repository_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("%-10s %-14s %-10s %-16s %-18s" % ("cities", "reduction", "result", "current (ms)", "reference (ms)"))
+
+    for search_space_reduction in ["marginalize", "eliminate"]:
+        for a_city_count in city_counts:
+
+            program_text = generate_city_travel_program(a_city_count, search_space_reduction)
+
+            # The result does not depend on the number of cities
+            inference_result = run_inference_in_process(program_text, "enumerate")[0]
+
+            current_time = time_circuit_build(current_repository_path, program_text)
+
+            if reference_repository_path == None:
+                reference_time = None
+            else:
+                reference_time = time_circuit_build(reference_repository_path, program_text)
+
+            print("%-10d %-14s %-10s %-16s %-18s" % (a_city_count, search_space_reduction, inference_result, format_ms(current_time),
+                format_ms(reference_time)))
@@ -0,0 +1,105 @@
+"""
+SUMMARY
+
+Measures the number of expression evaluations per second, interpreting the parse tree (logical_evaluator) and using the
+compiled evaluator (compile_logical_evaluator), and verifies that both obtain the same results:
+
+    python3 -m performance.expression_evaluation
+"""
+
+
+import time
+
+from inference.sentence_evaluation import compile_logical_evaluator, logical_evaluator
+from inference.variable.common import Fixed
+from inference.variable.discrete import discrete_creator
+import parser.parser
+
+
+
+# Number of evaluations per expression and environment
+num_evaluations = 20000
+
+
+# Expressions to be evaluated, taken from the provided benchmarks
+# [[expression (str), final_result (bool), numeric_final_result (bool)], ...]
+evaluated_expressions = [
+    ["(city == \"City1\")", True, False],
+    ["((fuel <= 0.2) && (inspection_quality == 0))", True, False],
+    ["((city0 == \"03\") && (city1 == \"11\"))", True, False],
+    ["(H1 + 1)", False, False],
+    ["((38 <= F) && (F <= 42))", True, False],
+    ["(!(H1 == H2))", True, False],
+    ["E(fuel)", False, True]
+]
+
+
+# Environments the expressions are evaluated in
+evaluation_environments = [
+    {
+        "city":discrete_creator("qualitative", "city", ["City1"], [1])[0],
+        "city0":discrete_creator("qualitative", "city0", ["03"], [1])[0],
+        "city1":discrete_creator("qualitative", "city1", ["12"], [1])[0],
+        "fuel":Fixed("fuel", 0.1),
+        "inspection_quality":discrete_creator("numeric", "inspection_quality", [0], [1])[0],
+        "H1":Fixed("H1", 1),
+        "H2":Fixed("H2", 1),
+        "F":Fixed("F", 40)
+    },
+    {
+        "city":discrete_creator("qualitative", "city", ["City3"], [1])[0],
+        "city0":discrete_creator("qualitative", "city0", ["03"], [1])[0],
+        "city1":discrete_creator("qualitative", "city1", ["11"], [1])[0],
+        "fuel":Fixed("fuel", 0.5),
+        "inspection_quality":discrete_creator("numeric", "inspection_quality", [2], [1])[0],
+        "H1":Fixed("H1", 0),
+        "H2":Fixed("H2", 2),
+        "F":Fixed("F", 45)
+    }
+]
+
+
+
+# Obtains the parse tree of an expression, parsed as the return statement of a program
+def parse_expression(expression_text):
+    return parser.parser.Program_structure("x = 0; return %s;" % (expression_text, ), "expression.glmt").output_tree
+
+
+
+# Obtains a comparable form of an evaluation result
+def comparable_result(evaluation_result):
+
+    if hasattr(evaluation_result, "expectation"):
+        return str(evaluation_result)
+
+    return evaluation_result
+
+
+
+if __name__ == "__main__":
+
+    print("%-50s %-18s %-18s %-8s %-6s" % ("expression", "interpreted (1/s)", "compiled (1/s)", "speedup", "same"))
+
+    for expression_text, final_result, numeric_final_result in evaluated_expressions:
+
+        expression_tree = parse_expression(expression_text)
+        expression_evaluator = compile_logical_evaluator(expression_tree, final_result, numeric_final_result)
+
+        # Compares the results
+        same_results = all(comparable_result(logical_evaluator(expression_tree, an_environment, final_result, numeric_final_result)) ==
+                            comparable_result(expression_evaluator(an_environment)) for an_environment in evaluation_environments)
+
+        t1 = time.time()
+        for an_evaluation in range(0, num_evaluations):
+            logical_evaluator(expression_tree, evaluation_environments[an_evaluation % 2], final_result, numeric_final_result)
+        t2 = time.time()
+
+        for an_evaluation in range(0, num_evaluations):
+            expression_evaluator(evaluation_environments[an_evaluation % 2])
+        t3 = time.time()
+
+        interpreted_rate = num_evaluations/(t2 - t1)
+        compiled_rate    = num_evaluations/(t3 - t2)
+
+        print("%-50s %-18d %-18d %-8s %-6s" % (expression_text, interpreted_rate, compiled_rate, "%.1fx" % (compiled_rate/interpreted_rate, ),
+            same_results))
@@ -0,0 +1,79 @@
+"""
+SUMMARY
+
+Measures the independence detection (see parser/independence.py): circuit nodes and time of enumeration and rejection sampling,
+with and without inferring the independent parts of the program separately, on the program as written and with the
+automatic elimination of unused variables. Each result is checked against the first configuration measured for its program
+(inferred at once), since factorizing must not change it:
+
+    python3 -m performance.factorization
+"""
+
+
+import time
+
+from .aux_performance import format_ms, measure_program
+from .program_generator import generate_city_travel_program, generate_pigeon_program
+
+
+
+# Programs measured
+# [[name (str), program text (str), whether or not the program as written is measured (bool)], ...]
+measured_programs = [
+    ["city travel, 9", generate_city_travel_program(9), True],
+    ["city travel, 12", generate_city_travel_program(12), False],
+    ["city travel, 50 (marg.)", generate_city_travel_program(50, "marginalize"), True],
+    ["pigeon, 12 (no marg.)", generate_pigeon_program(12, marginalize=False), True],
+    # The marginalization keeps the first value of x in each group of traces, even if x is not listed
+    ["marg. of an unread part", "x ~ flip(0.5);\ny ~ flip(0.5);\nmarginalize(y);\nreturn (x == 1);\n", True]
+]
+
+
+# Measured configurations
+# [[name (str), automatic elimination (bool), factorization (bool)], ...]
+measured_configurations = [
+    ["written", False, False],
+    ["written, factorized", False, True],
+    ["auto elim.", True, False],
+    ["auto elim., factorized", True, True]
+]
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %-24s %-10s %-16s %-16s %-8s %-10s" % ("program", "configuration", "nodes", "enumerate (ms)", "rejection (ms)", "result",
+        "consistent"))
+
+    inconsistent_programs = []
+
+    for program_name, program_text, measure_as_written in measured_programs:
+
+        reference_result = None
+
+        for configuration_name, automatic_elimination, factorize in measured_configurations:
+
+            if (not automatic_elimination) and (not measure_as_written):
+                continue
+
+            [num_nodes, enumeration_time, enumeration_result, built_circuits] = measure_program(program_text, automatic_elimination, factorize)
+
+            t1 = time.time()
+
+            for a_circuit in built_circuits:
+                a_circuit.rejection_counts()
+
+            rejection_time = time.time() - t1
+
+            if reference_result == None:
+                reference_result = enumeration_result
+
+            if (enumeration_result != reference_result) and (program_name not in inconsistent_programs):
+                inconsistent_programs.append(program_name)
+
+            print("%-24s %-24s %-10d %-16s %-16s %-8s %-10s" % (program_name, configuration_name, num_nodes, format_ms(enumeration_time),
+                format_ms(rejection_time), enumeration_result, "yes" if enumeration_result == reference_result else "NO"))
+
+    if inconsistent_programs != []:
+        print()
+        print("Results changed by the configuration: %s" % (", ".join(inconsistent_programs), ))
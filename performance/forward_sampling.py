@@ -0,0 +1,70 @@
+"""
+SUMMARY
+
+Compares forward sampling (see inference/inference_forward.py) against building the circuit and rejection sampling it, on
+programs whose circuit grows exponentially: peak memory and time of 5000 samples, and the estimate reached, for increasing
+program sizes. Programs are measured as written (no automatic elimination of unused variables):
+
+    python3 -m performance.forward_sampling
+"""
+
+
+import time
+import tracemalloc
+
+from inference.inference_circuit import Circuit
+from inference.inference_forward import Forward_sampler
+from .aux_performance import format_ms
+from .program_generator import generate_city_travel_program, generate_coin_observation_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["city travel, 6", generate_city_travel_program(6)],
+    ["city travel, 8", generate_city_travel_program(8)],
+    ["city travel, 10", generate_city_travel_program(10)],
+    ["coin observation, 8", generate_coin_observation_program(8)],
+    ["coin observation, 12", generate_coin_observation_program(12)],
+    ["coin observation, 16", generate_coin_observation_program(16)]
+]
+
+
+# Samples drawn by each method
+num_samples = 5000
+
+
+
+# Measures the peak memory and time of a sampling function
+# sampling_function (function: () -> [counts meeting output and observations, counts meeting observations])
+# return [estimate (float), peak memory in MB (float), time in seconds (float)]
+def measure_sampling(sampling_function):
+
+    tracemalloc.start()
+
+    t1 = time.time()
+    [meets_output_and_observes, meets_observes] = sampling_function()
+    t2 = time.time()
+
+    [_current_memory, peak_memory] = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return [meets_output_and_observes/meets_observes if meets_observes > 0 else 0, peak_memory/2**20, t2 - t1]
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %-40s %-36s" % ("program", "circuit + rejection (estimate, MB, ms)", "forward (estimate, MB, ms)"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+
+        circuit_results = measure_sampling(lambda: Circuit(parsed_program.instructions_tree, parsed_program.output_tree).rejection_counts(num_samples))
+        forward_results = measure_sampling(lambda: Forward_sampler(parsed_program.instructions_tree, parsed_program.output_tree).rejection_counts(num_samples))
+
+        print("%-24s %-40s %-36s" % (program_name, "%.4f, %.1f, %s" % (circuit_results[0], circuit_results[1], format_ms(circuit_results[2])),
+            "%.4f, %.1f, %s" % (forward_results[0], forward_results[1], format_ms(forward_results[2]))))
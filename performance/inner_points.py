@@ -0,0 +1,121 @@
+"""
+SUMMARY
+
+Measures the arithmetic of variables over their inner points (see inference/variable/common.py): operations per second on
+continuous and fixed operands, inner points obtained per second for continuous variables, and the time of the arithmetic heavy
+provided benchmarks:
+
+    python3 -m performance.inner_points
+"""
+
+
+import io
+import operator
+import random
+import time
+from contextlib import redirect_stdout
+
+from inference.inference_circuit import Circuit
+from inference.variable.common import Fixed
+from inference.variable.continuous import normal_distribution
+from .aux_performance import format_ms
+import parser.parser
+
+
+
+# Number of operations per operator and operands
+num_operations = 20000
+
+# Number of continuous variables whose inner points are obtained
+num_inner_point_variables = 200
+
+
+# Operators measured
+# [[name (str), operator (function)], ...]
+measured_operators = [
+    ["+", operator.add],
+    ["-", operator.sub],
+    ["*", operator.mul],
+    ["/", operator.truediv],
+    ["**", operator.pow]
+]
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/ship_iceberg.glmt", "benchmarks/hookes_law.glmt"]
+
+
+
+# Creates a continuous variable over an interval of a normal distribution
+def create_normal(variable_name, μ):
+    return normal_distribution(variable_name, μ - 0.1, μ + 0.1, μ, 0.1)
+
+
+
+# Operations per second of an operator
+# return float
+def measure_operations(given_operator, first_variable, second_variable):
+
+    t1 = time.time()
+
+    for _ in range(0, num_operations):
+        given_operator(first_variable, second_variable)
+
+    t2 = time.time()
+
+    return num_operations/(t2 - t1)
+
+
+
+if __name__ == "__main__":
+
+    random.seed(0)
+
+    # Inner points are obtained before measuring the operations, they are calculated only once
+    first_normal = create_normal("X", 20)
+    second_normal = create_normal("Y", 10)
+    first_normal.get_inner_points()
+    second_normal.get_inner_points()
+
+    # [[name, first operand, second operand], ...]
+    measured_operands = [
+        ["continuous, continuous", first_normal, second_normal],
+        ["continuous, fixed", first_normal, Fixed("F", 2)],
+        ["fixed, fixed", Fixed("F", 3), Fixed("G", 2)]
+    ]
+
+    print("%-26s %-10s %-16s" % ("operands", "operator", "operations (1/s)"))
+
+    for operands_name, first_variable, second_variable in measured_operands:
+        for operator_name, an_operator in measured_operators:
+            print("%-26s %-10s %-16.0f" % (operands_name, operator_name, measure_operations(an_operator, first_variable, second_variable)))
+
+    print()
+
+    t1 = time.time()
+
+    for a_variable_index in range(0, num_inner_point_variables):
+        create_normal("X%d" % (a_variable_index, ), 20).get_inner_points()
+
+    t2 = time.time()
+
+    print("Continuous variables with their inner points (1/s): %.0f" % (num_inner_point_variables/(t2 - t1), ))
+    print()
+
+    print("%-24s %-12s" % ("program", "ms"))
+
+    for a_filepath in benchmark_filepaths:
+
+        with open(a_filepath, "r") as ff:
+            parsed_program = parser.parser.Program_structure(ff.read(), a_filepath)
+
+        parsed_program.eliminate_dead_variables()
+
+        t1 = time.time()
+
+        with redirect_stdout(io.StringIO()):
+            Circuit(parsed_program.instructions_tree, parsed_program.output_tree).enumeration_probabilities()
+
+        t2 = time.time()
+
+        print("%-24s %-12s" % (a_filepath.split("/")[-1], format_ms(t2 - t1)))
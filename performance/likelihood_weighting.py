@@ -0,0 +1,87 @@
+"""
+SUMMARY
+
+Compares likelihood weighting and sampling the posterior distribution directly against rejection sampling on programs whose
+observations are unlikely: samples and time needed to reach a standard error of 0.01 (at most 20 seconds each), and the estimate
+reached, next to the exact (enumeration) result:
+
+    python3 -m performance.likelihood_weighting
+"""
+
+
+import time
+
+from inference.inference_circuit import Circuit
+from inference.inference_sampling import adaptive_sampling
+from .aux_performance import format_ms
+from .program_generator import generate_coin_observation_program, generate_noisy_sensor_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["noisy sensor, 4", generate_noisy_sensor_program(4)],
+    ["noisy sensor, 8", generate_noisy_sensor_program(8)],
+    ["noisy sensor, 12", generate_noisy_sensor_program(12)],
+    ["coin observation, 14", generate_coin_observation_program(14)]
+]
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/truck_engine.glmt", "benchmarks/select_square_top.glmt"]
+
+
+# Sampling budget of each method
+target_error = 0.01
+time_budget = 20
+
+
+
+# Samples a circuit until the target error or the time budget is reached
+# return [estimate (float), number of samples (int), time in seconds (float), effective sample size (float)]
+def measure_sampling(given_circuit, sampling_mode):
+
+    t1 = time.time()
+    sampled_estimate = adaptive_sampling([given_circuit.obtain_batch_sampler()], target_error=target_error, time_budget=time_budget,
+        sampling_mode=sampling_mode)
+    t2 = time.time()
+
+    [meets_output_and_observes, meets_observes] = sampled_estimate.probability_pairs()
+
+    return [meets_output_and_observes/meets_observes if meets_observes > 0 else 0, sampled_estimate.num_samples[0], t2 - t1,
+            sampled_estimate.effective_sample_sizes()[0]]
+
+
+
+if __name__ == "__main__":
+
+    for a_filepath in benchmark_filepaths:
+        with open(a_filepath, "r") as ff:
+            measured_programs.append([a_filepath.split("/")[-1], ff.read()])
+
+    print("%-22s %-8s %-36s %-42s %-36s" % ("program", "exact", "rejection (estimate, samples, ms)", "likelihood (estimate, samples, ESS, ms)",
+        "posterior (estimate, samples, ms)"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+        parsed_program.eliminate_dead_variables()
+
+        built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+
+        [exact_output_and_observes, exact_observes] = built_circuit.enumeration_probabilities()
+
+        # Prepares the sampler beforehand, so that only sampling is timed
+        built_circuit.obtain_batch_sampler().obtain_sampling_tables("likelihood")
+        built_circuit.obtain_batch_sampler().obtain_sampling_tables("posterior")
+
+        [rejection_estimate, rejection_samples, rejection_time, _accepted] = measure_sampling(built_circuit, "rejection")
+        [weighted_estimate, weighted_samples, weighted_time, effective_size] = measure_sampling(built_circuit, "likelihood")
+        [posterior_estimate, posterior_samples, posterior_time, _accepted] = measure_sampling(built_circuit, "posterior")
+
+        print("%-22s %-8.4f %-36s %-42s %-36s" % (program_name, exact_output_and_observes/exact_observes,
+            "%.4f, %d, %s" % (rejection_estimate, rejection_samples, format_ms(rejection_time)),
+            "%.4f, %d, %.0f, %s" % (weighted_estimate, weighted_samples, effective_size, format_ms(weighted_time)),
+            "%.4f, %d, %s" % (posterior_estimate, posterior_samples, format_ms(posterior_time))))
@@ -0,0 +1,82 @@
+"""
+SUMMARY
+
+Measures Metropolis-Hastings over program traces (see inference/inference_mcmc.py) on the provided benchmarks and on programs
+whose observations are unlikely: sampling throughput (steps per second), effective sample size, and acceptance rate, with the
+estimate reached next to the exact (enumeration) result. Benchmarks using statements which need all the traces at once are
+skipped:
+
+    python3 -m performance.metropolis_hastings
+"""
+
+
+import glob
+import io
+from contextlib import redirect_stderr
+import time
+
+from inference.inference_circuit import Circuit
+from inference.inference_forward import unsupported_statements
+from inference.inference_mcmc import metropolis_hastings, Metropolis_hastings_sampler
+from .aux_performance import format_ms
+from .program_generator import generate_coin_observation_program, generate_noisy_sensor_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["noisy sensor, 12", generate_noisy_sensor_program(12)],
+    ["coin observation, 14", generate_coin_observation_program(14)]
+]
+
+
+# Samples kept per chain, and number of chains
+num_samples = 5000
+num_chains = 4
+
+
+
+# Runs the chains of a program
+# return [estimate (float), effective sample size (float), steps per second (float), acceptance rate (float), time in seconds (float)]
+def measure_chains(parsed_program):
+
+    # The summary of the chains is not needed
+    with redirect_stderr(io.StringIO()):
+        program_sampler = Metropolis_hastings_sampler(parsed_program.instructions_tree, parsed_program.output_tree)
+
+    t1 = time.time()
+    [sampled_estimate, accepted_steps, num_steps] = metropolis_hastings([program_sampler], num_samples=num_samples, num_chains=num_chains)
+    t2 = time.time()
+
+    [meets_output_and_observes, meets_observes] = sampled_estimate.probability_pairs()
+
+    return [meets_output_and_observes/meets_observes if meets_observes > 0 else 0, sampled_estimate.effective_sample_sizes()[0],
+            num_steps/(t2 - t1), accepted_steps/num_steps, t2 - t1]
+
+
+
+if __name__ == "__main__":
+
+    for a_filepath in sorted(glob.glob("benchmarks/*.glmt")):
+        with open(a_filepath, "r") as ff:
+            measured_programs.append([a_filepath.split("/")[-1], ff.read()])
+
+    print("%-40s %-8s %-10s %-10s %-12s %-10s %-12s %-10s" % ("program", "exact", "estimate", "ESS", "steps (1/s)", "ESS (1/s)",
+        "acceptance", "ms"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+        parsed_program.eliminate_dead_variables()
+
+        if any(True for _tree in parsed_program.instructions_tree.find_pred(lambda t: t.data in unsupported_statements)):
+            continue
+
+        [exact_output_and_observes, exact_observes] = Circuit(parsed_program.instructions_tree, parsed_program.output_tree).enumeration_probabilities()
+
+        [an_estimate, effective_size, steps_per_second, acceptance_rate, sampling_time] = measure_chains(parsed_program)
+
+        print("%-40s %-8.4f %-10.4f %-10.0f %-12.0f %-10.0f %-12s %-10s" % (program_name, exact_output_and_observes/exact_observes, an_estimate,
+            effective_size, steps_per_second, effective_size/sampling_time, "%.2f%%" % (100*acceptance_rate, ), format_ms(sampling_time)))
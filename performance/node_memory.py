@@ -0,0 +1,112 @@
+"""
+SUMMARY
+
+Measures the memory used by the circuit per node (bytes allocated while building the circuit, divided by the number of
+distinct nodes). Optionally compares it with another Guillemot tree (e.g. an older version), passed as the only argument:
+
+    python3 -m performance.node_memory [/path/to/reference/Guillemot]
+"""
+
+
+import os
+import subprocess
+import sys
+
+from .aux_performance import current_repository_path, write_temporary_program
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 12 (no marg.)", generate_pigeon_program(12, marginalize=False)],
+    ["city travel, 9", generate_city_travel_program(9)],
+    ["coin observation, 14", generate_coin_observation_program(14)]
+]
+
+
+# Builds a circuit in a fresh process and prints the memory allocated while doing so (in bytes) and the number of nodes
+# Only relies on the parser and Circuit interfaces, so it can also be run against older Guillemot trees
+circuit_memory_code = """
+import sys
+import tracemalloc
+
+import parser.parser
+from inference.inference_circuit import Circuit
+
+with open(sys.argv[1], "r") as ff:
+    parsed_program = parser.parser.Program_structure(ff.read(), sys.argv[1])
+
+tracemalloc.start()
+built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+allocated_bytes = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+# Counts the distinct nodes, compressed nodes have multiple parents
+seen_nodes = set()
+nodes_to_be_explored = [built_circuit.ground_node]
+
+while nodes_to_be_explored != []:
+    a_node = nodes_to_be_explored.pop()
+
+    if id(a_node) in seen_nodes:
+        continue
+
+    seen_nodes.add(id(a_node))
+    nodes_to_be_explored.extend(a_node.children)
+
+print(allocated_bytes, len(seen_nodes))
+"""
+
+
+
+# Measures the circuit memory of a program using the Guillemot tree located at "repository_path"
+# return [allocated bytes (int), number of nodes (int)], [None, None] if the program could not be run
+def measure_circuit_memory(repository_path, program_text):
+
+    program_filepath = write_temporary_program(program_text)
+
+    try:
+        completed_process = subprocess.run([sys.executable, "-c", circuit_memory_code, program_filepath],
+            cwd=repository_path, capture_output=True, text=True)
+    finally:
+        os.remove(program_filepath)
+
+    if completed_process.returncode != 0:
+        print(completed_process.stderr, file=sys.stderr)
+        return [None, None]
+
+    [allocated_bytes, num_nodes] = completed_process.stdout.strip().split("\n")[-1].split()
+
+    return [int(allocated_bytes), int(num_nodes)]
+
+
+
+# Formats the bytes per node, "-" if not available
+def format_bytes_per_node(allocated_bytes, num_nodes):
+
+    if allocated_bytes == None:
+        return "-"
+
+    return "%.0f" % (allocated_bytes/num_nodes, )
+
+
+
+if __name__ == "__main__":
+
+    reference_repository_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("%-24s %-10s %-16s %-10s %-18s" % ("program", "nodes", "current (B/node)", "ref. nodes", "reference (B/node)"))
+
+    for program_name, program_text in measured_programs:
+
+        current_bytes, current_nodes = measure_circuit_memory(current_repository_path, program_text)
+
+        if reference_repository_path == None:
+            reference_bytes, reference_nodes = [None, None]
+        else:
+            reference_bytes, reference_nodes = measure_circuit_memory(reference_repository_path, program_text)
+
+        print("%-24s %-10s %-16s %-10s %-18s" % (program_name, current_nodes, format_bytes_per_node(current_bytes, current_nodes),
+            "-" if reference_nodes == None else reference_nodes, format_bytes_per_node(reference_bytes, reference_nodes)))
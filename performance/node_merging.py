@@ -0,0 +1,58 @@
+"""
+SUMMARY
+
+Measures the nodes saved by merging the circuit nodes which hold the same environment (hash-consing, see the
+"merge_equivalent_nodes" option of the Circuit), with and without the automatic elimination of unused variables:
+
+    python3 -m performance.node_merging
+
+For each configuration, prints the number of circuit nodes and the inference time (circuit build and enumeration).
+All configurations must obtain the same result.
+"""
+
+
+from .aux_performance import format_ms, measure_program
+from .program_generator import generate_coin_observation_program, generate_pigeon_program, generate_statement_sequence_program
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 12 (no marg.)", generate_pigeon_program(12, marginalize=False)],
+    ["pigeon, 8, 3 holes", generate_pigeon_program(8, num_holes=3, marginalize=False)],
+    ["coin observation, 14", generate_coin_observation_program(14)],
+    ["statement sequence, 2k", generate_statement_sequence_program(2000)]
+]
+
+
+# Measured configurations
+# [[name (str), automatic elimination (bool), merge equivalent nodes (bool)], ...]
+measured_configurations = [
+    ["none", False, False],
+    ["merge", False, True],
+    ["auto elim.", True, False],
+    ["both", True, True]
+]
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %s %-6s" % ("program", " ".join("%-24s" % (a_name + " nodes (ms)", ) for a_name, _e, _m in measured_configurations),
+        "same"))
+
+    for program_name, program_text in measured_programs:
+
+        measured_columns = []
+        found_results = set()
+
+        for _name, automatic_elimination, merge_equivalent_nodes in measured_configurations:
+
+            num_nodes, inference_time, printed_result, _circuits = measure_program(program_text, automatic_elimination,
+                merge_equivalent_nodes=merge_equivalent_nodes)
+
+            measured_columns.append("%-24s" % ("%d (%s)" % (num_nodes, format_ms(inference_time)), ))
+            found_results.add(printed_result)
+
+        print("%-24s %s %-6s" % (program_name, " ".join(measured_columns), len(found_results) == 1))
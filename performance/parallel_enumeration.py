@@ -0,0 +1,79 @@
+"""
+SUMMARY
+
+Measures building the circuit in multiple processes for enumeration (see inference/inference_parallel.py): time of building the
+circuit and enumerating it from 1 worker up to the number of cores, the speedup, and the result, on programs as written and on
+programs joining their traces (marginalization):
+
+    python3 -m performance.parallel_enumeration
+"""
+
+
+import os
+import time
+
+from inference.inference_circuit import Circuit
+from inference.inference_parallel import Parallel_enumeration
+from .aux_performance import format_ms
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["city travel, 10", generate_city_travel_program(10)],
+    ["city travel, 40 (marg.)", generate_city_travel_program(40, "marginalize")],
+    ["pigeon, 14 (no marg.)", generate_pigeon_program(14, marginalize=False)],
+    ["pigeon, 60 (marg.)", generate_pigeon_program(60)],
+    ["coin observation, 16", generate_coin_observation_program(16)]
+]
+
+
+# Number of workers measured, powers of two up to the number of cores (and the number of cores itself)
+measured_workers = sorted({2**a_power for a_power in range(0, os.cpu_count().bit_length()) if 2**a_power <= os.cpu_count()} | {os.cpu_count()})
+
+
+
+# Builds the circuit and enumerates it, a single worker builds the circuit in this process
+# return [result (float), time in seconds (float)]
+def measure_workers(parsed_program, num_workers):
+
+    t1 = time.time()
+
+    if num_workers == 1:
+        enumerated_program = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+    else:
+        enumerated_program = Parallel_enumeration(parsed_program.instructions_tree, parsed_program.output_tree, num_workers)
+
+    [Pr_meets_output_and_observes, Pr_meets_observes] = enumerated_program.enumeration_probabilities()
+
+    t2 = time.time()
+
+    return [Pr_meets_output_and_observes/Pr_meets_observes if Pr_meets_observes > 0 else 0, t2 - t1]
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %-10s %-12s %-10s %-10s" % ("program", "workers", "ms", "speedup", "result"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+
+        # The first build compiles the expressions of the program (cached afterwards), it is not timed
+        measure_workers(parsed_program, 1)
+
+        single_worker_time = None
+
+        for num_workers in measured_workers:
+
+            [a_result, enumeration_time] = measure_workers(parsed_program, num_workers)
+
+            if single_worker_time == None:
+                single_worker_time = enumeration_time
+
+            print("%-24s %-10d %-12s %-10s %-10.4f" % (program_name, num_workers, format_ms(enumeration_time),
+                "%.2fx" % (single_worker_time/enumeration_time, ), a_result))
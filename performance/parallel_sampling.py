@@ -0,0 +1,90 @@
+"""
+SUMMARY
+
+Measures sampling with multiple worker processes (see inference/inference_sampling.py Sampling_workers): time and speedup of
+a fixed number of samples from 1 worker up to the number of cores, the estimate reached, and whether or not sampling again with
+the same seed and number of workers gives the same estimate:
+
+    python3 -m performance.parallel_sampling
+"""
+
+
+import os
+import time
+
+from inference.inference_circuit import Circuit
+from inference.inference_forward import Forward_sampler
+from inference.inference_sampling import adaptive_sampling
+from .aux_performance import format_ms
+from .program_generator import generate_coin_observation_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["coin observation, 14", generate_coin_observation_program(14)]
+]
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/truck_engine.glmt", "benchmarks/pigeon.glmt"]
+
+
+# Samples drawn by each sampler, the forward sampler is much slower since it follows the program one sample at a time
+# {"sampler":number of samples (int), ...}
+sampler_samples = {"batched":2000000, "forward":20000}
+
+
+# Number of workers measured, powers of two up to the number of cores (and the number of cores itself)
+measured_workers = sorted({2**a_power for a_power in range(0, os.cpu_count().bit_length()) if 2**a_power <= os.cpu_count()} | {os.cpu_count()})
+
+
+
+# Samples with a number of workers
+# return [estimate (float), time in seconds (float)]
+def measure_workers(given_sampler, num_samples, num_workers):
+
+    t1 = time.time()
+    sampled_estimate = adaptive_sampling([given_sampler], num_samples=num_samples, num_workers=num_workers)
+    t2 = time.time()
+
+    [meets_output_and_observes, meets_observes] = sampled_estimate.probability_pairs()
+
+    return [meets_output_and_observes/meets_observes if meets_observes > 0 else 0, t2 - t1]
+
+
+
+if __name__ == "__main__":
+
+    for a_filepath in benchmark_filepaths:
+        with open(a_filepath, "r") as ff:
+            measured_programs.append([a_filepath.split("/")[-1], ff.read()])
+
+    print("%-24s %-10s %-10s %-10s %-10s %-10s %-10s" % ("program", "sampler", "workers", "ms", "speedup", "estimate", "repeatable"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, program_name)
+        parsed_program.eliminate_dead_variables()
+
+        built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+
+        measured_samplers = [["batched", built_circuit.obtain_batch_sampler()],
+                             ["forward", Forward_sampler(parsed_program.instructions_tree, parsed_program.output_tree)]]
+
+        for sampler_name, a_sampler in measured_samplers:
+
+            single_worker_time = None
+
+            for num_workers in measured_workers:
+
+                [an_estimate, sampling_time] = measure_workers(a_sampler, sampler_samples[sampler_name], num_workers)
+                [repeated_estimate, _repeated_time] = measure_workers(a_sampler, sampler_samples[sampler_name], num_workers)
+
+                if single_worker_time == None:
+                    single_worker_time = sampling_time
+
+                print("%-24s %-10s %-10d %-10s %-10s %-10.4f %-10s" % (program_name, sampler_name, num_workers, format_ms(sampling_time),
+                    "%.2fx" % (single_worker_time/sampling_time, ), an_estimate, "yes" if an_estimate == repeated_estimate else "no"))
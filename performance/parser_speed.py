@@ -0,0 +1,121 @@
+"""
+SUMMARY
+
+Measures the parser cold start (building it in a new process, with and without the on-disk cache) and the parse throughput
+of long generated programs, comparing the LALR parser with the Earley one:
+
+    python3 -m performance.parser_speed
+
+The Earley parser is only timed up to "earley_max_statements", since it takes minutes for larger programs.
+"""
+
+
+import os
+import subprocess
+import sys
+import time
+
+from lark import Lark
+
+from .aux_performance import current_repository_path, format_ms
+from .program_generator import generate_statement_sequence_program
+import parser.parser
+
+
+
+# Number of new processes per cold start measurement, the minimum time is kept
+cold_start_repetitions = 5
+
+
+# Number of statements of the parsed programs
+program_lengths = [1000, 10000, 20000, 50000]
+
+
+# Largest program parsed with the Earley parser
+earley_max_statements = 1000
+
+
+# Builds a parser in a fresh process and prints the time spent (in seconds)
+# "lalr": importing parser.parser, which builds the LALR parser (from the cache if available)
+# "earley": building the Earley parser, once the grammar is imported
+parser_build_timer_code = """
+import sys
+import time
+
+from lark import Lark
+
+t1 = time.time()
+import parser.parser
+t2 = time.time()
+
+if sys.argv[1] == "lalr":
+    print(t2 - t1)
+else:
+    Lark(parser.parser.SimPPL_grammar, start="p", maybe_placeholders=False)
+    t3 = time.time()
+    print(t3 - t2)
+"""
+
+
+
+# Times building a parser in a new process
+# parser_type (str): "lalr" or "earley"
+# remove_cache (bool): Whether or not the LALR cache is removed before each repetition
+# return time in seconds (float)
+def time_parser_build(parser_type, remove_cache):
+
+    measured_times = []
+
+    for a_repetition in range(0, cold_start_repetitions):
+
+        if remove_cache and (parser.parser.parser_cache_filepath != None) and os.path.isfile(parser.parser.parser_cache_filepath):
+            os.remove(parser.parser.parser_cache_filepath)
+
+        completed_process = subprocess.run([sys.executable, "-c", parser_build_timer_code, parser_type],
+            cwd=current_repository_path, capture_output=True, text=True, check=True)
+
+        measured_times.append(float(completed_process.stdout.strip().split("\n")[-1]))
+
+    return min(measured_times)
+
+
+
+# Times parsing a program
+# return time in seconds (float)
+def time_parse(used_parser, program_text):
+
+    t1 = time.time()
+    used_parser.parse(program_text)
+    t2 = time.time()
+
+    return t2 - t1
+
+
+
+if __name__ == "__main__":
+
+    print("Cold start (ms)")
+    print("    %-30s %s" % ("LALR, no cache", format_ms(time_parser_build("lalr", True))))
+    print("    %-30s %s" % ("LALR, cached", format_ms(time_parser_build("lalr", False))))
+    print("    %-30s %s" % ("Earley", format_ms(time_parser_build("earley", False))))
+    print()
+
+    earley_parser = Lark(parser.parser.SimPPL_grammar, start="p", maybe_placeholders=False)
+
+    print("%-12s %-12s %-18s %-12s %-18s" % ("statements", "LALR (ms)", "LALR (stmt/s)", "Earley (ms)", "Earley (stmt/s)"))
+
+    for num_statements in program_lengths:
+
+        program_text = generate_statement_sequence_program(num_statements)
+
+        lalr_time = time_parse(parser.parser.SimPPL_parser, program_text)
+
+        if num_statements <= earley_max_statements:
+            earley_time = time_parse(earley_parser, program_text)
+            earley_rate = "%d" % (num_statements/earley_time, )
+        else:
+            earley_time = None
+            earley_rate = "-"
+
+        print("%-12d %-12s %-18d %-12s %-18s" % (num_statements, format_ms(lalr_time), num_statements/lalr_time,
+            format_ms(earley_time), earley_rate))
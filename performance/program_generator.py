@@ -0,0 +1,175 @@
+"""
+SUMMARY
+
+Generates synthetic Guillemot programs of a requested size, designed to measure how the inference methods scale.
+"""
+
+
+
+# Generates the pigeons and pigeonholes program (see benchmarks/pigeon.glmt) for any number of pigeons and holes
+# Each pigeon adds an "if" statement and a marginalization, so the program depth grows linearly with the number of pigeons
+# num_pigeons (int)
+# num_holes (int): At least 2
+# marginalize (bool): Whether or not the hole counters are marginalized after each pigeon
+# return program text (str)
+def generate_pigeon_program(num_pigeons, num_holes=2, marginalize=True):
+
+    assert num_holes >= 2, "At least 2 holes are required, %d were requested" % (num_holes, )
+
+    hole_names = ["H%d" % (a_hole + 1, ) for a_hole in range(0, num_holes)]
+
+    program_lines = ["%s = 0;" % (a_hole_name, ) for a_hole_name in hole_names]
+
+    for a_pigeon in range(0, num_pigeons):
+
+        hole_odds = ", ".join("%d=1" % (a_hole + 1, ) for a_hole in range(0, num_holes))
+        program_lines.append("P ~ discrete_numeric(%s);" % (hole_odds, ))
+
+        # The last hole is always the "else" branch
+        for a_hole in range(0, num_holes - 1):
+            condition_start = "if" if a_hole == 0 else "} else if"
+            program_lines.append("%s (P == %d) {" % (condition_start, a_hole + 1))
+            program_lines.append("    %s = (%s + 1);" % (hole_names[a_hole], hole_names[a_hole]))
+
+        program_lines.append("} else {")
+        program_lines.append("    %s = (%s + 1);" % (hole_names[-1], hole_names[-1]))
+        program_lines.append("};")
+
+        if marginalize:
+            program_lines.append("marginalize(%s);" % (", ".join(hole_names), ))
+
+    program_lines.append("return (%s == %s);" % (hole_names[0], hole_names[1]))
+
+    return "\n".join(program_lines) + "\n"
+
+
+
+# Generates the independent city travel program (see benchmarks/independent_city_travel_*.glmt) for any number of cities
+# The query only depends on the first two cities
+# num_cities (int): At least 2
+# search_space_reduction (str): "marginalize", "eliminate", or None (no reduction, the frontier grows as 3^num_cities)
+# return program text (str)
+def generate_city_travel_program(num_cities, search_space_reduction=None):
+
+    assert num_cities >= 2, "At least 2 cities are required, %d were requested" % (num_cities, )
+    assert search_space_reduction in ["marginalize", "eliminate", None], "Unknown search space reduction '%s'" % (search_space_reduction, )
+
+    program_lines = []
+
+    for a_city in range(0, num_cities):
+        program_lines.append("city%d ~ discrete_qualitative(\"%d1\"=6, \"%d2\"=4, \"%d3\"=5);" % (a_city, a_city, a_city, a_city))
+
+        # The first two cities are the ones of interest
+        if a_city < 1:
+            continue
+
+        if search_space_reduction == "marginalize":
+            program_lines.append("marginalize(city0, city1);")
+        elif (search_space_reduction == "eliminate") and (a_city > 1):
+            program_lines.append("eliminate_variable(city%d);" % (a_city, ))
+
+    program_lines.append("return ((city0 == \"03\") && (city1 == \"11\"));")
+
+    return "\n".join(program_lines) + "\n"
+
+
+
+# Generates a long sequence of simple statements, designed to measure the parser and the costs that scale with the program length
+# The frontier never has more than two traces, since there is only a single flip
+# num_statements (int): Number of statements after the flip (an "if" statement counts as one)
+# return program text (str)
+def generate_statement_sequence_program(num_statements):
+
+    # Statements repeated cyclically
+    statement_cycle = [
+        "x = (x + 1);",
+        "if (c == 1) {y = (x * 2)} else {y = (x - 1)};",
+        "observe (x >= 0);",
+        "z = ((y + x) / 2);"
+    ]
+
+    program_lines = ["c ~ flip 0.5;", "x = 0;", "y = 0;"]
+
+    for a_statement in range(0, num_statements):
+        program_lines.append(statement_cycle[a_statement % len(statement_cycle)])
+
+    program_lines.append("return (c == 1);")
+
+    return "\n".join(program_lines) + "\n"
+
+
+
+# Generates a program flipping coins and observing that at least a third of them landed heads after each flip
+# Every observation adds dead ends to the circuit, and the frontier grows exponentially with the number of coins
+# num_coins (int): At least 1
+# return program text (str)
+def generate_coin_observation_program(num_coins):
+
+    assert num_coins >= 1, "At least 1 coin is required, %d were requested" % (num_coins, )
+
+    program_lines = ["heads = 0;"]
+
+    for a_coin in range(0, num_coins):
+        program_lines.append("c%d ~ flip 0.5;" % (a_coin, ))
+        program_lines.append("if (c%d == 1) {heads = (heads + 1)};" % (a_coin, ))
+        program_lines.append("observe (heads >= %d);" % ((a_coin + 1)//3, ))
+
+    program_lines.append("return (c0 == 1);")
+
+    return "\n".join(program_lines) + "\n"
+
+
+
+# Generates a program observing noisy readings of a hidden state, each reading only has a probability of about 1/4 of matching
+# the observed value, so the probability of meeting all the observations decreases exponentially with the number of readings
+# num_readings (int): At least 1
+# return program text (str)
+def generate_noisy_sensor_program(num_readings):
+
+    assert num_readings >= 1, "At least 1 reading is required, %d were requested" % (num_readings, )
+
+    # Odds of each reading value (0 to 3) for each state (0 to 3), the state is the most likely reading
+    reading_odds = [", ".join("%d=%d" % (a_reading, 3 if a_reading == a_state else 1) for a_reading in range(0, 4)) for a_state in range(0, 4)]
+
+    # Observed readings, cycled
+    observed_readings = [1, 1, 2, 1, 3, 1, 0]
+
+    program_lines = ["state ~ discrete_numeric(0=1, 1=1, 2=1, 3=1);"]
+
+    for a_reading in range(0, num_readings):
+
+        for a_state in range(0, 3):
+            condition_start = "if" if a_state == 0 else "} else if"
+            program_lines.append("%s (state == %d) {" % (condition_start, a_state))
+            program_lines.append("    reading ~ discrete_numeric(%s);" % (reading_odds[a_state], ))
+
+        program_lines.append("} else {")
+        program_lines.append("    reading ~ discrete_numeric(%s);" % (reading_odds[3], ))
+        program_lines.append("};")
+
+        program_lines.append("observe (reading == %d);" % (observed_readings[a_reading % len(observed_readings)], ))
+
+    program_lines.append("return (state == 1);")
+
+    return "\n".join(program_lines) + "\n"
+
+
+
+# Generates a program flipping biased coins and copying each of them into another variable ("d0 = c0;")
+# The query reads the first coin and the copy of the second one, so the automatic elimination removes every other copy (including
+# the one of the first coin), and every engine must give the same result whether the copies are kept or not
+# num_coins (int): At least 2
+# return program text (str)
+def generate_copy_assignment_program(num_coins):
+
+    assert num_coins >= 2, "At least 2 coins are required, %d were requested" % (num_coins, )
+
+    program_lines = []
+
+    for a_coin in range(0, num_coins):
+        program_lines.append("c%d ~ flip 0.3;" % (a_coin, ))
+        program_lines.append("d%d = c%d;" % (a_coin, a_coin))
+
+    program_lines.append("return ((c0 == 1) && (d1 == 1));")
+
+    return "\n".join(program_lines) + "\n"
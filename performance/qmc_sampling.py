@@ -0,0 +1,82 @@
+"""
+SUMMARY
+
+Measures the error of rejection sampling with stratified and quasi-random (scrambled Sobol) uniform variates next to independent
+ones (see inference/inference_sampling.py Batch_sampler.draw_end_nodes): the root mean squared error against the exact
+(enumeration) result over many seeds, for an increasing number of samples, and how many times smaller it is than the error of
+independent variates:
+
+    python3 -m performance.qmc_sampling
+"""
+
+
+import math
+
+import numpy as np
+
+from inference.inference_circuit import Circuit
+from inference.inference_sampling import uniform_sequences
+import parser.parser
+
+
+
+# Provided benchmarks measured
+benchmark_filepaths = ["benchmarks/hookes_law.glmt", "benchmarks/truck_engine.glmt"]
+
+
+# Numbers of samples measured, powers of two keep the balance of Sobol points
+measured_samples = [2**10, 2**12, 2**14, 2**16]
+
+
+# Seeds over which the error is averaged
+num_seeds = 100
+
+
+
+# Root mean squared error of the estimate over num_seeds seeds
+# return float
+def measure_error(batch_sampler, num_samples, uniform_sequence, exact_result):
+
+    squared_errors = []
+
+    for a_seed in range(0, num_seeds):
+
+        [meets_output_and_observes, meets_observes] = batch_sampler.rejection_counts(num_samples, np.random.default_rng(a_seed),
+                                                        uniform_sequence=uniform_sequence)
+
+        an_estimate = meets_output_and_observes/meets_observes if meets_observes > 0 else 0
+        squared_errors.append((an_estimate - exact_result)**2)
+
+    return math.sqrt(sum(squared_errors)/num_seeds)
+
+
+
+if __name__ == "__main__":
+
+    print("%-24s %-10s %-12s %-12s %-12s" % ("program", "samples", "sequence", "RMSE", "reduction"))
+
+    for a_filepath in benchmark_filepaths:
+
+        with open(a_filepath, "r") as ff:
+            parsed_program = parser.parser.Program_structure(ff.read(), a_filepath)
+
+        parsed_program.eliminate_dead_variables()
+
+        built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+        [exact_output_and_observes, exact_observes] = built_circuit.enumeration_probabilities()
+
+        batch_sampler = built_circuit.obtain_batch_sampler()
+
+        for num_samples in measured_samples:
+
+            random_error = None
+
+            for a_uniform_sequence in uniform_sequences:
+
+                an_error = measure_error(batch_sampler, num_samples, a_uniform_sequence, exact_output_and_observes/exact_observes)
+
+                if random_error == None:
+                    random_error = an_error
+
+                print("%-24s %-10d %-12s %-12.6f %-12s" % (a_filepath.split("/")[-1], num_samples, a_uniform_sequence, an_error,
+                    "%.2fx" % (random_error/an_error, ) if an_error > 0 else "exact"))
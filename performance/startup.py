@@ -0,0 +1,39 @@
+"""
+SUMMARY
+
+Measures the time to first result of each program in benchmarks/ when run as "python3 main.py enumerate <program>",
+including the interpreter startup, imports and parsing. Optionally compares it with another Guillemot tree (e.g. an
+older version), passed as the only argument:
+
+    python3 -m performance.startup [/path/to/reference/Guillemot]
+"""
+
+
+import glob
+import os
+import sys
+
+from .aux_performance import current_repository_path, format_ms, time_to_first_result
+
+
+
+if __name__ == "__main__":
+
+    reference_repository_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    benchmark_filepaths = sorted(glob.glob(os.path.join(current_repository_path, "benchmarks", "*.glmt")))
+
+    print("%-40s %-10s %-16s %-18s" % ("benchmark", "result", "current (ms)", "reference (ms)"))
+
+    for a_benchmark_filepath in benchmark_filepaths:
+
+        first_line, current_time = time_to_first_result(current_repository_path, a_benchmark_filepath, "enumerate")
+
+        if reference_repository_path == None:
+            reference_time = None
+        else:
+            reference_time = time_to_first_result(reference_repository_path, a_benchmark_filepath, "enumerate")[1]
+
+        # Long outputs (e.g. the wls leaf nodes) are shortened
+        print("%-40s %-10s %-16s %-18s" % (os.path.basename(a_benchmark_filepath), str(first_line)[:10], format_ms(current_time),
+            format_ms(reference_time)))
@@ -0,0 +1,39 @@
+"""
+SUMMARY
+
+Measures the parsing and circuit building time of long sequences of statements (up to 50k), which nest one "seq" level
+per statement. The time per statement should remain roughly constant as the program grows:
+
+    python3 -m performance.statement_sequence
+"""
+
+
+import time
+
+from inference.inference_circuit import Circuit
+from .program_generator import generate_statement_sequence_program
+import parser.parser
+
+
+
+# Number of statements of the generated programs
+program_lengths = [1000, 5000, 10000, 20000, 50000]
+
+
+
+if __name__ == "__main__":
+
+    print("%-12s %-12s %-14s %-19s %-10s" % ("statements", "parse (ms)", "circuit (ms)", "circuit (μs/stmt)", "traces"))
+
+    for num_statements in program_lengths:
+
+        program_text = generate_statement_sequence_program(num_statements)
+
+        t1 = time.time()
+        parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+        t2 = time.time()
+        built_circuit = Circuit(parsed_program.instructions_tree, parsed_program.output_tree)
+        t3 = time.time()
+
+        print("%-12d %-12.1f %-14.1f %-19.1f %-10d" % (num_statements, 1000*(t2 - t1), 1000*(t3 - t2), 1e6*(t3 - t2)/num_statements,
+            len(built_circuit.bottom_nodes)))
@@ -0,0 +1,61 @@
+"""
+SUMMARY
+
+Compares variable elimination over a factor graph (min-fill and min-degree elimination orders) against enumeration with the
+automatic elimination of unused variables, reporting the largest intermediate factor of each order:
+
+    python3 -m performance.variable_elimination
+"""
+
+
+from inference.inference_circuit import Circuit
+from inference.inference_factors import Factor_graph, valid_elimination_orders
+from .aux_performance import format_ms, timed_result
+from .program_generator import generate_city_travel_program, generate_coin_observation_program, generate_pigeon_program
+from .program_generator import generate_copy_assignment_program, generate_statement_sequence_program
+import parser.parser
+
+
+
+# Programs measured
+# [[name (str), program text (str)], ...]
+measured_programs = [
+    ["pigeon, 20 (no marg.)", generate_pigeon_program(20, marginalize=False)],
+    ["pigeon, 50 (no marg.)", generate_pigeon_program(50, marginalize=False)],
+    ["pigeon, 15, 3 holes", generate_pigeon_program(15, num_holes=3, marginalize=False)],
+    ["city travel, 50", generate_city_travel_program(50)],
+    ["coin observation, 14", generate_coin_observation_program(14)],
+    ["statement sequence, 200", generate_statement_sequence_program(200)],
+    ["copy assignment, 10", generate_copy_assignment_program(10)]
+]
+
+
+
+if __name__ == "__main__":
+
+    print("%-26s %-14s %s %-6s" % ("program", "enum. (ms)", " ".join("%-28s" % (an_order + " (ms, largest factor)", )
+        for an_order in valid_elimination_orders), "same"))
+
+    for program_name, program_text in measured_programs:
+
+        parsed_program = parser.parser.Program_structure(program_text, "generated.glmt")
+
+        found_results = set()
+        measured_columns = []
+
+        for an_order in valid_elimination_orders:
+
+            [printed_result, inference_time, intermediate_factor_sizes] = timed_result(lambda: Factor_graph(parsed_program.instructions_tree,
+                parsed_program.output_tree).infer_by_variable_elimination(an_order))
+
+            found_results.add(printed_result)
+            measured_columns.append("%-28s" % ("%s (%d)" % (format_ms(inference_time), max(intermediate_factor_sizes, default=0)), ))
+
+        parsed_program.eliminate_dead_variables()
+
+        [printed_result, enumeration_time, _returned] = timed_result(lambda: Circuit(parsed_program.instructions_tree,
+            parsed_program.output_tree).infer_by_enumeration())
+
+        found_results.add(printed_result)
+
+        print("%-26s %-14s %s %-6s" % (program_name, format_ms(enumeration_time), " ".join(measured_columns), len(found_results) == 1))
@@ -0,0 +1,53 @@
+"""
+SUMMARY
+
+Compares the circuit enumeration ("enumerate") with the columnar one ("enumerate-vectorized") on discrete programs:
+
+    python3 -m performance.vectorized_enumeration
+"""
+
+
+import os
+
+from .aux_performance import current_repository_path, format_ms, run_inference_in_process
+from .program_generator import generate_city_travel_program, generate_copy_assignment_program, generate_pigeon_program
+
+
+
+# Discrete benchmarks provided with Guillemot
+discrete_benchmarks = ["independent_city_travel_exp_marg.glmt", "independent_city_travel_var_elim.glmt", "pigeon.glmt",
+                        "select_square_top.glmt", "show_circuit.glmt"]
+
+
+
+# Runs both enumeration methods on a program and shows their results side by side
+def compare_enumerations(program_name, program_text):
+
+    circuit_result, circuit_time       = run_inference_in_process(program_text, "enumerate")
+    vectorized_result, vectorized_time = run_inference_in_process(program_text, "enumerate-vectorized")
+
+    print("%-45s %-10s %-10s %-14s %-14s %-8s" % (program_name, circuit_result, vectorized_result, format_ms(circuit_time),
+        format_ms(vectorized_time), "%.1fx" % (circuit_time/max(vectorized_time, 10**(-9)), )))
+
+
+
+if __name__ == "__main__":
+
+    # The circuit is not shown during the benchmark
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    print("%-45s %-10s %-10s %-14s %-14s %-8s" % ("program", "circuit", "vectorized", "circuit (ms)", "vectorized (ms)", "speedup"))
+
+    for a_benchmark in discrete_benchmarks:
+
+        with open(os.path.join(current_repository_path, "benchmarks", a_benchmark), "r") as ff:
+            compare_enumerations(a_benchmark, ff.read())
+
+    for a_num_cities in [4, 6, 8]:
+        compare_enumerations("city travel, %d cities, no reduction" % (a_num_cities, ), generate_city_travel_program(a_num_cities))
+
+    for a_num_pigeons in [8, 32]:
+        compare_enumerations("pigeon, %d pigeons, 3 holes" % (a_num_pigeons, ), generate_pigeon_program(a_num_pigeons, num_holes=3))
+
+    # Copied variables must not count the probability of the original variable twice (see generate_copy_assignment_program)
+    compare_enumerations("copy assignment, 10 coins", generate_copy_assignment_program(10))